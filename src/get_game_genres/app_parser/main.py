@@ -4,29 +4,38 @@
 __author__ = "ipetrash"
 
 
+import argparse
+import asyncio
 import time
-import sys
 
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from timeit import default_timer
-from threading import Thread
+from typing import Iterator
 
 # pip install simple-wait
 from simple_wait import wait
 
 from get_game_genres.common import get_logger, get_games_list
-from get_game_genres.db import db_create_backup, Dump
+from get_game_genres.db import (
+    db_create_backup,
+    get_write_stats,
+    Dump,
+    DumpIndex,
+    DumpWriter,
+)
 from get_game_genres.generate_games import generate_games as create_generate_games
 from get_game_genres.generate_genres import create as create_generate_genres
 from get_game_genres.genre_translate_file import create as create_genre_translate
 from get_game_genres.parsers import get_parsers, print_parsers
 from get_game_genres.parsers.base_parser import BaseParser
+from get_game_genres.parsers.circuit_breaker import CircuitOpenError
+from get_game_genres.parsers.lookup_context import LookupContext
 
 from get_game_genres.third_party.add_notify_telegram import add_notify
 from get_game_genres.third_party.atomic_counter import AtomicCounter
 from get_game_genres.third_party.seconds_to_str import seconds_to_str
 
-IS_LOOP: bool = "--loop" in sys.argv
-
 # Test
 USE_FAKE_PARSER: bool = False
 if USE_FAKE_PARSER:
@@ -36,13 +45,13 @@ if USE_FAKE_PARSER:
         def get_site_name(cls) -> str:
             return "_test_"
 
-        def _parse(self) -> list[str]:
-            if self.game_name == "С_умлаутом":
+        def _parse(self, ctx: LookupContext) -> list[str]:
+            if ctx.game_name == "С_умлаутом":
                 return ["Файтинг̆", "Файтинг"]
             return ["RGB-bar", "Action-bar"]
 
     # Monkey Patch
-    def get_parsers():
+    def get_parsers(*args, **kwargs):
         return [FakeParser()]
 
     # Monkey Patch
@@ -52,132 +61,200 @@ if USE_FAKE_PARSER:
 
 log = get_logger()
 counter = AtomicCounter()
+dump_index = DumpIndex()
+dump_writer = DumpWriter(max_size=50, max_delay=60, index=dump_index)
 
-MAX_TIMEOUT: int = 10  # 10 seconds
-TIMEOUT_EVERY_N_GAMES: int = 50  # Every 50 games
-TIMEOUT_BETWEEN_N_GAMES: int = 3 * 60  # 3 minutes
+# Частоту запросов к сайтам задает RateLimiter парсера, а пауза перед повтором
+# после ошибки растет экспоненциально, но не меньше той, что требует сайт
+RETRY_PAUSE_MIN: int = 10  # 10 seconds
+RETRY_PAUSE_MAX: int = 5 * 60  # 5 minutes
 
-PAUSES: list[tuple[str, int]] = [
-    ("1 минута", 60),
-    ("5 минут", 5 * 60),
-    ("10 минут", 10 * 60),
-    ("15 минут", 15 * 60),
-]
 
+async def process_game(
+    parser: BaseParser,
+    game_name: str,
+    number: int,
+    max_num_request: int = 5,
+) -> None:
+    site_name: str = parser.get_site_name()
+    num_request: int = 0
 
-def run_parser(parser: BaseParser, games: list[str], max_num_request: int = 5) -> None:
-    try:
-        site_name: str = parser.get_site_name()
-        timeout: int = 3  # 3 seconds
-        number: int = 0
+    while True:
+        num_request += 1
+        try:
+            if num_request > 1:
+                log.info(
+                    "#%s. Поиск жанров для %r (%s). Попытки %s/%s",
+                    number, game_name, site_name, num_request, max_num_request,
+                )
+            else:
+                log.info("#%s. Поиск жанров для %r (%s)", number, game_name, site_name)
+
+            genres: list[str] = await parser.async_get_game_genres(game_name)
+            log.info(
+                "#%s. Найдено жанров %r (%s): %s", number, game_name, site_name, genres
+            )
+
+            await asyncio.to_thread(dump_writer.add, site_name, game_name, genres)
+            counter.inc()
+            break
+
+        except CircuitOpenError:
+            raise
 
-        for game_name in games:
-            if Dump.exists(site_name, game_name):
+        except Exception as e:
+            log.exception(
+                "#%s. Ошибка при запросе %s/%s (%s)",
+                number, num_request, max_num_request, site_name,
+            )
+
+            # Сайт признан недоступным - игра откладывается, а не записывается пустой
+            if parser.circuit_breaker.is_open():
+                raise CircuitOpenError(
+                    site_name, parser.circuit_breaker.get_retry_after()
+                ) from e
+
+            if num_request >= max_num_request:
+                text: str = f"Попытки закончились для поиска {game_name!r} ({site_name})"
+                log.info("#%s. %s", number, text)
+
+                # Добавляем пустой список жанров, для пропуска игры
+                await asyncio.to_thread(
+                    dump_writer.add, site_name, game_name, genres=[]
+                )
+
+                # Отправка сообщения в telegram
+                await asyncio.to_thread(add_notify, log.name, text)
+                break
+
+            pause_secs: float = max(
+                min(RETRY_PAUSE_MIN * 2 ** (num_request - 1), RETRY_PAUSE_MAX),
+                parser.rate_limiter.get_wait_time(),
+            )
+            log.info(
+                "#%s. Пауза на %s. %s",
+                number, seconds_to_str(pause_secs), parser.rate_limiter,
+            )
+            await asyncio.sleep(pause_secs)
+
+
+async def run_parser(parser: BaseParser, games: list[str]) -> None:
+    # Игры сайта разбирают max_concurrency обработчиков, поэтому одновременно
+    # в работе не больше max_concurrency игр сайта. Частота запросов ограничена
+    # общим для всех обработчиков сайта RateLimiter
+    site_name: str = parser.get_site_name()
+    games_iter: Iterator[tuple[int, str]] = enumerate(games, start=1)
+
+    async def worker() -> None:
+        for number, game_name in games_iter:
+            if dump_index.exists(site_name, game_name):
                 continue
 
             try:
-                number += 1
-                num_request: int = 0
-
-                while True:
-                    num_request += 1
-                    try:
-                        message = (
-                            f"#{number}. Поиск жанров для {game_name!r} ({site_name})"
-                        )
-                        if num_request > 1:
-                            message = (
-                                f"{message}. Попытки {num_request}/{max_num_request}"
-                            )
-                        log.info(message)
-
-                        genres: list[str] = parser.get_game_genres(game_name)
-                        log.info(
-                            f"#{number}. Найдено жанров {game_name!r} ({site_name}): {genres}"
-                        )
-
-                        Dump.add(site_name, game_name, genres)
-                        counter.inc()
-
-                        time.sleep(timeout)
-                        break
-
-                    except:
-                        log.exception(
-                            f"#{number}. Ошибка при запросе {num_request}/{max_num_request} ({site_name})"
-                        )
-                        if num_request >= max_num_request:
-                            text: str = (
-                                f"Попытки закончились для поиска {game_name!r} ({site_name})"
-                            )
-                            log.info(f"#{number}. {text}")
-
-                            # Добавляем пустой список жанров, для пропуска игры
-                            Dump.add(site_name, game_name, genres=[])
-
-                            # Отправка сообщения в telegram
-                            add_notify(log.name, text)
-                            break
-
-                        pause_text, pause_secs = PAUSES[num_request - 1]
-                        log.info(f"#{number}. Пауза на {pause_text}")
-                        time.sleep(pause_secs)
-
-                        timeout += 1
-                        if timeout > MAX_TIMEOUT:
-                            timeout = MAX_TIMEOUT
-
-                if number % TIMEOUT_EVERY_N_GAMES == 0:
-                    log.info(
-                        f"#{number}. Пауза за каждые {TIMEOUT_EVERY_N_GAMES} игр: {TIMEOUT_BETWEEN_N_GAMES} секунд"
-                    )
-                    time.sleep(TIMEOUT_BETWEEN_N_GAMES)
-
-            except:
-                log.exception(f"#{number}. Ошибка с игрой {game_name!r} ({site_name})")
-
-    except:
-        log.exception(f"Ошибка:")
-
-
-def run(parsers: list[BaseParser]):
-    log.info(f"Запуск")
+                await process_game(parser, game_name, number)
+
+            except CircuitOpenError as e:
+                # Оставшиеся игры сайта будут обработаны в следующих запусках
+                log.warning("#%s. Обход %s остановлен: %s", number, site_name, e)
+                return
+
+            except Exception:
+                log.exception("#%s. Ошибка с игрой %r (%s)", number, game_name, site_name)
+
+    try:
+        await asyncio.gather(*[worker() for _ in range(max(parser.max_concurrency, 1))])
+    except Exception:
+        log.exception("Ошибка:")
+
+    deferred_games: list[str] = dump_index.get_pending(site_name, games)
+    if deferred_games:
+        log.info("Отложено игр для %s: %s", site_name, len(deferred_games))
+
+    log.info(
+        "Завершен обход %s. %s. %s. %s",
+        site_name, parser.rate_limiter, parser.latency, parser.circuit_breaker,
+    )
+
+
+async def run_parsers(items: list[tuple[BaseParser, list[str]]]) -> None:
+    # Запросы парсеров выполняются в пуле потоков, его хватает на все обработчики
+    max_workers: int = sum(max(parser.max_concurrency, 1) for parser, _ in items)
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=max_workers + 4))
+
+    await asyncio.gather(*[run_parser(parser, games) for parser, games in items])
+
+
+def run(parsers: list[BaseParser], games: list[str] | None = None):
+    log.info("Запуск")
     t: float = default_timer()
 
-    db_create_backup()
+    backup_file_name: Path | None = db_create_backup()
+    if backup_file_name:
+        log.info("Создан бекап базы: %s", backup_file_name)
+    else:
+        log.info("База не изменилась с прошлого бекапа")
+
+    # Для точечного перезапуска игры можно задать явно
+    if not games:
+        games = get_games_list()
+    log.info("Всего игр: %d", len(games))
+
+    # Дампы могли измениться между запусками, поэтому индекс собирается заново
+    dump_index.clear()
+
+    items: list[tuple[BaseParser, list[str]]] = []
+    for parser in parsers:
+        site_name: str = parser.get_site_name()
+
+        pending_games: list[str] = dump_index.get_pending(site_name, games)
+        log.info("Осталось игр для %s: %d", site_name, len(pending_games))
+        if not pending_games:
+            continue
 
-    games: list[str] = get_games_list()
-    log.info(f"Всего игр: {len(games)}")
+        # Сайт был недоступен в прошлых запусках и время проверки еще не пришло
+        if parser.circuit_breaker.is_open():
+            log.info("Пропуск %s: %s", site_name, parser.circuit_breaker)
+            continue
 
-    threads: list[Thread] = [
-        Thread(target=run_parser, args=[parser, games]) for parser in parsers
-    ]
-    log.info(f"Всего парсеров/потоков: {len(threads)}")
+        items.append((parser, pending_games))
+
+    log.info(
+        "Всего парсеров: %d, обработчиков: %d",
+        len(items),
+        sum(parser.max_concurrency for parser, _ in items),
+    )
 
     counter.value = 0
 
-    # TODO: Проверить работу параллельного выполнения
-    for thread in threads:
-        thread.start()
+    # Все сайты обходятся в одном цикле событий
+    asyncio.run(run_parsers(items))
 
-    for thread in threads:
-        thread.join()
+    # Запись оставшихся в буфере результатов
+    dump_writer.flush()
 
     log.info(
-        f"Добавлено игр: {counter.value}. Игр в базе: {Dump.select().count()}. "
-        f"Пройдено времени: {seconds_to_str(default_timer() - t)}"
+        "Добавлено игр: %d. Игр в базе: %d. Пройдено времени: %s",
+        counter.value,
+        Dump.select().count(),
+        seconds_to_str(default_timer() - t),
     )
-    log.info(f"Завершено.\n")
+
+    write_stats = get_write_stats()
+    if write_stats:
+        log.info("Статистика очереди записи: %s", write_stats)
+        write_stats.reset()
+    log.info("Завершено.\n")
 
     create_genre_translate.run()
     create_generate_genres.run()
     create_generate_games.run()
 
 
-def run_loop(parsers: list[BaseParser]):
+def run_loop(parsers: list[BaseParser], games: list[str] | None = None):
     while True:
         try:
-            run(parsers)
+            run(parsers, games)
             wait(hours=1)
 
         except Exception:
@@ -189,17 +266,30 @@ def run_loop(parsers: list[BaseParser]):
 
 
 def main() -> None:
-    parsers: list[BaseParser] = get_parsers()
+    parser = argparse.ArgumentParser(description="Сбор жанров игр с сайтов")
+    parser.add_argument("--sites", nargs="+", metavar="SITE", help="Только эти сайты")
+    parser.add_argument(
+        "--exclude-sites", nargs="+", metavar="SITE", help="Все сайты, кроме этих"
+    )
+    parser.add_argument(
+        "--games", nargs="+", metavar="GAME", help="Только эти игры вместо списка игр"
+    )
+    parser.add_argument("--loop", action="store_true", help="Запускать каждый час")
+    args = parser.parse_args()
+
+    parsers: list[BaseParser] = get_parsers(
+        sites=args.sites, exclude_sites=args.exclude_sites
+    )
     print_parsers(parsers, log=lambda *args, **kwargs: log.info(*args, **kwargs))
 
-    if IS_LOOP:
-        run_loop(parsers)
+    if args.loop:
+        run_loop(parsers, args.games)
         return
 
     last_error: Exception | None = None
     for _ in range(5):
         try:
-            run(parsers)
+            run(parsers, args.games)
             return
         except Exception as e:
             last_error = e
@@ -9,7 +9,10 @@ from pathlib import Path
 from flask import Flask, jsonify
 
 from get_game_genres.config import PORT
-from get_game_genres.db import Game, Genre
+from get_game_genres.db import DB_MODE_READ_ONLY, Game, Genre, db, init_db
+
+# API только читает, поэтому работает без очереди записи парсера
+init_db(mode=DB_MODE_READ_ONLY)
 
 app = Flask(
     __name__,
@@ -18,6 +21,17 @@ app = Flask(
 app.config["JSON_SORT_KEYS"] = False
 
 
+@app.before_request
+def db_connect() -> None:
+    db.connect(reuse_if_open=True)
+
+
+@app.teardown_request
+def db_close(exc: BaseException | None) -> None:
+    if not db.is_closed():
+        db.close()
+
+
 @app.route("/api/games")
 def get_games():
     return jsonify([game.to_dict() for game in Game.select()])
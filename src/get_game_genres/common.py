@@ -5,18 +5,16 @@ __author__ = "ipetrash"
 
 
 import json
-import logging
-import sys
 import unicodedata
 
 from datetime import datetime
-from logging.handlers import RotatingFileHandler
 from pathlib import Path
 from urllib.parse import urljoin
 
 import requests
 from bs4 import BeautifulSoup
 
+from get_game_genres import log_backend
 from get_game_genres.config import DIR_LOGS
 from get_game_genres.third_party.parse_played_games import parse_played_games
 
@@ -72,25 +70,7 @@ def get_games_list() -> list[str]:
 
 
 def get_logger(name: str = "dump.txt", dir_logs: Path = DIR_LOGS, encoding="utf-8"):
-    dir_logs.mkdir(parents=True, exist_ok=True)
-    file = dir_logs / name
-
-    log = logging.getLogger(name)
-    log.setLevel(logging.DEBUG)
-
-    formatter = logging.Formatter("[%(asctime)s] %(levelname)-8s %(message)s")
-
-    fh = RotatingFileHandler(
-        file, maxBytes=10_000_000, backupCount=5, encoding=encoding
-    )
-    fh.setFormatter(formatter)
-    log.addHandler(fh)
-
-    sh = logging.StreamHandler(stream=sys.stdout)
-    sh.setFormatter(formatter)
-    log.addHandler(sh)
-
-    return log
+    return log_backend.get_logger(name, dir_logs / name, encoding=encoding)
 
 
 def process_umlauts(text: str) -> str:
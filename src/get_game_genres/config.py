@@ -13,15 +13,84 @@ USER_AGENT: str = (
 DIR: Path = Path(__file__).resolve().parent
 
 DIR_BACKUP: Path = DIR / "backup"
+
+# Сколько бекапов базы хранить: последних, по одному за день и по одному за неделю
+BACKUP_KEEP_LAST: int = 3
+BACKUP_KEEP_DAILY: int = 7
+BACKUP_KEEP_WEEKLY: int = 4
+
 DIR_ERRORS: Path = DIR / "errors"
+
+# Дампы ответов сайтов с ошибками, см. parsers/error_spool.py
+ERROR_SPOOL_MAX_SIZE: int = 100 * 1024 * 1024  # 100MB сжатых дампов
+ERROR_SPOOL_MAX_AGE: int = 7 * 24 * 60 * 60  # 7 дней
+ERROR_SPOOL_SAMPLE_AFTER: int = 10  # Сколько ошибок сайта с тем же статусом сохранять
+ERROR_SPOOL_SAMPLE_EVERY: int = 100  # Из последующих - каждую такую
+ERROR_SPOOL_QUEUE_SIZE: int = 100
 DIR_LOGS: Path = DIR / "logs"
 
+# Кэш ответов сайтов для парсеров
+USE_HTTP_CACHE: bool = True
+HTTP_CACHE_FILE_NAME: Path = DIR / "cache" / "http_cache.sqlite"
+HTTP_CACHE_MAX_SIZE: int = 512 * 1024 * 1024  # 512MB сжатых ответов
+HTTP_CACHE_TTL: int = 24 * 60 * 60  # 1 день, у парсеров может быть свой
+
+# Запоминать найденные адреса страниц игр, чтобы при обновлении не искать их заново
+USE_GAME_URL_CACHE: bool = True
+
+# Список парсеров, чтобы не импортировать модули всех парсеров при каждом запуске
+FILE_NAME_PARSERS_MANIFEST: Path = DIR / "cache" / "parsers.json"
+
+# Записанные ответы сайтов для воспроизведения без сети (тесты и бенчмарк парсеров).
+# Отобранные кассеты лежат в репозитории, новые записываются в DIR_CASSETTES_RECORD
+# и переносятся в DIR_CASSETTES вручную, см. etc/cassettes/README.md
+DIR_CASSETTES: Path = DIR / "etc" / "cassettes"
+DIR_CASSETTES_RECORD: Path = DIR / "cassettes"
+
+# Настройки HTTP-подключений парсеров
+HTTP_POOL_MAX_SIZE: int = 10  # Подключений на хост в пуле сессии
+HTTP_RETRY_TOTAL: int = 3  # Повторы идемпотентных запросов при сбоях сети
+HTTP_RETRY_BACKOFF: float = 0.5  # Основа экспоненциальной паузы между повторами
+HTTP_CONNECT_TIMEOUT: float = 10.0
+HTTP_READ_TIMEOUT_MIN: float = 5.0
+HTTP_READ_TIMEOUT_MAX: float = 60.0  # Он же используется, пока мало замеров
+
+# Потоковое чтение страниц до нужного парсеру элемента, см. parsers/streaming.py
+HTTP_STREAM_CHUNK_SIZE: int = 16 * 1024
+HTTP_STREAM_MAX_SIZE: int = 5 * 1024 * 1024  # Ответы больше - ошибка
+
 DB_DIR_NAME: Path = DIR / "database"
-DB_DIR_NAME.mkdir(parents=True, exist_ok=True)
 
 DB_FILE_NAME: str = str(DB_DIR_NAME / "games.sqlite")
 
+# Настройки очереди записи (режим базы "queue")
+DB_QUEUE_MAX_SIZE: int = 64  # Max. # of pending writes that can accumulate.
+DB_RESULTS_TIMEOUT: float = 5.0  # Max. time to wait for query to be executed.
+
+# Размер пачек DumpWriter подстраивается под загруженность очереди записи
+DB_ADAPTIVE_BATCHING: bool = False
+
+# Настройки подключений только для чтения (режим базы "read_only" для веб-API)
+DB_READ_MMAP_SIZE: int = 256 * 1024 * 1024  # 256MB
+DB_READ_CACHE_SIZE: int = -1024 * 16  # 16MB page-cache
+
+# Вести нормализованные таблицы жанров (genre_name, site, dump_genre, game_genre)
+# и выполнять по ним выборки жанров. Перед включением нужно заполнить таблицы
+# миграцией migrations/002.py
+USE_NORMALIZED_GENRES: bool = False
+
+# Сколько секунд ждать ответа сайтов при поиске жанров одной игры, см. lookup_game.py
+LOOKUP_TIMEOUT: float = 60.0
+
 NEED_LOGS: bool = True
 LOG_FORMAT: str = "[%(asctime)s] %(levelname)-8s %(message)s"
 
+# Уровень логгеров по умолчанию и уровни отдельных логгеров по шаблонам имен,
+# например: {"parser_*": "INFO", "generate_games.py.txt": "WARNING"}
+LOG_LEVEL: str = "DEBUG"
+LOG_LEVELS: dict[str, str] = dict()
+
+# Если задан, то все логи дополнительно пишутся в этот файл в формате JSON lines
+LOG_JSON_FILE_NAME: Path | None = None
+
 PORT: int = 5501
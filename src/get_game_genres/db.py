@@ -4,22 +4,63 @@
 __author__ = "ipetrash"
 
 
+import gzip
+import hashlib
 import json
 import shutil
+import sqlite3
+import threading
 import time
 
 from collections import defaultdict
+from contextlib import AbstractContextManager, nullcontext
 from datetime import datetime
-from typing import Iterable, Type, Optional
+from itertools import groupby
+from operator import itemgetter
+from typing import Any, Iterable, Iterator, Type, Optional
 from pathlib import Path
 
 # pip install peewee
-from peewee import Field, TextField, Model, CharField, ForeignKeyField
+from peewee import (
+    EXCLUDED,
+    JOIN,
+    SQL,
+    CharField,
+    CompositeKey,
+    Database,
+    DateTimeField,
+    DatabaseProxy,
+    Field,
+    ForeignKeyField,
+    Join,
+    Model,
+    ModelSelect,
+    SchemaManager,
+    SqliteDatabase,
+    TextField,
+    Tuple,
+    chunked,
+    fn,
+    sort_models,
+)
 from playhouse.shortcuts import model_to_dict
 from playhouse.sqliteq import SqliteQueueDatabase
 
-from get_game_genres.config import DB_DIR_NAME, DB_FILE_NAME, DIR_BACKUP
+from get_game_genres.config import (
+    BACKUP_KEEP_DAILY,
+    BACKUP_KEEP_LAST,
+    BACKUP_KEEP_WEEKLY,
+    DB_ADAPTIVE_BATCHING,
+    DB_FILE_NAME,
+    DB_QUEUE_MAX_SIZE,
+    DB_READ_CACHE_SIZE,
+    DB_READ_MMAP_SIZE,
+    DB_RESULTS_TIMEOUT,
+    DIR_BACKUP,
+    USE_NORMALIZED_GENRES,
+)
 from get_game_genres.common import process_list
+from get_game_genres.db_queue import StatsSqliteQueueDatabase, WriteQueueStats
 from get_game_genres.third_party.shorten import shorten
 
 
@@ -31,15 +72,6 @@ class NotDefinedParameterException(Exception):
         super().__init__(text)
 
 
-def db_create_backup(backup_dir: Path = DIR_BACKUP, date_fmt: str = "%Y-%m-%d") -> None:
-    backup_dir.mkdir(parents=True, exist_ok=True)
-
-    zip_name = datetime.today().strftime(date_fmt)
-    zip_name = backup_dir / zip_name
-
-    shutil.make_archive(zip_name, "zip", DB_DIR_NAME)
-
-
 class ListField(Field):
     field_type = "TEXT"
 
@@ -57,23 +89,347 @@ class ListField(Field):
         return json.dumps(value, ensure_ascii=False)
 
 
-# This working with multithreading
-# SOURCE: http://docs.peewee-orm.com/en/latest/peewee/playhouse.html#sqliteq
-db = SqliteQueueDatabase(
-    DB_FILE_NAME,
-    pragmas={
-        "foreign_keys": 1,
-        "journal_mode": "wal",  # WAL-mode
-        "cache_size": -1024 * 64,  # 64MB page-cache
-    },
-    use_gevent=False,  # Use the standard library "threading" module.
-    autostart=True,
-    queue_max_size=64,  # Max. # of pending writes that can accumulate.
-    results_timeout=5.0,  # Max. time to wait for query to be executed.
+# Табличная функция SQLite для разворачивания JSON-списка из ListField в строки
+def json_each(field: ListField):
+    return fn.json_each(field).alias("je")
+
+
+JSON_EACH_VALUE = SQL("je.value")
+
+
+def iter_genres_by_name(model: Type[Model]) -> Iterator[tuple[str, list[str]]]:
+    # Объединение, удаление дубликатов и сортировка жанров выполняются в SQLite,
+    # а строки читаются потоково без создания объектов моделей.
+    # LEFT JOIN нужен, чтобы не потерять записи с пустым списком жанров
+    query = (
+        model.select(model.name, JSON_EACH_VALUE)
+        .from_(Join(model, json_each(model.genres), JOIN.LEFT_OUTER, on=SQL("1")))
+        .group_by(model.name, JSON_EACH_VALUE)
+        .order_by(model.name, JSON_EACH_VALUE)
+    )
+    for name, rows in groupby(query.tuples().iterator(), key=itemgetter(0)):
+        yield name, [genre for _, genre in rows if genre is not None]
+
+
+DB_MODE_QUEUE = "queue"
+DB_MODE_DIRECT = "direct"
+DB_MODE_READ_ONLY = "read_only"
+DB_MODES: tuple[str, ...] = (DB_MODE_QUEUE, DB_MODE_DIRECT, DB_MODE_READ_ONLY)
+
+DB_PRAGMAS: dict[str, int | str] = {
+    "foreign_keys": 1,
+    "journal_mode": "wal",  # WAL-mode
+    "cache_size": -1024 * 64,  # 64MB page-cache
+}
+
+# Подключения только для чтения не ждут поток записи и читают страницы через mmap.
+# Режим WAL хранится в самом файле базы, поэтому journal_mode тут не указывается
+DB_READ_ONLY_PRAGMAS: dict[str, int | str] = {
+    "foreign_keys": 1,
+    "cache_size": DB_READ_CACHE_SIZE,
+    "mmap_size": DB_READ_MMAP_SIZE,
+    "query_only": 1,
+}
+
+# Параметры базы для init_db. По умолчанию используется файл из конфига и очередь записи
+_db_params: dict[str, Any] = dict(
+    path=DB_FILE_NAME,
+    mode=DB_MODE_QUEUE,
+    queue_max_size=DB_QUEUE_MAX_SIZE,
+    results_timeout=DB_RESULTS_TIMEOUT,
 )
+_db_lock = threading.RLock()
+
+
+class LazyDatabase(DatabaseProxy):
+    # Подключение и создание таблиц выполняются при первом обращении к базе,
+    # а не при импорте модуля
+    __slots__ = ("obj", "_callbacks", "_Model")
+
+    def __getattr__(self, attr):
+        if self.obj is None:
+            _setup_db()
+        return getattr(self.obj, attr)
+
+
+db = LazyDatabase()
+
+
+def _create_database(
+    path: str,
+    mode: str,
+    queue_max_size: int = DB_QUEUE_MAX_SIZE,
+    results_timeout: float = DB_RESULTS_TIMEOUT,
+) -> Database:
+    if mode == DB_MODE_QUEUE:
+        # This working with multithreading
+        # SOURCE: http://docs.peewee-orm.com/en/latest/peewee/playhouse.html#sqliteq
+        return StatsSqliteQueueDatabase(
+            path,
+            pragmas=DB_PRAGMAS,
+            use_gevent=False,  # Use the standard library "threading" module.
+            autostart=False,  # Поток записи запускается в _setup_db
+            queue_max_size=queue_max_size,
+            results_timeout=results_timeout,
+        )
+
+    if mode == DB_MODE_READ_ONLY:
+        return SqliteDatabase(path, pragmas=DB_READ_ONLY_PRAGMAS)
+
+    return SqliteDatabase(path, pragmas=DB_PRAGMAS)
+
+
+def _create_tables(model: Type[Model], database: Database) -> None:
+    manager = SchemaManager(model, database=database)
+    manager.create_table(safe=True)
+
+    # В таблице из старой базы может не быть новых столбцов, пока не выполнена
+    # миграция. Индексы по ним не создаются: SQLite принял бы неизвестное имя
+    # столбца в кавычках за строку, и такой индекс сломал бы миграцию
+    columns: set[str] = {
+        column.name for column in database.get_columns(model._meta.table_name)
+    }
+    for index in model._meta.fields_to_index():
+        index_columns: set[str] = {
+            field.column_name
+            for field in index._expressions
+            if isinstance(field, Field)
+        }
+        if index_columns <= columns:
+            database.execute(manager._create_index(index, safe=True))
+
+
+def _setup_db() -> None:
+    with _db_lock:
+        if db.obj is not None:
+            return
+
+        path: str = _db_params["path"]
+        mode: str = _db_params["mode"]
+
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        models = sort_models(BaseModel.get_inherited_models())
+
+        database = _create_database(**_db_params)
+        if mode in (DB_MODE_QUEUE, DB_MODE_READ_ONLY):
+            # Таблицы создаются отдельным подключением: в режиме очереди до запуска
+            # потока записи, иначе запросы на создание попадут в очередь и первые
+            # чтения могут выполниться раньше них, а в режиме чтения писать нельзя
+            schema_db = SqliteDatabase(path, pragmas=DB_PRAGMAS)
+            with schema_db.connection_context():
+                for model in models:
+                    _create_tables(model, schema_db)
+
+            if mode == DB_MODE_QUEUE:
+                database.start()
+        else:
+            for model in models:
+                _create_tables(model, database)
+
+        db.initialize(database)
+
+
+def init_db(
+    path: str = DB_FILE_NAME,
+    mode: str = DB_MODE_QUEUE,
+    queue_max_size: int = DB_QUEUE_MAX_SIZE,
+    results_timeout: float = DB_RESULTS_TIMEOUT,
+) -> None:
+    if mode not in DB_MODES:
+        raise ValueError(f"Неизвестный режим базы {mode!r}, доступны: {DB_MODES}")
+
+    if mode != DB_MODE_DIRECT and path == ":memory:":
+        raise ValueError(
+            f"Режим {mode!r} не поддерживает базу в памяти, нужен {DB_MODE_DIRECT!r}"
+        )
+
+    with _db_lock:
+        close_db()
+        _db_params.update(
+            path=path,
+            mode=mode,
+            queue_max_size=queue_max_size,
+            results_timeout=results_timeout,
+        )
+
+
+def db_atomic() -> AbstractContextManager:
+    # SqliteQueueDatabase не поддерживает транзакции из нескольких запросов,
+    # там каждый запрос выполняется потоком записи в своей транзакции
+    _setup_db()
+    if isinstance(db.obj, SqliteQueueDatabase):
+        return nullcontext()
+
+    return db.atomic()
+
+
+def get_write_stats() -> WriteQueueStats | None:
+    # Статистика есть только у очереди записи и только после подключения к базе
+    database = db.obj
+    if not isinstance(database, StatsSqliteQueueDatabase):
+        return None
+
+    return database.stats
+
+
+def close_db() -> None:
+    with _db_lock:
+        database = db.obj
+        if database is None:
+            return
+
+        if isinstance(database, SqliteQueueDatabase):
+            # Дожидаемся, пока поток записи подключится к базе: stop() держит
+            # блокировку базы, которая нужна потоку для подключения
+            database.execute_sql("SELECT 1", commit=True).fetchall()
+            database.stop()
+
+        database.close()
+        db.initialize(None)
+
+    with _backup_lock:
+        if _backup_state["connection"]:
+            _backup_state["connection"].close()
+        _backup_state.update(path=None, connection=None, data_version=None)
+
+
+BACKUP_DATE_FMT: str = "%Y-%m-%d_%H%M%S"
+BACKUP_SUFFIX: str = ".sqlite.gz"
+
+# Подключение для бекапов держится открытым между вызовами: по PRAGMA data_version
+# на нем видно, были ли изменения в базе от других подключений с прошлого бекапа
+_backup_state: dict[str, Any] = dict(path=None, connection=None, data_version=None)
+_backup_lock = threading.Lock()
+
+
+def _get_file_hash(file_name: Path) -> str:
+    hash_obj = hashlib.sha256()
+    with open(file_name, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            hash_obj.update(chunk)
+    return hash_obj.hexdigest()
+
+
+def db_create_backup(
+    backup_dir: Path = DIR_BACKUP,
+    keep_last: int = BACKUP_KEEP_LAST,
+    keep_daily: int = BACKUP_KEEP_DAILY,
+    keep_weekly: int = BACKUP_KEEP_WEEKLY,
+) -> Path | None:
+    # Снимок делается через online backup API SQLite: он согласован и не требует
+    # остановки записи. Возвращает None, если база не изменилась с прошлого бекапа
+    path: str = _db_params["path"]
+    if path == ":memory:":
+        return None
+
+    # sqlite3.connect создаст пустую базу, если ее файла еще нет
+    if not Path(path).exists():
+        return None
+
+    with _backup_lock:
+        if _backup_state["path"] != path:
+            if _backup_state["connection"]:
+                _backup_state["connection"].close()
+
+            _backup_state.update(
+                path=path,
+                connection=sqlite3.connect(path, check_same_thread=False),
+                data_version=None,
+            )
+
+        connection: sqlite3.Connection = _backup_state["connection"]
+        (data_version,) = connection.execute("PRAGMA data_version").fetchone()
+        if data_version == _backup_state["data_version"]:
+            return None
+
+        backup_dir.mkdir(parents=True, exist_ok=True)
+
+        stem: str = Path(path).stem
+        file_name_hash: Path = backup_dir / f"{stem}.sha256"
+        file_name: Path = (
+            backup_dir / f"{stem}_{datetime.now().strftime(BACKUP_DATE_FMT)}{BACKUP_SUFFIX}"
+        )
+        file_name_tmp: Path = file_name.with_name(file_name.name + ".tmp")
+
+        try:
+            target = sqlite3.connect(file_name_tmp)
+            try:
+                connection.backup(target)
+            finally:
+                target.close()
+
+            # Содержимое могло не поменяться (например, после перезапуска процесса)
+            file_hash: str = _get_file_hash(file_name_tmp)
+            if file_name_hash.exists() and file_name_hash.read_text() == file_hash:
+                _backup_state["data_version"] = data_version
+                return None
+
+            with open(file_name_tmp, "rb") as f_src:
+                with gzip.open(file_name, "wb", compresslevel=6) as f_dst:
+                    shutil.copyfileobj(f_src, f_dst)
+
+            file_name_hash.write_text(file_hash)
+
+        finally:
+            file_name_tmp.unlink(missing_ok=True)
+
+        _backup_state["data_version"] = data_version
+
+    db_prune_backups(backup_dir, keep_last, keep_daily, keep_weekly)
+    return file_name
+
+
+def db_prune_backups(
+    backup_dir: Path = DIR_BACKUP,
+    keep_last: int = BACKUP_KEEP_LAST,
+    keep_daily: int = BACKUP_KEEP_DAILY,
+    keep_weekly: int = BACKUP_KEEP_WEEKLY,
+) -> list[Path]:
+    items: list[tuple[datetime, Path]] = []
+    for file_name in backup_dir.glob(f"*{BACKUP_SUFFIX}"):
+        # Имя бекапа: <имя базы>_<дата>_<время><BACKUP_SUFFIX>
+        name: str = file_name.name.removesuffix(BACKUP_SUFFIX)
+        try:
+            _, date_str, time_str = name.rsplit("_", 2)
+            dt = datetime.strptime(f"{date_str}_{time_str}", BACKUP_DATE_FMT)
+        except ValueError:
+            continue
+
+        items.append((dt, file_name))
+
+    # От новых к старым: из каждого дня и недели остается самый свежий бекап
+    items.sort(reverse=True)
+
+    to_keep: set[Path] = {file_name for _, file_name in items[:keep_last]}
+
+    days: dict[Any, Path] = dict()
+    weeks: dict[Any, Path] = dict()
+    for dt, file_name in items:
+        day = dt.date()
+        if day not in days and len(days) < keep_daily:
+            days[day] = file_name
+
+        week = dt.isocalendar()[:2]
+        if week not in weeks and len(weeks) < keep_weekly:
+            weeks[week] = file_name
+
+    to_keep |= set(days.values()) | set(weeks.values())
+
+    removed: list[Path] = []
+    for _, file_name in items:
+        if file_name not in to_keep:
+            file_name.unlink(missing_ok=True)
+            removed.append(file_name)
+
+    return removed
 
 
 class BaseModel(Model):
+    # Служебные поля, которые не попадают в to_dict (и в ответы веб-API)
+    TO_DICT_EXCLUDE: list[str] = []
+
     class Meta:
         database = db
 
@@ -99,7 +455,10 @@ class BaseModel(Model):
         return query.count()
 
     def to_dict(self) -> dict:
-        return model_to_dict(self)
+        return model_to_dict(
+            self,
+            exclude=[self._meta.fields[name] for name in self.TO_DICT_EXCLUDE],
+        )
 
     def __str__(self) -> str:
         fields = []
@@ -124,6 +483,13 @@ class Dump(BaseModel):
     name = CharField()
     site = CharField()
     genres = ListField()
+    created_at = DateTimeField(default=datetime.now, index=True)
+    updated_at = DateTimeField(default=datetime.now, index=True)
+
+    # 5 параметров на строку, с запасом укладываемся в лимит SQLite на 999 параметров
+    INSERT_BATCH_SIZE: int = 190
+
+    TO_DICT_EXCLUDE: list[str] = ["created_at", "updated_at"]
 
     class Meta:
         indexes = ((("name", "site"), True),)
@@ -135,18 +501,87 @@ class Dump(BaseModel):
     @classmethod
     def add(cls, site: str, name: str, genres: list[str]) -> None:
         if not cls.exists(site, name):
-            cls.create(site=site, name=name, genres=genres)
+            obj = cls.create(site=site, name=name, genres=genres)
+            if USE_NORMALIZED_GENRES:
+                cls.sync_genre_links(ids=[obj.id])
+
+    @classmethod
+    def add_many(cls, items: Iterable[tuple[str, str, list[str]]]) -> None:
+        now = datetime.now()
+        rows = [
+            dict(site=site, name=name, genres=genres, created_at=now, updated_at=now)
+            for site, name, genres in items
+        ]
+
+        # Один INSERT на пачку - одна транзакция и одно обращение к очереди записи.
+        # Уже существующие пары (name, site) пропускаются уникальным индексом
+        for batch in chunked(rows, cls.INSERT_BATCH_SIZE):
+            cls.insert_many(batch).on_conflict_ignore().execute()
+
+            if USE_NORMALIZED_GENRES:
+                pairs = [(row["site"], row["name"]) for row in batch]
+                query = cls.select(cls.id).where(Tuple(cls.site, cls.name).in_(pairs))
+                cls.sync_genre_links(ids=[dump_id for (dump_id,) in query.tuples()])
+
+    @classmethod
+    def sync_genre_links(cls, ids: list[int] | None = None) -> None:
+        # Заполнение нормализованных таблиц из JSON-списков жанров.
+        # Если ids не заданы, то таблицы связей пересоздаются для всех дампов
+        dumps = cls.select()
+        if ids is not None:
+            if not ids:
+                return
+            dumps = dumps.where(cls.id.in_(ids))
+
+        Site.insert_from(
+            dumps.select(cls.site).distinct(),
+            [Site.name],
+        ).on_conflict_ignore().execute()
+
+        GenreName.insert_from(
+            dumps.select(JSON_EACH_VALUE).from_(cls, json_each(cls.genres)).distinct(),
+            [GenreName.name],
+        ).on_conflict_ignore().execute()
+
+        delete_query = DumpGenre.delete()
+        if ids is not None:
+            delete_query = delete_query.where(DumpGenre.dump.in_(ids))
+        delete_query.execute()
+
+        DumpGenre.insert_from(
+            dumps.select(cls.id, Site.id, GenreName.id)
+            .from_(cls, json_each(cls.genres))
+            .join(Site, on=(Site.name == cls.site))
+            .join(GenreName, on=(GenreName.name == JSON_EACH_VALUE)),
+            [DumpGenre.dump, DumpGenre.site, DumpGenre.genre],
+        ).on_conflict_ignore().execute()
 
     @classmethod
     def get(cls) -> list["Dump"]:
         return cls.select().where(cls.genres != "[]").order_by(cls.name)
 
+    @classmethod
+    def get_names_by_site(cls, site: str) -> set[str]:
+        query = cls.select(cls.name).where(cls.site == site)
+        return {name for (name,) in query.tuples()}
+
     @classmethod
     def get_games_by_site(cls, site: str) -> list["Dump"]:
         return list(cls.select().where(cls.site == site).order_by(cls.name))
 
     @classmethod
     def get_genres_by_game(cls, game_name: str) -> list[str]:
+        if USE_NORMALIZED_GENRES:
+            query = (
+                GenreName.select(GenreName.name)
+                .join(DumpGenre)
+                .join(cls)
+                .where(cls.name == game_name)
+                .distinct()
+                .order_by(GenreName.name)
+            )
+            return [name for (name,) in query.tuples()]
+
         items = []
 
         for dump in cls.select().where(cls.name == game_name):
@@ -155,14 +590,51 @@ class Dump(BaseModel):
         return process_list(items)
 
     @classmethod
-    def get_all_genres(cls) -> list[str]:
+    def get_all_genres(cls, since: datetime | None = None) -> list[str]:
+        # Если задан since, то только жанры дампов, измененных после него
+        if USE_NORMALIZED_GENRES:
+            query = (
+                GenreName.select(GenreName.name)
+                .join(DumpGenre)
+                .distinct()
+                .order_by(GenreName.name)
+            )
+            if since:
+                query = query.join(cls).where(cls.updated_at > since)
+            return [name for (name,) in query.tuples()]
+
         items = []
 
-        for dump in cls.select():
+        for dump in cls.changed_since(since):
             items += dump.genres
 
         return process_list(items)
 
+    @classmethod
+    def get_genres_by_site(cls) -> dict[str, list[str]]:
+        site_by_genres = defaultdict(list)
+
+        if USE_NORMALIZED_GENRES:
+            query = (
+                DumpGenre.select(Site.name, GenreName.name)
+                .join_from(DumpGenre, Site)
+                .join_from(DumpGenre, GenreName)
+                .distinct()
+                .order_by(Site.name, GenreName.name)
+            )
+            for site, genre in query.tuples():
+                site_by_genres[site].append(genre)
+
+            return site_by_genres
+
+        for dump in cls.get().order_by(cls.site):
+            site_by_genres[dump.site] += dump.genres
+
+        for k, v in site_by_genres.items():
+            site_by_genres[k] = process_list(v)
+
+        return site_by_genres
+
     @classmethod
     def get_all_games(cls) -> list[str]:
         return [
@@ -175,22 +647,166 @@ class Dump(BaseModel):
             dump.site for dump in cls.select(cls.site).order_by(cls.site).distinct()
         ]
 
+    @classmethod
+    def iter_dump(cls) -> Iterator[tuple[str, list[str]]]:
+        return iter_genres_by_name(cls)
+
     @classmethod
     def dump(cls) -> dict[str, list[str]]:
-        game_by_genres = defaultdict(list)
+        return dict(cls.iter_dump())
+
+    @classmethod
+    def changed_since(cls, watermark: datetime | None) -> ModelSelect:
+        # Дампы, добавленные или измененные после watermark, если он не задан - все
+        query = cls.select()
+        if watermark:
+            query = query.where(cls.updated_at > watermark)
+        return query.order_by(cls.updated_at)
 
-        for dump in cls.select().order_by(cls.name):
-            game_by_genres[dump.name] += dump.genres
+    @classmethod
+    def get_last_updated_at(cls) -> datetime | None:
+        return cls.select(fn.MAX(cls.updated_at)).scalar()
+
+
+# Индекс пар (site, name) из дампов на время обхода.
+# Названия игр сайта загружаются одним запросом при первом обращении, после
+# чего проверка наличия дампа выполняется без запросов к базе
+class DumpIndex:
+    def __init__(self) -> None:
+        self._names_by_site: dict[str, set[str]] = dict()
+        self._lock = threading.Lock()
+
+    def _get_names(self, site: str) -> set[str]:
+        with self._lock:
+            names = self._names_by_site.get(site)
+            if names is None:
+                names = Dump.get_names_by_site(site)
+                self._names_by_site[site] = names
+
+            return names
+
+    def clear(self) -> None:
+        with self._lock:
+            self._names_by_site.clear()
+
+    def exists(self, site: str, name: str) -> bool:
+        return name in self._get_names(site)
+
+    def add(self, site: str, name: str) -> None:
+        names = self._get_names(site)
+        with self._lock:
+            names.add(name)
+
+    def get_pending(self, site: str, games: Iterable[str]) -> list[str]:
+        names = self._get_names(site)
+        return [game for game in games if game not in names]
+
+
+# Буфер для записи дампов пачками.
+# Потоки парсеров добавляют результаты в буфер, а в базу они уходят через
+# Dump.add_many, когда накопится max_size записей или пройдет max_delay секунд
+# с последней записи. Без новых записей буфер записывается по таймеру в фоновом
+# потоке, поэтому результаты не задерживаются, когда парсеры простаивают.
+# При adaptive размер пачки подстраивается под загруженность очереди записи:
+# растет (до Dump.INSERT_BATCH_SIZE), когда очередь забивается, и возвращается
+# к начальному, когда очередь свободна
+class DumpWriter:
+    def __init__(
+        self,
+        max_size: int = 50,
+        max_delay: float = 60.0,
+        index: DumpIndex | None = None,
+        adaptive: bool = DB_ADAPTIVE_BATCHING,
+    ) -> None:
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self.index = index
+        self.adaptive = adaptive
+
+        self._min_size: int = max_size
+
+        self._items: list[tuple[str, str, list[str]]] = []
+        self._lock = threading.Lock()
+        self._last_flush: float = time.monotonic()
+
+        self._timer: threading.Timer | None = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+    def __enter__(self) -> "DumpWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.flush()
+
+    def add(self, site: str, name: str, genres: list[str]) -> None:
+        # Индекс обновляется сразу, чтобы игра из буфера считалась уже обработанной
+        if self.index is not None:
+            self.index.add(site, name)
+
+        with self._lock:
+            self._items.append((site, name, genres))
+            need_flush = (
+                len(self._items) >= self.max_size
+                or time.monotonic() - self._last_flush >= self.max_delay
+            )
+            if not need_flush and self._timer is None:
+                self._timer = threading.Timer(self.max_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if need_flush:
+            self.flush()
+
+    def flush(self) -> int:
+        with self._lock:
+            items, self._items = self._items, []
+            self._last_flush = time.monotonic()
+
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+        if not items:
+            return 0
+
+        try:
+            Dump.add_many(items)
+        except BaseException:
+            # Возвращаем записи в буфер, чтобы не потерять их при следующей попытке
+            with self._lock:
+                self._items[:0] = items
+            raise
+
+        if self.adaptive:
+            self._adapt_max_size()
 
-        for k, v in game_by_genres.items():
-            game_by_genres[k] = process_list(v)
+        return len(items)
 
-        return game_by_genres
+    def _adapt_max_size(self) -> None:
+        stats = get_write_stats()
+        if not stats:
+            return
+
+        with self._lock:
+            if stats.get_queue_load() >= 0.5 or stats.last_enqueue_wait >= 0.1:
+                self.max_size = min(self.max_size * 2, Dump.INSERT_BATCH_SIZE)
+            elif stats.last_queue_size <= 1:  # В очереди только свой запрос
+                self.max_size = max(self.max_size // 2, self._min_size)
 
 
 class Game(BaseModel):
     name = TextField(primary_key=True)
     genres = ListField()
+    created_at = DateTimeField(default=datetime.now, index=True)
+    updated_at = DateTimeField(default=datetime.now, index=True)
+
+    # 4 параметра на строку, с запасом укладываемся в лимит SQLite на 999 параметров
+    INSERT_BATCH_SIZE: int = 240
+
+    TO_DICT_EXCLUDE: list[str] = ["created_at", "updated_at"]
 
     @classmethod
     def add_or_update(cls, name: str, genres: list[str]) -> "Game":
@@ -200,16 +816,99 @@ class Game(BaseModel):
         if obj:
             if sorted(obj.genres) != genres:
                 obj.genres = genres
+                obj.updated_at = datetime.now()
                 obj.save()
 
+                if USE_NORMALIZED_GENRES:
+                    cls.sync_genre_links(names=[name])
+
         else:
             obj = cls.create(
                 name=name,
                 genres=genres,
             )
 
+            if USE_NORMALIZED_GENRES:
+                cls.sync_genre_links(names=[name])
+
         return obj
 
+    @classmethod
+    def sync(
+        cls,
+        game_by_genres: dict[str, list[str]],
+        delete_missing: bool = True,
+    ) -> dict[str, int]:
+        game_by_genres = {
+            name: process_list(genres) for name, genres in game_by_genres.items()
+        }
+
+        # Текущие данные загружаются одним запросом, а изменения считаются в памяти,
+        # поэтому количество запросов на запись зависит только от количества изменений
+        current: dict[str, list[str]] = dict(cls.select(cls.name, cls.genres).tuples())
+
+        created: list[str] = [name for name in game_by_genres if name not in current]
+        updated: list[str] = [
+            name
+            for name, genres in game_by_genres.items()
+            if name in current and sorted(current[name]) != genres
+        ]
+        deleted: list[str] = (
+            [name for name in current if name not in game_by_genres]
+            if delete_missing
+            else []
+        )
+
+        now = datetime.now()
+        rows = [
+            dict(name=name, genres=game_by_genres[name], created_at=now, updated_at=now)
+            for name in created + updated
+        ]
+        with db_atomic():
+            for batch in chunked(rows, cls.INSERT_BATCH_SIZE):
+                cls.insert_many(batch).on_conflict(
+                    conflict_target=[cls.name],
+                    update={
+                        cls.genres: EXCLUDED.genres,
+                        cls.updated_at: EXCLUDED.updated_at,
+                    },
+                ).execute()
+
+            for batch in chunked(deleted, cls.INSERT_BATCH_SIZE):
+                cls.delete().where(cls.name.in_(batch)).execute()
+
+            if USE_NORMALIZED_GENRES:
+                cls.sync_genre_links(names=created + updated)
+
+        return dict(created=len(created), updated=len(updated), deleted=len(deleted))
+
+    @classmethod
+    def sync_genre_links(cls, names: list[str] | None = None) -> None:
+        # Заполнение таблицы game_genre из JSON-списков жанров.
+        # Если names не заданы, то таблица связей пересоздается для всех игр
+        games = cls.select()
+        if names is not None:
+            if not names:
+                return
+            games = games.where(cls.name.in_(names))
+
+        GenreName.insert_from(
+            games.select(JSON_EACH_VALUE).from_(cls, json_each(cls.genres)).distinct(),
+            [GenreName.name],
+        ).on_conflict_ignore().execute()
+
+        delete_query = GameGenre.delete()
+        if names is not None:
+            delete_query = delete_query.where(GameGenre.game.in_(names))
+        delete_query.execute()
+
+        GameGenre.insert_from(
+            games.select(cls.name, GenreName.id)
+            .from_(cls, json_each(cls.genres))
+            .join(GenreName, on=(GenreName.name == JSON_EACH_VALUE)),
+            [GameGenre.game, GameGenre.genre],
+        ).on_conflict_ignore().execute()
+
     @classmethod
     def get_by(cls, name: str) -> Optional["Game"]:
         if not name or not name.strip():
@@ -218,16 +917,25 @@ class Game(BaseModel):
         return cls.get_or_none(name=name)
 
     @classmethod
-    def dump(cls) -> dict[str, list[str]]:  # TODO: Дублирует Dump.dump()
-        game_by_genres = defaultdict(list)
+    def iter_dump(cls) -> Iterator[tuple[str, list[str]]]:
+        return iter_genres_by_name(cls)
 
-        for dump in cls.select().order_by(cls.name):
-            game_by_genres[dump.name] += dump.genres
+    @classmethod
+    def dump(cls) -> dict[str, list[str]]:
+        return dict(cls.iter_dump())
 
-        for k, v in game_by_genres.items():
-            game_by_genres[k] = process_list(v)
+    @classmethod
+    def changed_since(cls, watermark: datetime | None) -> ModelSelect:
+        # Игры, добавленные или измененные после watermark, если он не задан - все.
+        # Удаленные игры сюда не попадают
+        query = cls.select()
+        if watermark:
+            query = query.where(cls.updated_at > watermark)
+        return query.order_by(cls.updated_at)
 
-        return game_by_genres
+    @classmethod
+    def get_last_updated_at(cls) -> datetime | None:
+        return cls.select(fn.MAX(cls.updated_at)).scalar()
 
 
 class Genre(BaseModel):
@@ -235,6 +943,9 @@ class Genre(BaseModel):
     description = TextField()
     aliases = TextField(default="")
 
+    # 3 параметра на строку, с запасом укладываемся в лимит SQLite на 999 параметров
+    INSERT_BATCH_SIZE: int = 300
+
     @classmethod
     def add_or_update(cls, name: str, description: str, aliases: str = "") -> "Genre":
         obj = cls.get_by(name)
@@ -256,6 +967,47 @@ class Genre(BaseModel):
 
         return obj
 
+    @classmethod
+    def sync(cls, genres: dict[str, tuple[str, str]]) -> dict[str, int]:
+        # genres: название жанра -> (описание, псевдонимы).
+        # Правила обновления те же, что в add_or_update, но описание и псевдонимы
+        # записываются одним запросом на строку и только для изменившихся жанров
+        current: dict[str, tuple[str, str]] = {
+            name: (description, aliases)
+            for name, description, aliases in cls.select(
+                cls.name, cls.description, cls.aliases
+            ).tuples()
+        }
+
+        rows: list[dict[str, str]] = []
+        created: int = 0
+        updated: int = 0
+        for name, (description, aliases) in genres.items():
+            if name not in current:
+                created += 1
+                rows.append(dict(name=name, description=description, aliases=aliases))
+                continue
+
+            old_description, old_aliases = current[name]
+            if not aliases:
+                aliases = old_aliases
+
+            if (description, aliases) != (old_description, old_aliases):
+                updated += 1
+                rows.append(dict(name=name, description=description, aliases=aliases))
+
+        with db_atomic():
+            for batch in chunked(rows, cls.INSERT_BATCH_SIZE):
+                cls.insert_many(batch).on_conflict(
+                    conflict_target=[cls.name],
+                    update={
+                        cls.description: EXCLUDED.description,
+                        cls.aliases: EXCLUDED.aliases,
+                    },
+                ).execute()
+
+        return dict(created=created, updated=updated)
+
     @classmethod
     def get_by(cls, name: str) -> Optional["Genre"]:
         if not name or not name.strip():
@@ -264,12 +1016,91 @@ class Genre(BaseModel):
         return cls.get_or_none(name=name)
 
 
-db.connect()
-db.create_tables(BaseModel.get_inherited_models())
+# Отметки последней успешной обработки для этапов, которые обрабатывают только
+# изменения: этап запоминает updated_at последней обработанной записи
+class Watermark(BaseModel):
+    name = TextField(primary_key=True)
+    value = DateTimeField()
+
+    @classmethod
+    def get_value(cls, name: str) -> datetime | None:
+        obj = cls.get_or_none(name=name)
+        return obj.value if obj else None
+
+    @classmethod
+    def set_value(cls, name: str, value: datetime | None) -> None:
+        if value is None:
+            return
+
+        cls.insert(name=name, value=value).on_conflict(
+            conflict_target=[cls.name],
+            update={cls.value: EXCLUDED.value},
+        ).execute()
+
+
+# Найденные на сайтах адреса страниц игр: при обновлении жанров известной игры
+# парсер сразу загружает страницу игры, без поиска на сайте
+class GameUrl(BaseModel):
+    site = TextField()
+    name = TextField()
+    url = TextField()
+    updated_at = DateTimeField(default=datetime.now)
 
-# Задержка в 50мс, чтобы дать время на запуск SqliteQueueDatabase и создание таблиц
-# Т.к. в SqliteQueueDatabase запросы на чтение выполняются сразу, а на запись попадают в очередь
-time.sleep(0.050)
+    class Meta:
+        table_name = "game_url"
+        primary_key = CompositeKey("site", "name")
+
+    @classmethod
+    def get_url(cls, site: str, name: str) -> str | None:
+        obj = cls.get_or_none(site=site, name=name)
+        return obj.url if obj else None
+
+    @classmethod
+    def set_url(cls, site: str, name: str, url: str) -> None:
+        cls.insert(
+            site=site, name=name, url=url, updated_at=datetime.now()
+        ).on_conflict(
+            conflict_target=[cls.site, cls.name],
+            update={cls.url: EXCLUDED.url, cls.updated_at: EXCLUDED.updated_at},
+        ).execute()
+
+    @classmethod
+    def delete_url(cls, site: str, name: str) -> None:
+        cls.delete().where(cls.site == site, cls.name == name).execute()
+
+
+# Нормализованная схема жанров: справочники сайтов и названий жанров с целочисленными
+# ключами и таблицы связей с дампами и играми. JSON-списки в Dump.genres и Game.genres
+# остаются основными данными, эти таблицы заполняются из них, см. USE_NORMALIZED_GENRES
+class Site(BaseModel):
+    name = TextField(unique=True)
+
+
+class GenreName(BaseModel):
+    name = TextField(unique=True)
+
+    class Meta:
+        table_name = "genre_name"
+
+
+class DumpGenre(BaseModel):
+    dump = ForeignKeyField(Dump, on_delete="CASCADE")
+    site = ForeignKeyField(Site, on_delete="CASCADE")
+    genre = ForeignKeyField(GenreName, on_delete="CASCADE")
+
+    class Meta:
+        table_name = "dump_genre"
+        primary_key = CompositeKey("dump", "genre")
+        indexes = ((("site", "genre"), False),)
+
+
+class GameGenre(BaseModel):
+    game = ForeignKeyField(Game, on_delete="CASCADE")
+    genre = ForeignKeyField(GenreName, on_delete="CASCADE")
+
+    class Meta:
+        table_name = "game_genre"
+        primary_key = CompositeKey("game", "genre")
 
 
 if __name__ == "__main__":
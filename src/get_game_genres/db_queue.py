@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+import threading
+
+from timeit import default_timer
+from typing import Any
+
+# pip install peewee
+from peewee import SENTINEL
+from playhouse.sqliteq import AsyncCursor, ResultTimeout, SqliteQueueDatabase
+
+
+# Границы корзин гистограммы времени выполнения запросов на запись, в секундах
+LATENCY_BUCKETS: tuple[float, ...] = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+def _get_bucket_name(index: int) -> str:
+    if index == len(LATENCY_BUCKETS):
+        return f">{LATENCY_BUCKETS[-1] * 1000:g}ms"
+    return f"<={LATENCY_BUCKETS[index] * 1000:g}ms"
+
+
+class WriteQueueStats:
+    def __init__(self, queue_max_size: int | None = None) -> None:
+        self.queue_max_size = queue_max_size
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.writes: int = 0
+            self.errors: int = 0
+            self.timeouts: int = 0
+
+            self.queue_size_max: int = 0
+            self.last_queue_size: int = 0
+
+            self.enqueue_wait_total: float = 0.0
+            self.enqueue_wait_max: float = 0.0
+            self.last_enqueue_wait: float = 0.0
+
+            self.execute_total: float = 0.0
+            self.execute_max: float = 0.0
+            self.histogram: list[int] = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def on_enqueue(self, wait: float, queue_size: int) -> None:
+        with self._lock:
+            self.writes += 1
+
+            self.last_queue_size = queue_size
+            self.queue_size_max = max(self.queue_size_max, queue_size)
+
+            self.last_enqueue_wait = wait
+            self.enqueue_wait_total += wait
+            self.enqueue_wait_max = max(self.enqueue_wait_max, wait)
+
+    def on_execute(self, elapsed: float, is_error: bool) -> None:
+        index = len(LATENCY_BUCKETS)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if elapsed <= bound:
+                index = i
+                break
+
+        with self._lock:
+            self.errors += is_error
+            self.execute_total += elapsed
+            self.execute_max = max(self.execute_max, elapsed)
+            self.histogram[index] += 1
+
+    def on_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def get_queue_load(self) -> float:
+        # Заполненность очереди при последней постановке запроса, от 0 до 1
+        if not self.queue_max_size:
+            return 0.0
+        return min(self.last_queue_size / self.queue_max_size, 1.0)
+
+    def to_dict(self) -> dict[str, Any]:
+        with self._lock:
+            executed: int = sum(self.histogram)
+            enqueue_wait_avg = (
+                self.enqueue_wait_total / self.writes if self.writes else 0.0
+            )
+            execute_avg = self.execute_total / executed if executed else 0.0
+
+            return dict(
+                writes=self.writes,
+                errors=self.errors,
+                timeouts=self.timeouts,
+                queue_max_size=self.queue_max_size,
+                queue_size_max=self.queue_size_max,
+                enqueue_wait_avg=enqueue_wait_avg,
+                enqueue_wait_max=self.enqueue_wait_max,
+                execute_avg=execute_avg,
+                execute_max=self.execute_max,
+                execute_histogram={
+                    _get_bucket_name(i): count for i, count in enumerate(self.histogram)
+                },
+            )
+
+    def __str__(self) -> str:
+        stats = self.to_dict()
+        histogram = ", ".join(
+            f"{name}: {count}"
+            for name, count in stats["execute_histogram"].items()
+            if count
+        )
+        return (
+            f"записей: {stats['writes']}, ошибок: {stats['errors']}, "
+            f"таймаутов: {stats['timeouts']}, "
+            f"размер очереди (макс.): "
+            f"{stats['queue_size_max']}/{stats['queue_max_size']}, "
+            f"ожидание постановки в очередь (сред./макс.): "
+            f"{stats['enqueue_wait_avg']:.3f}/{stats['enqueue_wait_max']:.3f} сек., "
+            f"выполнение (сред./макс.): "
+            f"{stats['execute_avg']:.3f}/{stats['execute_max']:.3f} сек., "
+            f"гистограмма выполнения: {{{histogram}}}"
+        )
+
+
+class StatsAsyncCursor(AsyncCursor):
+    __slots__ = ("_stats",)
+
+    def __init__(self, stats: WriteQueueStats, *args, **kwargs) -> None:
+        self._stats = stats
+        super().__init__(*args, **kwargs)
+
+    def _wait(self, timeout=None) -> None:
+        try:
+            super()._wait(timeout)
+        except ResultTimeout:
+            self._stats.on_timeout()
+            raise
+
+
+# SqliteQueueDatabase со сбором статистики по очереди записи: размер очереди,
+# время ожидания постановки в очередь, время выполнения запросов и таймауты
+class StatsSqliteQueueDatabase(SqliteQueueDatabase):
+    def __init__(self, *args, **kwargs) -> None:
+        self.stats = WriteQueueStats(queue_max_size=kwargs.get("queue_max_size"))
+        super().__init__(*args, **kwargs)
+
+        # Через _execute поток записи выполняет запросы из очереди
+        execute = self._execute
+
+        def _execute(sql, params=None, commit=SENTINEL):
+            if not commit:
+                return execute(sql, params, commit)
+
+            t = default_timer()
+            is_error = False
+            try:
+                return execute(sql, params, commit)
+            except Exception:
+                is_error = True
+                raise
+            finally:
+                self.stats.on_execute(default_timer() - t, is_error)
+
+        self._execute = _execute
+
+    # Повторяет SqliteQueueDatabase.execute_sql, но с замером постановки в очередь
+    def execute_sql(self, sql, params=None, commit=SENTINEL, timeout=None):
+        if commit is SENTINEL:
+            commit = not sql.lower().startswith("select")
+
+        if not commit:
+            return self._execute(sql, params, commit=commit)
+
+        cursor = StatsAsyncCursor(
+            self.stats,
+            event=self._thread_helper.event(),
+            sql=sql,
+            params=params,
+            commit=commit,
+            timeout=self._results_timeout if timeout is None else timeout,
+        )
+
+        t = default_timer()
+        self._write_queue.put(cursor)
+        self.stats.on_enqueue(default_timer() - t, self.queue_size())
+
+        return cursor
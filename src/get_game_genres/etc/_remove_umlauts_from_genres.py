@@ -4,7 +4,10 @@
 __author__ = "ipetrash"
 
 
+from datetime import datetime
+
 from get_game_genres.common import load_json, save_json, process_umlauts
+from get_game_genres.config import USE_NORMALIZED_GENRES
 from get_game_genres.db import Dump
 from get_game_genres.export_import.export import run as run_export_games
 from get_game_genres.genre_translate_file.load import FILE_NAME_GENRE_TRANSLATE
@@ -17,8 +20,12 @@ for dump in Dump.select():
     if genres != dump.genres:
         print(f"Обновлен {dump}")
         dump.genres = genres
+        dump.updated_at = datetime.now()
         dump.save()
 
+if USE_NORMALIZED_GENRES:
+    Dump.sync_genre_links()
+
 # Обновление списка игр из Dump
 run_export_games()
 
@@ -4,9 +4,6 @@
 __author__ = "ipetrash"
 
 
-from collections import defaultdict
-
-from get_game_genres.common import process_list
 from get_game_genres.db import Dump
 
 
@@ -21,12 +18,7 @@ print()
 max_width = max(len(x.site) for x in Dump.select(Dump.site).distinct())
 fmt_str = "{:<%d} : ({}) {}" % max_width
 
-site_by_genres = defaultdict(list)
-for x in Dump.get():
-    site_by_genres[x.site] += x.genres
-
-for k, v in site_by_genres.items():
-    site_by_genres[k] = process_list(v)
+site_by_genres = Dump.get_genres_by_site()
 
 print(f"Total {len(site_by_genres)}:")
 
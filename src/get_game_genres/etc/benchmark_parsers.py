@@ -0,0 +1,284 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+# Бенчмарк парсеров без сети по ответам, записанным в кассеты.
+# Запись кассет (нужна сеть) в DIR_CASSETTES_RECORD, отобранные кассеты
+# переносятся в DIR_CASSETTES, см. etc/cassettes/README.md:
+#     python -m get_game_genres.etc.benchmark_parsers --record
+# Замер и сравнение с прошлым замером:
+#     python -m get_game_genres.etc.benchmark_parsers --save bench.json
+#     python -m get_game_genres.etc.benchmark_parsers --compare bench.json
+
+
+import argparse
+import json
+import statistics
+import sys
+
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from timeit import default_timer
+from typing import Callable, Iterator
+
+from get_game_genres.config import DIR_CASSETTES, DIR_CASSETTES_RECORD
+from get_game_genres.parsers import TEST_GAMES, get_parsers
+from get_game_genres.parsers.base_parser import BaseParser, GamePageParser
+from get_game_genres.parsers.cassette import (
+    Cassette,
+    CassetteMissError,
+    MODE_RECORD,
+    MODE_REPLAY,
+    use_cassette,
+)
+
+
+# Этапы: поиск игры на сайте (выбор подходящих результатов поиска), получение
+# ответа, разбор ответа (HTML/JSON), поиск данных в разобранном ответе
+# (селекторы и сравнение названий) и нормализация жанров.
+# Поиск отделяется только у GamePageParser (_iter_game_urls), у остальных
+# парсеров он входит в extract
+PHASES: list[str] = ["search", "fetch", "parse", "extract", "normalize", "total"]
+
+# Замеряемые методы BaseParser и этапы, к которым относится их время.
+# parse_html замеряется отдельно, т.к. некоторые парсеры вызывают его напрямую
+TIMED_METHODS: dict[str, str] = {
+    "_fetch": "fetch",
+    "process_response": "parse",
+    "parse_html": "parse",
+    "normalize_genres": "normalize",
+}
+
+# Замеряемый метод GamePageParser, он переопределяется в каждом парсере
+SEARCH_METHOD: str = "_iter_game_urls"
+
+# Время этапов без вложенных замеров: поиск и разбор ответа вызывают получение
+# и разбор ответов, их время не должно учитываться дважды
+_timings: dict[str, float] = defaultdict(float)
+_nested_timings: list[float] = []
+
+
+def _call_timed(phase: str, func: Callable, *args, **kwargs):
+    _nested_timings.append(0.0)
+    t = default_timer()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        elapsed: float = default_timer() - t
+        _timings[phase] += elapsed - _nested_timings.pop()
+        if _nested_timings:
+            _nested_timings[-1] += elapsed
+
+
+def _get_timed(func: Callable, phase: str) -> Callable:
+    def wrapper(*args, **kwargs):
+        return _call_timed(phase, func, *args, **kwargs)
+
+    return wrapper
+
+
+def _get_timed_iter(func: Callable, phase: str) -> Callable:
+    # У генератора замеряется каждое получение следующего значения
+    def wrapper(*args, **kwargs):
+        it = func(*args, **kwargs)
+        while True:
+            try:
+                item = _call_timed(phase, next, it)
+            except StopIteration:
+                return
+            yield item
+
+    return wrapper
+
+
+@contextmanager
+def timed_methods(parsers: list[BaseParser]) -> Iterator[None]:
+    originals = {name: BaseParser.__dict__[name] for name in TIMED_METHODS}
+    search_classes: set[type] = {
+        type(parser) for parser in parsers if isinstance(parser, GamePageParser)
+    }
+    search_originals = {
+        cls: cls.__dict__.get(SEARCH_METHOD) for cls in search_classes
+    }
+    try:
+        for name, phase in TIMED_METHODS.items():
+            method = originals[name]
+            if isinstance(method, classmethod):
+                method = classmethod(_get_timed(method.__func__, phase))
+            else:
+                method = _get_timed(method, phase)
+            setattr(BaseParser, name, method)
+
+        for cls in search_classes:
+            method = _get_timed_iter(getattr(cls, SEARCH_METHOD), "search")
+            setattr(cls, SEARCH_METHOD, method)
+
+        yield
+
+    finally:
+        for name, method in originals.items():
+            setattr(BaseParser, name, method)
+
+        for cls, method in search_originals.items():
+            if method is None:
+                delattr(cls, SEARCH_METHOD)
+            else:
+                setattr(cls, SEARCH_METHOD, method)
+
+
+def record(
+    parsers: list[BaseParser],
+    games: list[str],
+    dir_name: Path = DIR_CASSETTES_RECORD,
+) -> None:
+    for parser in parsers:
+        site_name: str = parser.get_site_name()
+        file_name: Path = Cassette.get_file_name(site_name, dir_name)
+        with use_cassette(parser, MODE_RECORD, file_name) as cassette:
+            for game in games:
+                try:
+                    genres = parser.get_game_genres(game)
+                    print(f"[{site_name}] {game!r}: {genres}")
+                except Exception as e:
+                    print(f"[{site_name}] {game!r}: ошибка: {e}")
+
+        print(f"[{site_name}] Записано ответов: {len(cassette)} в {cassette.file_name}")
+
+
+def run_game(parser: BaseParser, game: str) -> dict[str, float]:
+    _timings.clear()
+    _nested_timings.clear()
+
+    t = default_timer()
+    parser.get_game_genres(game)
+    total: float = default_timer() - t
+
+    result: dict[str, float] = {
+        phase: _timings[phase] for phase in ["search", "fetch", "parse", "normalize"]
+    }
+    result["extract"] = max(total - sum(result.values()), 0.0)
+    result["total"] = total
+    return result
+
+
+def benchmark(
+    parsers: list[BaseParser],
+    games: list[str],
+    number: int = 5,
+    dir_name: Path = DIR_CASSETTES,
+) -> dict[str, dict[str, float]]:
+    # Для каждого сайта - сумма по играм медиан времени этапов за number повторов
+    results: dict[str, dict[str, float]] = dict()
+
+    with timed_methods(parsers):
+        for parser in parsers:
+            site_name: str = parser.get_site_name()
+            file_name: Path = Cassette.get_file_name(site_name, dir_name)
+            if not file_name.exists():
+                print(f"[{site_name}] Нет кассеты, пропуск")
+                continue
+
+            site_result: dict[str, float] = dict.fromkeys(PHASES, 0.0)
+            with use_cassette(parser, MODE_REPLAY, file_name):
+                for game in games:
+                    try:
+                        runs = [run_game(parser, game) for _ in range(number)]
+                    except CassetteMissError as e:
+                        print(f"[{site_name}] {game!r}: {e}")
+                        continue
+
+                    for phase in PHASES:
+                        site_result[phase] += statistics.median(
+                            run[phase] for run in runs
+                        )
+
+            results[site_name] = site_result
+
+    return results
+
+
+def print_results(results: dict[str, dict[str, float]]) -> None:
+    max_width: int = max([len(site) for site in results] + [len("site")])
+    print(
+        f"{'site':<{max_width}} "
+        + " ".join(f"{phase + ', мс':>14}" for phase in PHASES)
+    )
+    for site, result in results.items():
+        print(
+            f"{site:<{max_width}} "
+            + " ".join(f"{result[phase] * 1000:>14.2f}" for phase in PHASES)
+        )
+
+
+def compare(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    threshold: float,
+) -> list[str]:
+    # Сайты, у которых разбор (все, кроме получения ответов) стал медленнее
+    regressions: list[str] = []
+    for site, result in results.items():
+        if site not in baseline:
+            continue
+
+        prev: float = baseline[site]["total"] - baseline[site]["fetch"]
+        curr: float = result["total"] - result["fetch"]
+        if prev > 0 and curr / prev > threshold:
+            regressions.append(
+                f"{site}: {prev * 1000:.2f} -> {curr * 1000:.2f} мс ({curr / prev:.2f}x)"
+            )
+
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк парсеров по кассетам")
+    parser.add_argument("--record", action="store_true", help="Записать кассеты")
+    parser.add_argument(
+        "--dir",
+        type=Path,
+        help=(
+            "Папка кассет, по умолчанию для записи - DIR_CASSETTES_RECORD, "
+            "для замера - DIR_CASSETTES"
+        ),
+    )
+    parser.add_argument("--number", type=int, default=5, help="Повторов на игру")
+    parser.add_argument("--save", type=Path, help="Сохранить результаты в JSON")
+    parser.add_argument("--compare", type=Path, help="Сравнить с результатами из JSON")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.25,
+        help="Во сколько раз разбор может стать медленнее без ошибки",
+    )
+    args = parser.parse_args()
+
+    parsers: list[BaseParser] = get_parsers()
+    for p in parsers:
+        p._need_logs = False
+
+    if args.record:
+        record(parsers, TEST_GAMES, dir_name=args.dir or DIR_CASSETTES_RECORD)
+        return
+
+    results = benchmark(
+        parsers, TEST_GAMES, number=args.number, dir_name=args.dir or DIR_CASSETTES
+    )
+    print_results(results)
+
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=4), encoding="utf-8")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print("\nЗамедление разбора:\n" + "\n".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,12 +6,13 @@ __author__ = "ipetrash"
 
 import json
 
-from get_game_genres.app_parser.main import get_parsers
 from get_game_genres.generate_games.generate_games import (
     FILE_NAME_GENRE_TRANSLATE,
     process_genres,
     load_json,
 )
+from get_game_genres.lookup_game import lookup_game
+from get_game_genres.parsers import get_parsers
 
 GENRE_TRANSLATE: dict[str, str | list[str] | None] = load_json(
     FILE_NAME_GENRE_TRANSLATE
@@ -28,28 +29,28 @@ print()
 total_genres: list[str]
 if MANUAL_GENRES:
     total_genres = MANUAL_GENRES
+
+    # NOTE: Тут нет приседания с DLC и MOD из generate_games
+    genres = process_genres(total_genres, GENRE_TRANSLATE)
 else:
-    total_genres = []
-    for p in get_parsers():
+    parsers = get_parsers()
+    for p in parsers:
         p._need_logs = False
-        try:
-            genres: list[str] = p.get_game_genres(GAME)
-            print(f"[{p.get_site_name()}] Genres ({len(genres)}): {genres}")
-            total_genres += genres
-        except Exception as e:
-            print(f"[{p.get_site_name()}] Error: {e}")
+
+    # Сайты опрашиваются одновременно, результаты печатаются по мере получения
+    result = lookup_game(
+        GAME, parsers, genre_translate=GENRE_TRANSLATE, on_result=print
+    )
+    total_genres = result.raw_genres
+    genres = result.genres
 
 print()
 
 print(f"Raw genres ({len(total_genres)}): {total_genres}")
-
-# NOTE: Тут нет приседания с DLC и MOD из generate_games
-total_genres = process_genres(total_genres, GENRE_TRANSLATE)
-
-print(f"Genres ({len(total_genres)}): {total_genres}")
+print(f"Genres ({len(genres)}): {genres}")
 print(
-    f"Genres as JSON ({len(total_genres)}): "
-    f"{json.dumps(total_genres, ensure_ascii=False)}"
+    f"Genres as JSON ({len(genres)}): "
+    f"{json.dumps(genres, ensure_ascii=False)}"
 )
 """
 Game: 'Death Must Die'
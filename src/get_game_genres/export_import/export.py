@@ -6,8 +6,6 @@ __author__ = "ipetrash"
 
 from pathlib import Path
 
-from playhouse.shortcuts import model_to_dict
-
 from get_game_genres.common import save_json
 from get_game_genres.db import Dump
 
@@ -19,7 +17,8 @@ FILE_NAME_EXPORT_JSON = DIR / "games.json"
 
 
 def run() -> None:
-    items = [model_to_dict(dump) for dump in Dump.select()]
+    # Отметки времени не экспортируются: при импорте дампы получают новые
+    items = [dump.to_dict() for dump in Dump.select()]
     print(len(items))
 
     save_json(items, FILE_NAME_EXPORT_JSON)
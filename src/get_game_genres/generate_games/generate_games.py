@@ -6,10 +6,11 @@ __author__ = "ipetrash"
 
 import re
 
+from datetime import datetime
 from pathlib import Path
 
 from get_game_genres.common import load_json, save_json, get_logger, process_list
-from get_game_genres.db import Dump, Game
+from get_game_genres.db import Dump, Game, Watermark
 from get_game_genres.genre_translate_file.load import FILE_NAME_GENRE_TRANSLATE
 from get_game_genres.third_party.add_notify_telegram import add_notify
 
@@ -21,6 +22,10 @@ DIR: Path = Path(__file__).parent.resolve()
 FILE_NAME_GAMES: Path = DIR / "game_by_genres.json"
 FILE_NAME_GAMES_HARDCORED: Path = DIR / "game_by_genres__hardcored.json"
 
+# Отметки для дампов из базы и для файлов, от которых зависит результат
+WATERMARK_NAME_DUMP: str = "generate_games.dump"
+WATERMARK_NAME_FILES: str = "generate_games.files"
+
 # Example: "Action", "Adventure" -> "Action-adventure"
 GENRE_COMPRESSION: list[tuple[str, str, str]] = [
     ("Action", "Adventure", "Action-adventure"),
@@ -48,7 +53,7 @@ def do_genres_compression(genres: list[str], need_log: bool = True) -> list[str]
             genres.append(target)
 
             if need_log:
-                log.info(f"Сжатие жанров {src_1!r} и {src_2!r} -> {target!r}")
+                log.info("Сжатие жанров %r и %r -> %r", src_1, src_2, target)
 
     for x in to_remove:
         genres.remove(x)
@@ -106,7 +111,7 @@ def process_genres(
         elif isinstance(tr_genres, list):
             new_genres.extend(tr_genres)
         else:
-            log.warning(f"Неподдерживаемый тип жанров {tr_genres} из {genre!r}")
+            log.warning("Неподдерживаемый тип жанров %s из %r", tr_genres, genre)
 
     new_genres = do_genres_compression(new_genres, need_log=False)
     new_genres = remove_partial_duplicates(new_genres, need_log=False)
@@ -115,9 +120,44 @@ def process_genres(
     return new_genres
 
 
-def run() -> None:
+def get_files_modified_at() -> datetime | None:
+    items: list[datetime] = [
+        datetime.fromtimestamp(file_name.stat().st_mtime)
+        for file_name in [FILE_NAME_GAMES_HARDCORED, FILE_NAME_GENRE_TRANSLATE]
+        if file_name.exists()
+    ]
+    return max(items, default=None)
+
+
+def has_changes(last_updated_at: datetime | None) -> bool:
+    # Результат зависит только от дампов и файлов трансляций и явно заданных игр.
+    # Если ничего из них не менялось с прошлого запуска, то пересчет не нужен
+    if not FILE_NAME_GAMES.exists():
+        return True
+
+    watermark_dump: datetime | None = Watermark.get_value(WATERMARK_NAME_DUMP)
+    watermark_files: datetime | None = Watermark.get_value(WATERMARK_NAME_FILES)
+    if not watermark_dump or not watermark_files:
+        return True
+
+    files_modified_at: datetime | None = get_files_modified_at()
+    return (
+        (last_updated_at is not None and last_updated_at > watermark_dump)
+        or (files_modified_at is not None and files_modified_at > watermark_files)
+    )
+
+
+def run(force: bool = False) -> None:
     log.info("Запуск генератора игр.")
 
+    # Отметка берется до чтения дампов, чтобы не пропустить дампы,
+    # добавленные во время обработки
+    last_updated_at: datetime | None = Dump.get_last_updated_at()
+    if not force and not has_changes(last_updated_at):
+        log.info("Дампы и файлы не менялись с прошлого запуска. Пересчет не нужен")
+        log.info("Завершено!\n")
+        return
+
     file_game_by_genres_hardcored: dict[str, list[str]] = load_json(
         FILE_NAME_GAMES_HARDCORED
     )
@@ -128,11 +168,8 @@ def run() -> None:
     file_game_by_genres: dict[str, list[str]] = load_json(FILE_NAME_GAMES)
     log.info(f"Данных из файла игр: {len(file_game_by_genres)}")
 
-    db_dump_game_by_genres: dict[str, list[str]] = Dump.dump()
-    log.info(f"Данных дампа из базы: {len(db_dump_game_by_genres)}")
-
-    db_game_by_genres: dict[str, list[str]] = Game.dump()
-    log.info(f"Данных из базы: {len(db_game_by_genres)}")
+    log.info(f"Данных дампа из базы: {Dump.select(Dump.name).distinct().count()}")
+    log.info(f"Данных из базы: {Game.count()}")
 
     genre_translate: dict[str, str | list[str] | None] = load_json(
         FILE_NAME_GENRE_TRANSLATE
@@ -147,7 +184,8 @@ def run() -> None:
     game_by_genres: dict[str, list[str]] = dict()
     games_not_found_genres: list[str] = []
 
-    for db_dump_game, db_dump_genres in db_dump_game_by_genres.items():
+    # Игры из дампа читаются из базы по одной, уже с объединенными жанрами
+    for db_dump_game, db_dump_genres in Dump.iter_dump():
         new_genres: list[str]
         # Заполнение жанров из файла захаркоденных жанров
         if db_dump_game in file_game_by_genres_hardcored:
@@ -175,7 +213,7 @@ def run() -> None:
 
             if not new_genres:
                 games_not_found_genres.append(db_dump_game)
-                log.warning(f"Не найдены жанры в {db_dump_game!r}")
+                log.warning("Не найдены жанры в %r", db_dump_game)
 
         game_by_genres[db_dump_game] = new_genres
 
@@ -208,7 +246,7 @@ def run() -> None:
     # Вывод информации
     for game in new_games:
         genres: list[str] = game_by_genres[game]
-        log.info(f"Добавлена игра {game!r} с жанрами ({len(genres)}): {genres}")
+        log.info("Добавлена игра %r с жанрами (%d): %s", game, len(genres), genres)
 
     for game, (old, new) in changed_values.items():
         log.info(
@@ -234,8 +272,16 @@ def run() -> None:
         log.info("Сохранять нет необходимости")
 
     # Лишним не будет синхронизация из файла в БД
-    for db_dump_game, db_dump_genres in game_by_genres.items():
-        Game.add_or_update(db_dump_game, db_dump_genres)
+    counts: dict[str, int] = Game.sync(game_by_genres)
+    log.info(
+        f"Синхронизация игр в базе. Добавлено: {counts['created']}, "
+        f"обновлено: {counts['updated']}, удалено: {counts['deleted']}."
+    )
+
+    Watermark.set_value(WATERMARK_NAME_DUMP, last_updated_at)
+
+    # Берется после сохранения файлов, т.к. явно заданные игры могли дополниться
+    Watermark.set_value(WATERMARK_NAME_FILES, get_files_modified_at())
 
     log.info("Завершено!\n")
 
@@ -59,7 +59,7 @@ def run() -> None:
         if genre in current_genres:
             genres[genre] = current_genres.get(genre)
         else:
-            log.info(f"Добавлен новый жанр: {genre!r}")
+            log.info("Добавлен новый жанр: %r", genre)
             genres[genre] = ""
 
     number = len(genres) - len(current_genres)
@@ -71,14 +71,16 @@ def run() -> None:
     else:
         log.info("Новых жанров нет. Сохранять не нужно")
 
-    for genre, description in genres.items():
-        aliases: list[str] = sorted(all_genres.get(genre, []))
-
-        Genre.add_or_update(
-            name=genre,
-            description=description,
-            aliases=", ".join(aliases),
-        )
+    counts: dict[str, int] = Genre.sync(
+        {
+            genre: (description, ", ".join(sorted(all_genres.get(genre, []))))
+            for genre, description in genres.items()
+        }
+    )
+    log.info(
+        f"Синхронизация жанров в базе. Добавлено: {counts['created']}, "
+        f"обновлено: {counts['updated']}."
+    )
 
     log.info("Завершено!\n")
 
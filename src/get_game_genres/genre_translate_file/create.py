@@ -6,8 +6,10 @@ __author__ = "ipetrash"
 
 import re
 
+from datetime import datetime
+
 from get_game_genres.common import load_json, save_json, get_logger
-from get_game_genres.db import Dump
+from get_game_genres.db import Dump, Watermark
 from get_game_genres.genre_translate_file.load import FILE_NAME_GENRE_TRANSLATE
 from get_game_genres.third_party.add_notify_telegram import add_notify
 
@@ -27,6 +29,19 @@ def get_similar_genre(genre: str, genre_translate: dict) -> list[str] | str | No
 log = get_logger("genre_translate.txt")
 
 
+WATERMARK_NAME: str = "genre_translate_file"
+
+# Время изменения файла жанров после прошлого запуска. Если файл с тех пор
+# изменили (например, удалили из него жанры вручную), то проверяются все дампы
+WATERMARK_NAME_FILE: str = "genre_translate_file_mtime"
+
+
+def get_file_mtime() -> datetime | None:
+    if not FILE_NAME_GENRE_TRANSLATE.exists():
+        return None
+    return datetime.fromtimestamp(FILE_NAME_GENRE_TRANSLATE.stat().st_mtime)
+
+
 def run(need_notify=True) -> None:
     log.info("Запуск трансляции жанров.")
 
@@ -37,15 +52,33 @@ def run(need_notify=True) -> None:
 
     log.info(f"Жанры: {len(genre_translate)}")
 
+    # Проверяются только жанры дампов, измененных с прошлого запуска.
+    # Отметка берется до чтения жанров, чтобы не пропустить дампы, добавленные во
+    # время обработки. При первом запуске и если файл жанров изменили после
+    # прошлого запуска, то проверяются все дампы
+    is_file_changed: bool = get_file_mtime() != Watermark.get_value(
+        WATERMARK_NAME_FILE
+    )
+    if is_file_changed:
+        log.info("Файл жанров изменился с прошлого запуска")
+
+    watermark: datetime | None = (
+        None
+        if is_first_run or is_file_changed
+        else Watermark.get_value(WATERMARK_NAME)
+    )
+    last_updated_at: datetime | None = Dump.get_last_updated_at()
+    log.info(f"Изменения дампов после: {watermark}")
+
     new_genres: dict[str, list[str] | str | None] = dict()
-    for genre in Dump.get_all_genres():
+    for genre in Dump.get_all_genres(since=watermark):
         if genre not in genre_translate:
-            log.info(f"Добавлен новый жанр: {genre!r}")
+            log.info("Добавлен новый жанр: %r", genre)
 
             # Попробуем найти жанр среди существующих
             value = get_similar_genre(genre, genre_translate)
             if value:
-                log.info(f"Найдено значение из похожего жанра: {genre!r}={value!r}")
+                log.info("Найдено значение из похожего жанра: %r=%r", genre, value)
 
             genre_translate[genre] = value
             new_genres[genre] = value
@@ -78,6 +111,9 @@ def run(need_notify=True) -> None:
     else:
         log.info("Нет новых жанров")
 
+    Watermark.set_value(WATERMARK_NAME, last_updated_at)
+    Watermark.set_value(WATERMARK_NAME_FILE, get_file_mtime())
+
     log.info("Завершено!\n")
 
 
@@ -50,7 +50,7 @@ if genre_translate:
 
     for k, v in merge_genre_translate.items():
         if v is not None and k in genre_translate and genre_translate.get(k) is None:
-            log.info(f"Слияние: {k!r} -> {v!r}")
+            log.info("Слияние: %r -> %r", k, v)
             genre_translate[k] = v
             number += 1
 
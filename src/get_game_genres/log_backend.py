@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+# Логирование без записи в файлы и консоль в потоке, который пишет в лог:
+# логгеры только кладут записи в очередь (QueueHandler), а в файлы, консоль и
+# JSON-файл их пишет отдельный поток (QueueListener)
+
+
+import atexit
+import json
+import logging
+import queue
+import sys
+import threading
+
+from datetime import datetime
+from fnmatch import fnmatch
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+
+from get_game_genres.config import (
+    LOG_FORMAT,
+    LOG_JSON_FILE_NAME,
+    LOG_LEVEL,
+    LOG_LEVELS,
+)
+
+
+LOG_MAX_BYTES: int = 10_000_000
+LOG_BACKUP_COUNT: int = 5
+
+
+class JsonFormatter(logging.Formatter):
+    # Одна запись - одна строка JSON
+    def format(self, record: logging.LogRecord) -> str:
+        data = dict(
+            time=datetime.fromtimestamp(record.created).isoformat(),
+            level=record.levelname,
+            logger=record.name,
+            thread=record.threadName,
+            message=record.getMessage(),
+        )
+        return json.dumps(data, ensure_ascii=False)
+
+
+# Передает запись файлу ее логгера, у каждого логгера свой файл
+class RoutingHandler(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.handlers: dict[str, logging.Handler] = dict()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        handler = self.handlers.get(record.name)
+        if handler:
+            handler.handle(record)
+
+    def flush(self) -> None:
+        for handler in list(self.handlers.values()):
+            handler.flush()
+
+    def close(self) -> None:
+        for handler in list(self.handlers.values()):
+            handler.close()
+        super().close()
+
+
+_lock = threading.Lock()
+_queue: queue.Queue = queue.Queue()
+_routing_handler = RoutingHandler()
+_listener: QueueListener | None = None
+
+
+def get_level(name: str) -> int:
+    # Уровень логгера из LOG_LEVELS (шаблоны имен, например "parser_*"),
+    # иначе LOG_LEVEL
+    for pattern, level in LOG_LEVELS.items():
+        if fnmatch(name, pattern):
+            return logging.getLevelName(level)
+    return logging.getLevelName(LOG_LEVEL)
+
+
+def _start_listener() -> None:
+    global _listener
+
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(stream=sys.stdout)
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    handlers: list[logging.Handler] = [_routing_handler, stream_handler]
+    if LOG_JSON_FILE_NAME:
+        LOG_JSON_FILE_NAME.parent.mkdir(parents=True, exist_ok=True)
+
+        json_handler = RotatingFileHandler(
+            LOG_JSON_FILE_NAME,
+            maxBytes=LOG_MAX_BYTES,
+            backupCount=LOG_BACKUP_COUNT,
+            encoding="utf-8",
+        )
+        json_handler.setFormatter(JsonFormatter())
+        handlers.append(json_handler)
+
+    _listener = QueueListener(_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def get_logger(
+    name: str,
+    file_name: Path,
+    log_format: str = LOG_FORMAT,
+    encoding: str = "utf-8",
+) -> logging.Logger:
+    log = logging.getLogger(name)
+
+    with _lock:
+        # Повторный вызов не добавляет обработчики заново
+        if name in _routing_handler.handlers:
+            return log
+
+        _start_listener()
+
+        file_name.parent.mkdir(parents=True, exist_ok=True)
+        file_handler = RotatingFileHandler(
+            file_name,
+            maxBytes=LOG_MAX_BYTES,
+            backupCount=LOG_BACKUP_COUNT,
+            encoding=encoding,
+            delay=True,
+        )
+        file_handler.setFormatter(logging.Formatter(log_format))
+        _routing_handler.handlers[name] = file_handler
+
+        log.setLevel(get_level(name))
+        log.addHandler(QueueHandler(_queue))
+        log.propagate = False
+
+    return log
+
+
+def flush_logs() -> None:
+    # Ожидание записи всех записей из очереди
+    if _listener is None:
+        return
+
+    _queue.join()
+    for handler in _listener.handlers:
+        handler.flush()
+
+
+@atexit.register
+def stop_logs() -> None:
+    global _listener
+
+    with _lock:
+        if _listener is None:
+            return
+
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+# Поиск жанров одной игры сразу на всех сайтах:
+#     python -m get_game_genres.lookup_game "Dead Space"
+# Сайты опрашиваются одновременно, поэтому поиск длится примерно столько,
+# сколько отвечает самый медленный сайт. Каждый сайт ждется не дольше
+# LOOKUP_TIMEOUT с момента запуска его потока
+
+
+import argparse
+import json
+import queue
+import threading
+
+from timeit import default_timer
+from typing import Callable, Iterator
+
+from get_game_genres.common import load_json
+from get_game_genres.config import LOOKUP_TIMEOUT
+from get_game_genres.generate_games.generate_games import (
+    FILE_NAME_GENRE_TRANSLATE,
+    process_genres,
+)
+from get_game_genres.parsers import get_parsers
+from get_game_genres.parsers.base_parser import BaseParser
+
+
+class SiteResult:
+    def __init__(
+        self,
+        site: str,
+        genres: list[str] | None = None,
+        error: str | None = None,
+        elapsed: float = 0.0,
+    ) -> None:
+        self.site = site
+        self.genres: list[str] = genres or []
+        self.error = error
+        self.elapsed = elapsed
+
+    def is_ok(self) -> bool:
+        return self.error is None
+
+    def __str__(self) -> str:
+        result = self.genres if self.is_ok() else f"Ошибка: {self.error}"
+        return f"[{self.site}] ({self.elapsed:.1f} сек.): {result}"
+
+
+class LookupResult:
+    def __init__(
+        self,
+        game: str,
+        sites: list[SiteResult],
+        raw_genres: list[str],
+        genres: list[str],
+        elapsed: float,
+    ) -> None:
+        self.game = game
+        self.sites = sites
+        self.raw_genres = raw_genres
+        self.genres = genres
+        self.elapsed = elapsed
+
+
+def _lookup_site(parser: BaseParser, game: str) -> SiteResult:
+    site: str = parser.get_site_name()
+
+    t = default_timer()
+    try:
+        genres = parser.get_game_genres(game)
+        return SiteResult(site, genres, elapsed=default_timer() - t)
+    except Exception as e:
+        return SiteResult(site, error=str(e), elapsed=default_timer() - t)
+
+
+def iter_lookup_game(
+    game: str,
+    parsers: list[BaseParser] | None = None,
+    timeout: float = LOOKUP_TIMEOUT,
+) -> Iterator[SiteResult]:
+    # Результаты сайтов по мере их получения. Сайты, не ответившие за timeout
+    # секунд с запуска своего потока, возвращаются с ошибкой
+    if parsers is None:
+        parsers = get_parsers()
+
+    if not parsers:
+        return
+
+    # Каждый сайт ищется в своем фоновом (daemon) потоке: запрос к зависшему
+    # сайту нельзя прервать, но такой поток не задерживает ни результат, ни
+    # завершение программы
+    results: queue.Queue[SiteResult] = queue.Queue()
+
+    # Время запуска потоков сайтов, от него отсчитывается timeout сайта
+    started: dict[str, float] = dict()
+
+    def _run(parser: BaseParser) -> None:
+        started[parser.get_site_name()] = default_timer()
+        results.put(_lookup_site(parser, game))
+
+    for parser in parsers:
+        threading.Thread(
+            target=_run,
+            args=[parser],
+            name=f"lookup_game_{parser.get_site_name()}",
+            daemon=True,
+        ).start()
+
+    pending: list[str] = [parser.get_site_name() for parser in parsers]
+    while pending:
+        now: float = default_timer()
+
+        # Поток, который еще не запустился, ждется как только что запущенный
+        deadlines: dict[str, float] = {
+            site: started.get(site, now) + timeout for site in pending
+        }
+        for site, deadline in deadlines.items():
+            if deadline <= now:
+                pending.remove(site)
+                yield SiteResult(
+                    site, error=f"Нет ответа за {timeout} сек.", elapsed=timeout
+                )
+
+        if not pending:
+            break
+
+        try:
+            result = results.get(
+                timeout=min(deadlines[site] for site in pending) - now
+            )
+        except queue.Empty:
+            continue
+
+        # Ответ сайта, который уже вернулся с ошибкой таймаута
+        if result.site not in pending:
+            continue
+
+        pending.remove(result.site)
+        yield result
+
+
+def lookup_game(
+    game: str,
+    parsers: list[BaseParser] | None = None,
+    timeout: float = LOOKUP_TIMEOUT,
+    genre_translate: dict[str, str | list[str] | None] | None = None,
+    on_result: Callable[[SiteResult], None] | None = None,
+) -> LookupResult:
+    if genre_translate is None:
+        genre_translate = load_json(FILE_NAME_GENRE_TRANSLATE)
+
+    t = default_timer()
+
+    sites: list[SiteResult] = []
+    raw_genres: list[str] = []
+    for result in iter_lookup_game(game, parsers, timeout):
+        sites.append(result)
+        raw_genres += result.genres
+
+        if on_result:
+            on_result(result)
+
+    # NOTE: Тут нет приседания с DLC и MOD из generate_games
+    genres: list[str] = process_genres(raw_genres, genre_translate)
+
+    return LookupResult(
+        game=game,
+        sites=sites,
+        raw_genres=raw_genres,
+        genres=genres,
+        elapsed=default_timer() - t,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Поиск жанров игры на всех сайтах")
+    parser.add_argument("game", help="Название игры")
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=LOOKUP_TIMEOUT,
+        help="Сколько секунд ждать ответа сайтов",
+    )
+    parser.add_argument("--sites", nargs="+", metavar="SITE", help="Только эти сайты")
+    parser.add_argument(
+        "--exclude-sites", nargs="+", metavar="SITE", help="Все сайты, кроме этих"
+    )
+    parser.add_argument("--verbose", action="store_true", help="Логи парсеров")
+    args = parser.parse_args()
+
+    parsers: list[BaseParser] = get_parsers(
+        sites=args.sites, exclude_sites=args.exclude_sites
+    )
+    for p in parsers:
+        p._need_logs = args.verbose
+
+    print(f"Game: {args.game!r}")
+    print()
+
+    result = lookup_game(args.game, parsers, args.timeout, on_result=print)
+    print()
+
+    print(f"Raw genres ({len(result.raw_genres)}): {result.raw_genres}")
+    print(f"Genres ({len(result.genres)}): {result.genres}")
+    print(
+        f"Genres as JSON ({len(result.genres)}): "
+        f"{json.dumps(result.genres, ensure_ascii=False)}"
+    )
+    print(f"Elapsed: {result.elapsed:.1f} сек.")
+
+
+if __name__ == "__main__":
+    main()
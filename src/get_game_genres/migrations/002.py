@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+# Создание и заполнение нормализованных таблиц жанров (site, genre_name, dump_genre,
+# game_genre) из JSON-списков dump.genres и game.genres.
+# После миграции можно включить USE_NORMALIZED_GENRES в config.py.
+# Модели из db.py не используются: в них уже есть столбцы следующих миграций
+
+
+from playhouse.migrate import SqliteDatabase
+from get_game_genres.config import DB_FILE_NAME
+
+
+db = SqliteDatabase(DB_FILE_NAME, pragmas={"foreign_keys": 1})
+
+
+SQL_CREATE_TABLES: list[str] = [
+    """
+    CREATE TABLE IF NOT EXISTS "site" (
+        "id" INTEGER NOT NULL PRIMARY KEY,
+        "name" TEXT NOT NULL
+    )
+    """,
+    'CREATE UNIQUE INDEX IF NOT EXISTS "site_name" ON "site" ("name")',
+    """
+    CREATE TABLE IF NOT EXISTS "genre_name" (
+        "id" INTEGER NOT NULL PRIMARY KEY,
+        "name" TEXT NOT NULL
+    )
+    """,
+    'CREATE UNIQUE INDEX IF NOT EXISTS "genrename_name" ON "genre_name" ("name")',
+    """
+    CREATE TABLE IF NOT EXISTS "dump_genre" (
+        "dump_id" INTEGER NOT NULL,
+        "site_id" INTEGER NOT NULL,
+        "genre_id" INTEGER NOT NULL,
+        PRIMARY KEY ("dump_id", "genre_id"),
+        FOREIGN KEY ("dump_id") REFERENCES "dump" ("id") ON DELETE CASCADE,
+        FOREIGN KEY ("site_id") REFERENCES "site" ("id") ON DELETE CASCADE,
+        FOREIGN KEY ("genre_id") REFERENCES "genre_name" ("id") ON DELETE CASCADE
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS "dumpgenre_dump_id" ON "dump_genre" ("dump_id")',
+    'CREATE INDEX IF NOT EXISTS "dumpgenre_site_id" ON "dump_genre" ("site_id")',
+    'CREATE INDEX IF NOT EXISTS "dumpgenre_genre_id" ON "dump_genre" ("genre_id")',
+    'CREATE INDEX IF NOT EXISTS "dumpgenre_site_id_genre_id" '
+    'ON "dump_genre" ("site_id", "genre_id")',
+    """
+    CREATE TABLE IF NOT EXISTS "game_genre" (
+        "game_id" TEXT NOT NULL,
+        "genre_id" INTEGER NOT NULL,
+        PRIMARY KEY ("game_id", "genre_id"),
+        FOREIGN KEY ("game_id") REFERENCES "game" ("name") ON DELETE CASCADE,
+        FOREIGN KEY ("genre_id") REFERENCES "genre_name" ("id") ON DELETE CASCADE
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS "gamegenre_game_id" ON "game_genre" ("game_id")',
+    'CREATE INDEX IF NOT EXISTS "gamegenre_genre_id" ON "game_genre" ("genre_id")',
+]
+
+# То же, что Dump.sync_genre_links и Game.sync_genre_links для всех записей
+SQL_SYNC: list[str] = [
+    'INSERT OR IGNORE INTO "site" ("name") SELECT DISTINCT "site" FROM "dump"',
+    """
+    INSERT OR IGNORE INTO "genre_name" ("name")
+    SELECT DISTINCT je.value FROM "dump", json_each("dump"."genres") AS je
+    UNION
+    SELECT DISTINCT je.value FROM "game", json_each("game"."genres") AS je
+    """,
+    'DELETE FROM "dump_genre"',
+    """
+    INSERT OR IGNORE INTO "dump_genre" ("dump_id", "site_id", "genre_id")
+    SELECT "dump"."id", "site"."id", "genre_name"."id"
+    FROM "dump", json_each("dump"."genres") AS je
+    JOIN "site" ON "site"."name" = "dump"."site"
+    JOIN "genre_name" ON "genre_name"."name" = je.value
+    """,
+    'DELETE FROM "game_genre"',
+    """
+    INSERT OR IGNORE INTO "game_genre" ("game_id", "genre_id")
+    SELECT "game"."name", "genre_name"."id"
+    FROM "game", json_each("game"."genres") AS je
+    JOIN "genre_name" ON "genre_name"."name" = je.value
+    """,
+]
+
+
+with db.atomic():
+    for sql in SQL_CREATE_TABLES + SQL_SYNC:
+        db.execute_sql(sql)
+
+counts = {
+    table_name: db.execute_sql(f'SELECT COUNT(*) FROM "{table_name}"').fetchone()[0]
+    for table_name in ["site", "genre_name", "dump_genre", "game_genre"]
+}
+print(", ".join(f"{k}: {v}" for k, v in counts.items()))
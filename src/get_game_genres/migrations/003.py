@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+# Добавление отметок времени created_at/updated_at в dump и game.
+# Существующим строкам проставляется время миграции, таблица watermark создается
+# при подключении к базе.
+# Индексы с такими именами могли быть созданы при подключении к базе до миграции
+# по несуществующим столбцам, поэтому они пересоздаются
+
+
+from datetime import datetime
+
+from playhouse.migrate import SqliteDatabase
+from get_game_genres.config import DB_FILE_NAME
+
+
+db = SqliteDatabase(DB_FILE_NAME)
+
+now: str = datetime.now().isoformat(sep=" ")
+
+with db.atomic():
+    for table_name in ["dump", "game"]:
+        columns: set[str] = {column.name for column in db.get_columns(table_name)}
+
+        for column_name in ["created_at", "updated_at"]:
+            index_name = f"{table_name}_{column_name}"
+            db.execute_sql(f'DROP INDEX IF EXISTS "{index_name}"')
+
+            if column_name not in columns:
+                db.execute_sql(
+                    f'ALTER TABLE "{table_name}" ADD COLUMN "{column_name}" '
+                    f"DATETIME NOT NULL DEFAULT '{now}'"
+                )
+
+            db.execute_sql(
+                f'CREATE INDEX "{index_name}" ON "{table_name}" ("{column_name}")'
+            )
@@ -4,47 +4,121 @@
 __author__ = "ipetrash"
 
 
-import importlib.util
-import sys
+import importlib
+import threading
 import time
 
-from inspect import isclass
+from functools import cache
+from inspect import isabstract, isclass
 from pathlib import Path
-from types import ModuleType
+from typing import Type
 
+from get_game_genres.common import load_json, save_json
+from get_game_genres.config import FILE_NAME_PARSERS_MANIFEST
 from get_game_genres.parsers.base_parser import BaseParser
 
 
 # Текущая папка
 DIR_PARSERS = Path(__file__).parent.resolve()
 
+_manifest_lock = threading.Lock()
+_manifest: dict[str, str] | None = None
 
-def module_from_file(file_path: Path) -> ModuleType:
-    module_name = file_path.stem
-    spec = importlib.util.spec_from_file_location(module_name, file_path)
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
 
-    if module_name not in sys.modules:
-        sys.modules[module_name] = module
-
-    return module
+def _get_modules_signature() -> list[list]:
+    # Меняется при изменении, добавлении и удалении модулей в папке парсеров
+    return [
+        [file_name.name, file_name.stat().st_mtime_ns, file_name.stat().st_size]
+        for file_name in sorted(DIR_PARSERS.glob("*.py"))
+    ]
 
 
-def get_parsers() -> list[BaseParser]:
-    items = []
+def _build_manifest() -> dict[str, str]:
+    # Название сайта -> "модуль:класс" парсера. Для этого импортируются все модули
+    manifest: dict[str, str] = dict()
+    for file_name in sorted(DIR_PARSERS.glob("*.py")):
+        if file_name.stem == "__init__":
+            continue
 
-    for file_name in DIR_PARSERS.glob("*.py"):
-        module = module_from_file(file_name)
+        module = importlib.import_module(f"{__name__}.{file_name.stem}")
         for attr in dir(module):
             cls = getattr(module, attr)
-            if not isclass(cls) or not issubclass(cls, BaseParser) or cls is BaseParser:
+            if (
+                not isclass(cls)
+                or not issubclass(cls, BaseParser)
+                or isabstract(cls)
+                or cls.__module__ != module.__name__
+            ):
                 continue
 
-            parser: BaseParser = cls.instance()
-            items.append(parser)
+            manifest[cls.get_site_name()] = f"{module.__name__}:{cls.__name__}"
+
+    return manifest
+
+
+def get_manifest() -> dict[str, str]:
+    # Модули импортируются только при изменении файлов парсеров, иначе список
+    # парсеров берется из файла
+    global _manifest
+
+    with _manifest_lock:
+        if _manifest is not None:
+            return _manifest
+
+        signature = _get_modules_signature()
+
+        data = load_json(FILE_NAME_PARSERS_MANIFEST)
+        if data and data.get("signature") == signature:
+            _manifest = data["parsers"]
+            return _manifest
+
+        _manifest = _build_manifest()
+        try:
+            FILE_NAME_PARSERS_MANIFEST.parent.mkdir(parents=True, exist_ok=True)
+            save_json(
+                dict(signature=signature, parsers=_manifest),
+                FILE_NAME_PARSERS_MANIFEST,
+            )
+        except OSError:
+            pass
+
+        return _manifest
+
 
-    return items
+def get_site_names() -> list[str]:
+    return sorted(get_manifest())
+
+
+@cache
+def get_parser_class(site_name: str) -> Type[BaseParser]:
+    manifest = get_manifest()
+    if site_name not in manifest:
+        raise ValueError(
+            f"Неизвестный сайт {site_name!r}, доступные: {', '.join(sorted(manifest))}"
+        )
+
+    module_name, class_name = manifest[site_name].split(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def get_parser(site_name: str) -> BaseParser:
+    return get_parser_class(site_name).instance()
+
+
+def get_parsers(
+    sites: list[str] | None = None,
+    exclude_sites: list[str] | None = None,
+) -> list[BaseParser]:
+    # Создаются только выбранные парсеры, модули остальных не импортируются
+    site_names: list[str] = sites if sites else get_site_names()
+    if exclude_sites:
+        for site_name in exclude_sites:
+            # Проверка, что сайт существует
+            get_parser_class(site_name)
+
+        site_names = [x for x in site_names if x not in exclude_sites]
+
+    return [get_parser(site_name) for site_name in site_names]
 
 
 def print_parsers(parsers: list, log=print) -> None:
@@ -98,17 +172,16 @@ if __name__ == "__main__":
     """
     print()
 
+    from get_game_genres.lookup_game import iter_lookup_game
+
     game = "Dead Space"
     print(f"Search genres for {game!r}:")
     for parser in parsers:
         parser._need_logs = False
 
-        try:
-            result = parser.get_game_genres(game)
-        except Exception as e:
-            result = e
-
-        print(f"    {parser.get_site_name():<25}: {result}")
+    for result in iter_lookup_game(game, parsers):
+        genres = result.genres if result.is_ok() else result.error
+        print(f"    {result.site:<25}: {genres}")
     """
         ag_ru                    : ['Шутеры', 'Экшены']
         gamebomb_ru              : ['Боевик-приключения', 'Шутер']
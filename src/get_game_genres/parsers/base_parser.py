@@ -4,24 +4,95 @@
 __author__ = "ipetrash"
 
 
+import asyncio
+import html
 import logging
-from typing import Any
+import re
+from typing import Any, Iterator
 
 import unicodedata
-import sys
 
 from abc import ABCMeta, abstractmethod
-from logging.handlers import RotatingFileHandler
 from pathlib import Path
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import requests
 
-from get_game_genres.common import get_uniques, get_current_datetime_str, process_umlauts
-from get_game_genres.config import USER_AGENT, DIR_ERRORS, DIR_LOGS, NEED_LOGS, LOG_FORMAT
+from get_game_genres.common import get_uniques, process_umlauts
+from get_game_genres.config import (
+    DIR_ERRORS,
+    DIR_LOGS,
+    NEED_LOGS,
+    LOG_FORMAT,
+    USE_HTTP_CACHE,
+    USE_GAME_URL_CACHE,
+    HTTP_CACHE_TTL,
+)
+from get_game_genres.db import GameUrl
+from get_game_genres.log_backend import get_logger
+from get_game_genres.parsers.cassette import Cassette
+from get_game_genres.parsers.circuit_breaker import CircuitBreaker
+from get_game_genres.parsers.error_spool import get_error_spool
+from get_game_genres.parsers.http_cache import (
+    CacheEntry,
+    HttpCache,
+    get_cache_key,
+    get_http_cache,
+)
+from get_game_genres.parsers.lookup_context import LookupContext
+from get_game_genres.parsers.rate_limiter import RateLimiter
+from get_game_genres.parsers.streaming import ResponseTooLargeError, read_until
 from get_game_genres.parsers.third_party import dump
-from get_game_genres.third_party.get_valid_filename import get_valid_filename
-from get_game_genres.third_party.smart_comparing_names import smart_comparing_names
+from get_game_genres.parsers.transport import (
+    LatencyTracker,
+    SessionPool,
+    is_timeout_error,
+)
+
+
+# lxml заметно быстрее встроенного html.parser, но это необязательная зависимость:
+# pip install lxml
+try:
+    import lxml
+
+    HTML_PARSER: str = "lxml"
+except ImportError:
+    HTML_PARSER: str = "html.parser"
+
+
+# Сколько текста ответа с ошибкой выводить в лог
+MAX_LOG_TEXT_SIZE: int = 1000
+
+
+def get_declared_charset(rs: requests.Response) -> str | None:
+    # Только явно указанная в Content-Type кодировка, без кодировки по умолчанию,
+    # которую requests подставляет для text/*
+    content_type: str = rs.headers.get("Content-Type", "")
+    match = re.search(r"charset=[\"']?([\w.:-]+)", content_type, flags=re.IGNORECASE)
+    return match.group(1) if match else None
+
+
+def get_page_title(rs: requests.Response) -> str:
+    # Заголовок страницы без разбора всего HTML
+    match = re.search(rb"<title[^>]*>(.*?)</title>", rs.content, flags=re.S | re.I)
+    if not match:
+        return ""
+
+    title: str = match.group(1).decode(rs.encoding or "utf-8", errors="replace")
+    return html.unescape(title).strip()
+
+
+def clear_name(name: str) -> str:
+    # Как в smart_comparing_names: нижний регистр и только буквы, цифры и _
+    return re.sub(r"\W", "", name.lower())
+
+
+def get_class_strainer(class_name: str, name: str | None = None) -> SoupStrainer:
+    # При разборе SoupStrainer сравнивает class целиком ("a b"), а не по
+    # отдельным классам, поэтому класс ищется регуляркой
+    return SoupStrainer(
+        name, class_=re.compile(rf"(^|\s){re.escape(class_name)}(\s|$)")
+    )
 
 
 class Singleton(ABCMeta):
@@ -37,20 +108,63 @@ class Singleton(ABCMeta):
 class BaseParser(metaclass=Singleton):
     _site_name = ""
 
+    # Сколько игр сайта может обрабатываться одновременно асинхронным движком
+    max_concurrency: int = 1
+
+    # Сколько секунд ответы сайта берутся из кэша без обращения к сайту
+    cache_ttl: int = HTTP_CACHE_TTL
+
+    # Частота запросов к сайту (запросов в секунду) и ее пределы, в которых
+    # она подстраивается под ответы сайта, см. RateLimiter
+    rate_limit: float = 0.5
+    rate_limit_burst: int = 2
+    rate_limit_min: float = 0.05
+    rate_limit_max: float = 1.0
+
+    # Сколько ошибок сети подряд выключают запросы к сайту и на сколько секунд,
+    # см. CircuitBreaker
+    circuit_failure_threshold: int = 5
+    circuit_reset_timeout: float = 10 * 60
+
     def __init__(
         self,
         need_logs: bool = NEED_LOGS,
         dir_errors: Path = DIR_ERRORS,
         dir_logs: Path = DIR_LOGS,
         log_format: str = LOG_FORMAT,
+        use_http_cache: bool = USE_HTTP_CACHE,
+        use_game_url_cache: bool = USE_GAME_URL_CACHE,
     ) -> None:
-        self.session = requests.session()
-        self.session.headers["User-Agent"] = USER_AGENT
+        # Сессии с пулом подключений и повтором запросов при сбоях сети, по одной
+        # на каждый одновременный поиск. Таймауты подстраиваются под время
+        # ответа сайта
+        self.session_pool = SessionPool(max_size=self.max_concurrency)
+        self.latency = LatencyTracker()
+
+        self._http_cache: HttpCache | None = (
+            get_http_cache() if use_http_cache else None
+        )
+
+        self.rate_limiter = RateLimiter(
+            rate=self.rate_limit,
+            burst=self.rate_limit_burst,
+            min_rate=self.rate_limit_min,
+            max_rate=self.rate_limit_max,
+        )
+        self.circuit_breaker = CircuitBreaker(
+            name=self.get_site_name(),
+            failure_threshold=self.circuit_failure_threshold,
+            reset_timeout=self.circuit_reset_timeout,
+        )
+
+        self._use_game_url_cache = use_game_url_cache
 
         self._dir_errors = dir_errors
         self._dir_logs = dir_logs
 
-        self.game_name = ""
+        # Если задана, то ответы записываются в кассету или берутся из нее
+        self.cassette: Cassette | None = None
+
         self._need_logs = need_logs
 
         self._log = self._get_logger(log_format)
@@ -60,8 +174,19 @@ class BaseParser(metaclass=Singleton):
         return cls(*args, **kwargs)
 
     @classmethod
-    def parse_html(cls, data: str | bytes) -> BeautifulSoup:
-        return BeautifulSoup(data, "html.parser")
+    def parse_html(
+        cls,
+        data: str | bytes,
+        parse_only: SoupStrainer | None = None,
+        from_encoding: str | None = None,
+    ) -> BeautifulSoup:
+        # С parse_only в дерево попадают только нужные парсеру элементы
+        return BeautifulSoup(
+            data,
+            HTML_PARSER,
+            parse_only=parse_only,
+            from_encoding=from_encoding,
+        )
 
     @classmethod
     def process_response(
@@ -69,73 +194,177 @@ class BaseParser(metaclass=Singleton):
         rs: requests.Response,
         return_html: bool = False,
         return_json: bool = False,
+        parse_only: SoupStrainer | None = None,
     ) -> BeautifulSoup | requests.Response | dict | list:
         if return_html:
-            return cls.parse_html(rs.content)
+            # Если сайт указал кодировку, то bs4 не нужно ее определять
+            return cls.parse_html(
+                rs.content,
+                parse_only=parse_only,
+                from_encoding=get_declared_charset(rs),
+            )
 
         if return_json:
             return rs.json()
 
         return rs
 
-    @staticmethod
-    def _process_session_kwargs(kwargs: dict[str, Any]) -> None:
-        kwargs.setdefault("timeout", 60)
+    def _process_session_kwargs(self, kwargs: dict[str, Any]) -> None:
+        kwargs.setdefault("timeout", self.latency.get_timeout())
 
-    def send_get(
+    def _request(
         self,
+        ctx: LookupContext,
+        method: str,
         url: str,
-        return_html: bool = False,
-        return_json: bool = False,
+        stream_until: str | None = None,
         **kwargs,
-    ) -> requests.Response | BeautifulSoup | dict | list:
+    ) -> requests.Response:
+        # Запрос к сайту с учетом ограничения частоты запросов.
+        # Если сайт недоступен, то выбрасывается CircuitOpenError без запроса
+        self.circuit_breaker.check()
+
+        waited: float = self.rate_limiter.acquire()
+        if waited >= 1:
+            self.log_debug("Ожидание перед запросом: %.1f сек.", waited)
+
+        if stream_until:
+            kwargs["stream"] = True
+
+        try:
+            rs = ctx.session.request(method, url, **kwargs)
+        except Exception as e:
+            if is_timeout_error(e):
+                self.latency.on_timeout()
+
+            self.rate_limiter.on_throttle()
+            self.circuit_breaker.on_failure()
+            raise
+
+        self.rate_limiter.on_response(rs)
+        self.latency.add(rs.elapsed.total_seconds())
+
+        if rs.status_code >= 500:
+            self.circuit_breaker.on_failure()
+        else:
+            self.circuit_breaker.on_success()
+
+        if stream_until:
+            # Если страница слишком большая, то выбрасывается ResponseTooLargeError,
+            # но сайт доступен и выключатель уже закрыт
+            try:
+                if read_until(rs, stream_until, encoding=get_declared_charset(rs)):
+                    self.log_debug(
+                        "Прочитано %d байт до %r: %s", len(rs.content), stream_until, url
+                    )
+            except ResponseTooLargeError:
+                raise
+            except Exception:
+                # Обрыв подключения при чтении ответа
+                self.rate_limiter.on_throttle()
+                self.circuit_breaker.on_failure()
+                raise
+
+        return rs
+
+    def _fetch(
+        self,
+        ctx: LookupContext,
+        method: str,
+        url: str,
+        use_cache: bool = True,
+        stream_until: str | None = None,
+        **kwargs,
+    ) -> requests.Response:
+        # Получение ответа: из кассеты, из кэша или от сайта.
+        # С stream_until от сайта читается только начало ответа до этого элемента,
+        # оно же сохраняется в кэш
         self._process_session_kwargs(kwargs)
 
-        rs = self.session.get(url, **kwargs)
-        self._on_check_response(rs)
-        return self.process_response(
-            rs, return_html=return_html, return_json=return_json
+        request = requests.Request(
+            method,
+            url,
+            params=kwargs.get("params"),
+            data=kwargs.get("data"),
+            json=kwargs.get("json"),
+        ).prepare()
+        key: str = get_cache_key(request, stream_until)
+
+        cassette: Cassette | None = self.cassette
+        if cassette is not None and cassette.is_replay():
+            rs = cassette.get_response(key, request)
+            self._on_check_response(ctx, rs)
+            return rs
+
+        # При записи кассеты нужны настоящие ответы сайта
+        http_cache: HttpCache | None = (
+            self._http_cache if use_cache and cassette is None else None
         )
+        entry: CacheEntry | None = http_cache.get(key) if http_cache else None
+        if entry and not entry.is_expired(self.cache_ttl):
+            self.log_debug("Ответ из кэша: %s %s", method, request.url)
+            return entry.to_response(request)
+
+        # Устаревший ответ можно подтвердить у сайта, не скачивая его заново
+        if entry and entry.can_revalidate():
+            headers = dict(kwargs.get("headers") or dict())
+            headers.update(entry.get_revalidate_headers())
+            kwargs["headers"] = headers
+
+        rs = self._request(ctx, method, url, stream_until=stream_until, **kwargs)
+        if entry and rs.status_code == 304:
+            self.log_debug("Ответ в кэше не изменился: %s %s", method, request.url)
+            http_cache.touch(key)
+            rs = entry.to_response(request)
+
+        elif http_cache and rs.status_code == 200:
+            http_cache.put(key, rs)
+
+        if cassette is not None:
+            cassette.add(key, rs)
+
+        self._on_check_response(ctx, rs)
+        return rs
 
-    def send_post(
+    def _send(
         self,
+        ctx: LookupContext,
+        method: str,
         url: str,
-        data=None,
-        json=None,
         return_html: bool = False,
         return_json: bool = False,
+        use_cache: bool = True,
+        parse_only: SoupStrainer | None = None,
         **kwargs,
-    ) -> requests.Response | BeautifulSoup:
-        self._process_session_kwargs(kwargs)
-
-        rs = self.session.post(url, data=data, json=json, **kwargs)
-        self._on_check_response(rs)
+    ) -> requests.Response | BeautifulSoup | dict | list:
+        rs = self._fetch(ctx, method, url, use_cache=use_cache, **kwargs)
         return self.process_response(
-            rs, return_html=return_html, return_json=return_json
+            rs,
+            return_html=return_html,
+            return_json=return_json,
+            parse_only=parse_only,
         )
 
-    def _save_error_response(self, rs: requests.Response) -> None:
-        self._dir_errors.mkdir(parents=True, exist_ok=True)
-
-        safe_name = get_valid_filename(self.game_name)
-        file_name = (
-            self._dir_errors
-            / f"{self.get_site_name()}_{safe_name}_{get_current_datetime_str()}.dump"
-        )
-        self.log_debug(f"Сохранение дампа в {file_name}")
+    def _save_error_response(self, ctx: LookupContext, rs: requests.Response) -> None:
+        # Дамп пишется в фоне, сжатым, без повторов одинаковых ошибок
+        get_error_spool(self._dir_errors).add(self.get_site_name(), ctx.game_name, rs)
 
-        data = dump.dump_all(rs, request_prefix=b"> ", response_prefix=b"< ")
-        with open(file_name, "wb") as f:
-            f.write(data)
-
-    def _on_check_response(self, rs: requests.Response) -> None:
+    def _on_check_response(self, ctx: LookupContext, rs: requests.Response) -> None:
         if rs.ok:
             return
 
+        # Во время сбоя сайта ответы с ошибками бывают большими страницами
+        text: str = rs.text
+        if len(text) > MAX_LOG_TEXT_SIZE:
+            text = text[:MAX_LOG_TEXT_SIZE] + "..."
+
         self.log_warn(
-            f"Случилось что-то плохое...: статус HTTP: {rs.status_code}\n{rs.text}"
+            "Случилось что-то плохое...: статус HTTP: %s\n%s", rs.status_code, text
         )
-        self._save_error_response(rs)
+
+        # У ответов из кэша и кассет нет исходного ответа сервера для дампа
+        if rs.raw is not None:
+            self._save_error_response(ctx, rs)
 
     def log_debug(self, msg, *args, **kwargs) -> None:
         self._need_logs and self._log.debug(msg, *args, **kwargs)
@@ -161,57 +390,59 @@ class BaseParser(metaclass=Singleton):
         return cls._site_name
 
     @abstractmethod
-    def _parse(self) -> list[str]:
+    def _parse(self, ctx: LookupContext) -> list[str]:
         pass
 
-    def is_found_game(self, game_name: str) -> bool:
-        return smart_comparing_names(self.game_name, game_name)
-
-    def get_game_genres(self, game_name: str) -> list[str]:
-        self.game_name = game_name
-        self.log_info(f"Поиск {game_name!r}...")
+    def _is_game_url_cache_enabled(self) -> bool:
+        # При записи и воспроизведении кассет запросы должны быть всегда одни и те же
+        return self._use_game_url_cache and self.cassette is None
 
-        try:
-            genres = self._parse()
-            genres = [process_umlauts(x.strip()) for x in genres if x]
-            genres = get_uniques(genres)
-            genres.sort()
-
-        except SystemExit as e:
-            raise e
-
-        except BaseException as e:
-            self.log_exception("Ошибка при парсинге:")
-            raise e
+    def _on_session_created(self, ctx: LookupContext) -> None:
+        # Подготовка новой сессии перед первым поиском, например получение кук сайта
+        pass
 
-        self.log_info(f"Жанры: {genres}")
+    @classmethod
+    def normalize_genres(cls, genres: list[str]) -> list[str]:
+        genres = [process_umlauts(x.strip()) for x in genres if x]
+        genres = get_uniques(genres)
+        genres.sort()
         return genres
 
-    def _get_logger(self, log_format: str, encoding: str = "utf-8"):
-        dir_logs = self._dir_logs / "parsers"
-        dir_logs.mkdir(parents=True, exist_ok=True)
+    def get_game_genres(self, game_name: str) -> list[str]:
+        self.log_info("Поиск %r...", game_name)
 
-        site = self.get_site_name()
+        # Одновременных поисков не больше, чем сессий в пуле
+        with self.session_pool.session() as (session, is_new):
+            ctx = LookupContext(self, game_name, session)
+            try:
+                if is_new:
+                    self._on_session_created(ctx)
 
-        name = "parser_" + site
-        file = dir_logs / (site + ".txt")
+                genres = self.normalize_genres(self._parse(ctx))
 
-        log = logging.getLogger(name)
-        log.setLevel(logging.DEBUG)
+            except SystemExit as e:
+                raise e
 
-        formatter = logging.Formatter(log_format)
+            except BaseException as e:
+                self.log_exception("Ошибка при парсинге %r:", game_name)
+                raise e
 
-        fh = RotatingFileHandler(
-            file, maxBytes=10_000_000, backupCount=5, encoding=encoding
-        )
-        fh.setFormatter(formatter)
-        log.addHandler(fh)
+        self.log_info("Жанры %r: %s", game_name, genres)
+        return genres
 
-        sh = logging.StreamHandler(stream=sys.stdout)
-        sh.setFormatter(formatter)
-        log.addHandler(sh)
+    async def async_get_game_genres(self, game_name: str) -> list[str]:
+        # Адаптер для асинхронного движка: синхронный _parse парсеров выполняется
+        # целиком в отдельном потоке
+        return await asyncio.to_thread(self.get_game_genres, game_name)
 
-        return log
+    def _get_logger(self, log_format: str, encoding: str = "utf-8") -> logging.Logger:
+        site = self.get_site_name()
+        return get_logger(
+            name="parser_" + site,
+            file_name=self._dir_logs / "parsers" / (site + ".txt"),
+            log_format=log_format,
+            encoding=encoding,
+        )
 
     @classmethod
     def get_norm_text(cls, node) -> str:
@@ -228,6 +459,94 @@ class BaseParser(metaclass=Singleton):
         return unicodedata.normalize("NFKD", text)
 
 
+# Парсер сайта, у которого жанры есть на странице игры: игра ищется на сайте
+# (_iter_game_urls), жанры берутся с ее страницы (_parse_game_page). Адрес
+# найденной страницы запоминается, и при следующих поисках игры запрос к
+# поиску сайта не нужен
+class GamePageParser(BaseParser):
+    # Из страницы игры нужны только эти элементы, см. _parse_game_page
+    STRAINER_GAME: SoupStrainer | None = None
+
+    # Если задан, то страница игры скачивается только до конца этого элемента
+    # (простой селектор: "tag", ".class", "#id"), см. streaming.read_until
+    STREAM_UNTIL_GAME: str | None = None
+
+    @abstractmethod
+    def _iter_game_urls(self, ctx: LookupContext) -> Iterator[str]:
+        # Поиск игры на сайте: адреса страниц игр, совпадающих по имени
+        pass
+
+    @abstractmethod
+    def _parse_game_page(
+        self, ctx: LookupContext, root: BeautifulSoup
+    ) -> list[str] | None:
+        # Жанры со страницы игры или None, если на странице нет нужных данных
+        pass
+
+    def _get_game_page(self, ctx: LookupContext, url: str) -> requests.Response | None:
+        # None, если страницы больше нет. Остальные ошибки (ограничение запросов,
+        # капча, ошибки сервера) не значат, что адрес устарел, поэтому для них
+        # выбрасывается исключение и запрос повторяется позже
+        rs = ctx.send_get(url, stream_until=self.STREAM_UNTIL_GAME)
+        if rs.status_code in (404, 410):
+            return None
+
+        rs.raise_for_status()
+        return rs
+
+    def _is_game_page(self, ctx: LookupContext, rs: requests.Response) -> bool:
+        # Страница игры, если в ее заголовке есть название игры. Заголовок обычно
+        # содержит еще и название сайта, поэтому ищется вхождение
+        return clear_name(ctx.game_name) in clear_name(get_page_title(rs))
+
+    def _get_game_root(self, rs: requests.Response) -> BeautifulSoup:
+        return self.process_response(
+            rs, return_html=True, parse_only=self.STRAINER_GAME
+        )
+
+    def _parse(self, ctx: LookupContext) -> list[str]:
+        site: str = self.get_site_name()
+        use_game_url_cache: bool = self._is_game_url_cache_enabled()
+
+        # Если адрес страницы игры уже известен, то поиск на сайте не нужен
+        url: str | None = (
+            GameUrl.get_url(site, ctx.game_name) if use_game_url_cache else None
+        )
+        if url:
+            self.log_info("Load saved %r", url)
+            rs = self._get_game_page(ctx, url)
+            if rs is not None and self._is_game_page(ctx, rs):
+                genres = self._parse_game_page(ctx, self._get_game_root(rs))
+                if genres is not None:
+                    return genres
+
+            # Адрес устарел: страницы больше нет, на ней другая игра или
+            # у страницы теперь другая разметка
+            self.log_info("Адрес %r устарел, поиск игры заново", url)
+            GameUrl.delete_url(site, ctx.game_name)
+
+        for url in self._iter_game_urls(ctx):
+            self.log_info("Load %r", url)
+            rs = self._get_game_page(ctx, url)
+            if rs is None:
+                continue
+
+            genres = self._parse_game_page(ctx, self._get_game_root(rs))
+            if genres is None:
+                continue
+
+            # Сохраняются только адреса, которые пройдут проверку при обновлении,
+            # иначе каждое обновление будет тратить лишний запрос
+            if use_game_url_cache and self._is_game_page(ctx, rs):
+                GameUrl.set_url(site, ctx.game_name, url)
+
+            # Сойдет первый, совпадающий по имени, вариант
+            return genres
+
+        self.log_info("Not found game %r", ctx.game_name)
+        return []
+
+
 if __name__ == "__main__":
     from get_game_genres.parsers import get_parsers
 
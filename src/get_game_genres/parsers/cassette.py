@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+import base64
+import gzip
+import json
+import threading
+import time
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator
+
+import requests
+
+from get_game_genres.config import DIR_CASSETTES
+from get_game_genres.parsers.http_cache import CacheEntry, get_saved_headers
+
+if TYPE_CHECKING:
+    from get_game_genres.parsers.base_parser import BaseParser
+
+
+MODE_RECORD: str = "record"
+MODE_REPLAY: str = "replay"
+
+
+class CassetteMissError(Exception):
+    def __init__(self, file_name: Path, request: requests.PreparedRequest) -> None:
+        self.file_name = file_name
+        self.request = request
+
+        super().__init__(
+            f"В кассете {str(file_name)!r} нет ответа на {request.method} {request.url}"
+        )
+
+
+# Кассета с ответами сайта: в режиме record ответы сайта сохраняются, а в режиме
+# replay выдаются из кассеты без обращения к сети. Ключ ответа тот же, что у
+# кэша ответов: метод, адрес с параметрами, тело запроса и stream_until.
+# Файл - JSON, сжатый gzip, по одному на сайт
+class Cassette:
+    def __init__(self, file_name: Path | str, mode: str = MODE_REPLAY) -> None:
+        if mode not in (MODE_RECORD, MODE_REPLAY):
+            raise ValueError(f"Неизвестный режим кассеты: {mode!r}")
+
+        self.file_name = Path(file_name)
+        self.mode = mode
+
+        self._lock = threading.Lock()
+        self._items: dict[str, dict] = dict()
+
+        if self.file_name.exists():
+            self.load()
+        elif mode == MODE_REPLAY:
+            raise FileNotFoundError(f"Кассета не найдена: {str(self.file_name)!r}")
+
+    @classmethod
+    def get_file_name(cls, site_name: str, dir_name: Path = DIR_CASSETTES) -> Path:
+        return dir_name / f"{site_name}.json.gz"
+
+    def is_replay(self) -> bool:
+        return self.mode == MODE_REPLAY
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+    def load(self) -> None:
+        with gzip.open(self.file_name, "rt", encoding="utf-8") as f:
+            data: dict = json.load(f)
+
+        with self._lock:
+            self._items = data["items"]
+
+    def save(self) -> None:
+        self.file_name.parent.mkdir(parents=True, exist_ok=True)
+
+        with self._lock:
+            data = dict(items=self._items)
+
+        # Ключи отсортированы, чтобы перезапись кассеты давала минимальный дифф
+        with gzip.open(self.file_name, "wt", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+
+    def add(self, key: str, rs: requests.Response) -> None:
+        item = dict(
+            method=rs.request.method if rs.request else "",
+            url=rs.url,
+            status_code=rs.status_code,
+            headers=get_saved_headers(rs),
+            content=base64.b64encode(rs.content).decode("ascii"),
+        )
+        with self._lock:
+            self._items[key] = item
+
+    def get_response(
+        self, key: str, request: requests.PreparedRequest
+    ) -> requests.Response:
+        with self._lock:
+            item: dict | None = self._items.get(key)
+
+        if not item:
+            raise CassetteMissError(self.file_name, request)
+
+        entry = CacheEntry(
+            key=key,
+            url=item["url"],
+            status_code=item["status_code"],
+            headers=item["headers"],
+            content=base64.b64decode(item["content"]),
+            created_at=time.time(),
+        )
+        return entry.to_response(request)
+
+
+@contextmanager
+def use_cassette(
+    parser: "BaseParser",
+    mode: str = MODE_REPLAY,
+    file_name: Path | str | None = None,
+) -> Iterator[Cassette]:
+    # Подключение кассеты к парсеру на время блока with, записанная кассета
+    # сохраняется при выходе из блока
+    if file_name is None:
+        file_name = Cassette.get_file_name(parser.get_site_name())
+
+    cassette = Cassette(file_name, mode)
+
+    prev_cassette: Cassette | None = parser.cassette
+    parser.cassette = cassette
+    try:
+        yield cassette
+    finally:
+        parser.cassette = prev_cassette
+
+        if mode == MODE_RECORD:
+            cassette.save()
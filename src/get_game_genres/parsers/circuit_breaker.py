@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+import threading
+import time
+
+
+STATE_CLOSED: str = "closed"
+STATE_OPEN: str = "open"
+STATE_HALF_OPEN: str = "half_open"
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, name: str, retry_after: float) -> None:
+        self.name = name
+        self.retry_after = retry_after
+
+        super().__init__(
+            f"Запросы к {name!r} приостановлены после ошибок, "
+            f"следующая проверка через {retry_after:.0f} сек."
+        )
+
+
+# Автоматический выключатель запросов к сайту.
+# После failure_threshold ошибок подряд запросы не отправляются reset_timeout
+# секунд (состояние open), затем пропускается один пробный запрос (half_open):
+# если он успешен, то запросы возобновляются, иначе пауза удваивается, но не
+# больше max_reset_timeout
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 10 * 60,
+        max_reset_timeout: float = 6 * 60 * 60,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+
+        self._lock = threading.Lock()
+        self.state: str = STATE_CLOSED
+        self.failures: int = 0
+        self._current_reset_timeout: float = reset_timeout
+        self._open_until: float = 0.0
+        self._probe_in_flight: bool = False
+
+    def get_retry_after(self) -> float:
+        with self._lock:
+            if self.state == STATE_CLOSED:
+                return 0.0
+            return max(self._open_until - time.monotonic(), 0.0)
+
+    def is_open(self) -> bool:
+        # Запросы запрещены и время пробного запроса еще не пришло
+        with self._lock:
+            if self.state == STATE_CLOSED:
+                return False
+            if self.state == STATE_HALF_OPEN:
+                return self._probe_in_flight
+            return time.monotonic() < self._open_until
+
+    def check(self) -> None:
+        # Вызывается перед запросом, выбрасывает CircuitOpenError, если его нельзя делать
+        with self._lock:
+            if self.state == STATE_CLOSED:
+                return
+
+            now: float = time.monotonic()
+            if self.state == STATE_OPEN and now >= self._open_until:
+                self.state = STATE_HALF_OPEN
+                self._probe_in_flight = False
+
+            if self.state == STATE_HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+
+            retry_after: float = max(self._open_until - now, 0.0)
+
+        raise CircuitOpenError(self.name, retry_after)
+
+    def on_success(self) -> None:
+        with self._lock:
+            self.state = STATE_CLOSED
+            self.failures = 0
+            self._current_reset_timeout = self.reset_timeout
+            self._probe_in_flight = False
+
+    def on_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+
+            if self.state == STATE_HALF_OPEN:
+                # Пробный запрос не прошел - ждем дольше
+                self._current_reset_timeout = min(
+                    self._current_reset_timeout * 2, self.max_reset_timeout
+                )
+            elif self.state == STATE_CLOSED and self.failures < self.failure_threshold:
+                return
+
+            self.state = STATE_OPEN
+            self._open_until = time.monotonic() + self._current_reset_timeout
+            self._probe_in_flight = False
+
+    def __str__(self) -> str:
+        text = f"{self.__class__.__name__}({self.name!r}, {self.state}"
+        if self.state != STATE_CLOSED:
+            text += (
+                f", ошибок: {self.failures}, "
+                f"проверка через {self.get_retry_after():.0f} сек."
+            )
+        return text + ")"
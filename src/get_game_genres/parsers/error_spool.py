@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+import atexit
+import gzip
+import hashlib
+import queue
+import threading
+import time
+
+from collections import Counter
+from pathlib import Path
+
+import requests
+
+from get_game_genres.common import get_current_datetime_str
+from get_game_genres.config import (
+    DIR_ERRORS,
+    ERROR_SPOOL_MAX_AGE,
+    ERROR_SPOOL_MAX_SIZE,
+    ERROR_SPOOL_QUEUE_SIZE,
+    ERROR_SPOOL_SAMPLE_AFTER,
+    ERROR_SPOOL_SAMPLE_EVERY,
+)
+from get_game_genres.parsers.third_party import dump
+from get_game_genres.third_party.get_valid_filename import get_valid_filename
+
+
+DUMP_SUFFIX: str = ".dump.gz"
+
+# Сколько ключей сохраненных дампов помнить для отсеивания одинаковых ошибок
+MAX_KEYS: int = 10_000
+
+# Через сколько сохраненных дампов проверять папку целиком (для удаления
+# старых дампов), если ее размер не превышен
+PRUNE_EVERY: int = 100
+
+
+def get_dump_key(site: str, rs: requests.Response) -> str:
+    # Одинаковые ошибки: тот же адрес, статус и содержимое ответа
+    data = b"\n".join(
+        [site.encode("utf-8"), str(rs.status_code).encode(), rs.url.encode("utf-8")]
+    )
+    return hashlib.sha1(data + b"\n" + rs.content).hexdigest()
+
+
+# Дампы ответов с ошибками, записываемые в фоновом потоке в сжатом виде.
+# Одинаковые ошибки сохраняются один раз, из повторяющихся ошибок сайта (тот же
+# статус) после первых sample_after сохраняется только каждая sample_every.
+# Общий размер и возраст дампов в папке ограничены
+class ErrorSpool:
+    def __init__(
+        self,
+        dir_errors: Path = DIR_ERRORS,
+        max_size: int = ERROR_SPOOL_MAX_SIZE,
+        max_age: int = ERROR_SPOOL_MAX_AGE,
+        sample_after: int = ERROR_SPOOL_SAMPLE_AFTER,
+        sample_every: int = ERROR_SPOOL_SAMPLE_EVERY,
+        queue_size: int = ERROR_SPOOL_QUEUE_SIZE,
+    ) -> None:
+        self.dir_errors = dir_errors
+        self.max_size = max_size
+        self.max_age = max_age
+        self.sample_after = sample_after
+        self.sample_every = sample_every
+
+        self._lock = threading.Lock()
+        self._prune_lock = threading.Lock()
+        self._keys: set[str] = set()
+        self._counts: Counter = Counter()
+
+        # Размер дампов в папке. Считается при проверке папки, а между
+        # проверками увеличивается на размер новых дампов
+        self._total_size: int | None = None
+        self._saves_since_prune: int = 0
+
+        self.saved: int = 0
+        self.skipped: int = 0
+        self.dropped: int = 0
+
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(
+            target=self._run, name="error_spool", daemon=True
+        )
+        self._thread.start()
+
+    def _need_save(self, site: str, rs: requests.Response) -> str | None:
+        # Ключ дампа, если его нужно сохранить
+        key: str = get_dump_key(site, rs)
+
+        with self._lock:
+            if key in self._keys:
+                self.skipped += 1
+                return None
+
+            if len(self._keys) >= MAX_KEYS:
+                self._keys.clear()
+            self._keys.add(key)
+
+            self._counts[site, rs.status_code] += 1
+            number: int = self._counts[site, rs.status_code]
+            if (
+                number > self.sample_after
+                and (number - self.sample_after) % self.sample_every != 0
+            ):
+                self.skipped += 1
+                return None
+
+        return key
+
+    def add(self, site: str, game_name: str, rs: requests.Response) -> None:
+        key: str | None = self._need_save(site, rs)
+        if not key:
+            return
+
+        # Если дампы не успевают записываться, то лишние теряются, но поиск
+        # игр не ждет диска
+        try:
+            self._queue.put_nowait((site, game_name, rs, key))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def _run(self) -> None:
+        try:
+            self.prune()
+        except Exception:
+            pass
+
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+
+                self._save(*item)
+                if self._need_prune():
+                    self.prune()
+
+            except Exception:
+                # Ошибки записи дампов не должны останавливать поток
+                pass
+
+            finally:
+                self._queue.task_done()
+
+    def _save(
+        self,
+        site: str,
+        game_name: str,
+        rs: requests.Response,
+        key: str,
+    ) -> Path:
+        self.dir_errors.mkdir(parents=True, exist_ok=True)
+
+        safe_name = get_valid_filename(game_name)
+        file_name = self.dir_errors / (
+            f"{site}_{safe_name}_{get_current_datetime_str()}_{key[:8]}{DUMP_SUFFIX}"
+        )
+
+        data = dump.dump_all(rs, request_prefix=b"> ", response_prefix=b"< ")
+        with gzip.open(file_name, "wb") as f:
+            f.write(data)
+
+        size: int = file_name.stat().st_size
+        with self._lock:
+            self.saved += 1
+            self._saves_since_prune += 1
+            if self._total_size is not None:
+                self._total_size += size
+
+        return file_name
+
+    def _need_prune(self) -> bool:
+        # Папка проверяется целиком, только если размер превышен или давно
+        # не проверялась, а не после каждого дампа
+        with self._lock:
+            return (
+                self._total_size is None
+                or self._total_size > self.max_size
+                or self._saves_since_prune >= PRUNE_EVERY
+            )
+
+    def prune(self) -> list[Path]:
+        # Удаление старых дампов, а потом самых давних, пока не влезет в max_size
+        if not self.dir_errors.exists():
+            with self._lock:
+                self._total_size = 0
+            return []
+
+        with self._prune_lock:
+            items: list[tuple[float, int, Path]] = []
+            for file_name in self.dir_errors.glob(f"*{DUMP_SUFFIX}"):
+                stat = file_name.stat()
+                items.append((stat.st_mtime, stat.st_size, file_name))
+            items.sort()
+
+            removed: list[Path] = []
+            min_mtime: float = time.time() - self.max_age
+            total_size: int = sum(size for _, size, _ in items)
+            for mtime, size, file_name in items:
+                if mtime >= min_mtime and total_size <= self.max_size:
+                    break
+
+                file_name.unlink(missing_ok=True)
+                total_size -= size
+                removed.append(file_name)
+
+            with self._lock:
+                self._total_size = total_size
+                self._saves_since_prune = 0
+
+            return removed
+
+    def flush(self) -> None:
+        # Ожидание записи всех дампов из очереди
+        self._queue.join()
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def __str__(self) -> str:
+        return (
+            f"сохранено: {self.saved}, пропущено повторов: {self.skipped}, "
+            f"потеряно при переполнении: {self.dropped}"
+        )
+
+
+_error_spools: dict[Path, ErrorSpool] = dict()
+_error_spools_lock = threading.Lock()
+
+
+def get_error_spool(dir_errors: Path = DIR_ERRORS) -> ErrorSpool:
+    # Один поток записи на папку для всех парсеров
+    with _error_spools_lock:
+        if dir_errors not in _error_spools:
+            _error_spools[dir_errors] = ErrorSpool(dir_errors)
+        return _error_spools[dir_errors]
+
+
+@atexit.register
+def close_error_spools() -> None:
+    with _error_spools_lock:
+        for error_spool in _error_spools.values():
+            error_spool.close()
+        _error_spools.clear()
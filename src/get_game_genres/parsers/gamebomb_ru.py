@@ -4,14 +4,19 @@
 __author__ = "ipetrash"
 
 
+from typing import Iterator
 from urllib.parse import urljoin
-from get_game_genres.parsers.base_parser import BaseParser
 
+from bs4 import BeautifulSoup
 
-class GamebombRuParser(BaseParser):
+from get_game_genres.parsers.base_parser import GamePageParser
+from get_game_genres.parsers.lookup_context import LookupContext
+
+
+class GamebombRuParser(GamePageParser):
     base_url = "https://gamebomb.ru"
 
-    def _parse(self) -> list[str]:
+    def _iter_game_urls(self, ctx: LookupContext) -> Iterator[str]:
         headers = {
             "X-Requested-With": "XMLHttpRequest",
             "Origin": self.base_url,
@@ -19,55 +24,49 @@ class GamebombRuParser(BaseParser):
             "Accept": "application/json",
         }
         data = {
-            "query": self.game_name,
+            "query": ctx.game_name,
             "type": "",
         }
 
         url = f"{self.base_url}/base/ajaxSearch"
-        rs = self.send_post(url, data=data, headers=headers)
+        rs = ctx.send_post(url, data=data, headers=headers)
 
         for game_block_preview in rs.json():
             if game_block_preview["type"] != "игра":
                 continue
 
             title = game_block_preview["title"]
-            if not self.is_found_game(title):
-                continue
-
-            url_game = urljoin(rs.url, game_block_preview["url"])
-            self.log_info(f"Load {url_game!r}")
-
-            game_block = self.send_get(url_game, return_html=True)
-
-            # <tr>
-            #     <td valign="top">Жанры</td>
-            #     <td>
-            #         <div>
-            #             <input type="hidden" class="edit hidden" name="genres[18]" value="0">
-            #             <input type="checkbox" checked="checked" class="edit hidden" name="genres[18]" value="1">
-            #             Шутер от первого лица
-            #         </div>
-            #         <div>
-            #             <input type="hidden" class="edit hidden" name="genres[2]" value="0">
-            #             <input type="checkbox" checked="checked" class="edit hidden" name="genres[2]" value="1">
-            #             Боевик-приключения
-            #         </div>
-            game_block = game_block.find("td", text="Жанры")
-            if not game_block:
+            if ctx.is_found_game(title):
+                yield urljoin(rs.url, game_block_preview["url"])
+
+    def _parse_game_page(
+        self, ctx: LookupContext, root: BeautifulSoup
+    ) -> list[str] | None:
+        # <tr>
+        #     <td valign="top">Жанры</td>
+        #     <td>
+        #         <div>
+        #             <input type="hidden" class="edit hidden" name="genres[18]" value="0">
+        #             <input type="checkbox" checked="checked" class="edit hidden" name="genres[18]" value="1">
+        #             Шутер от первого лица
+        #         </div>
+        #         <div>
+        #             <input type="hidden" class="edit hidden" name="genres[2]" value="0">
+        #             <input type="checkbox" checked="checked" class="edit hidden" name="genres[2]" value="1">
+        #             Боевик-приключения
+        #         </div>
+        game_block = root.find("td", text="Жанры")
+        if not game_block:
+            return None
+
+        genres = []
+        for div in game_block.find_next_sibling("td").find_all("div"):
+            if not div.select('input[name*="genres"]'):
                 continue
 
-            genres = []
-            for div in game_block.find_next_sibling("td").find_all("div"):
-                if not div.select('input[name*="genres"]'):
-                    continue
-
-                genres.append(self.get_norm_text(div))
-
-            # Сойдет первый, совпадающий по имени, вариант
-            return genres
+            genres.append(self.get_norm_text(div))
 
-        self.log_info(f"Not found game {self.game_name!r}")
-        return []
+        return genres
 
 
 def get_game_genres(game_name: str, *args, **kwargs) -> list[str]:
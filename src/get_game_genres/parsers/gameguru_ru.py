@@ -5,12 +5,38 @@ __author__ = "ipetrash"
 
 
 import re
+
+from bs4 import BeautifulSoup, Tag
+
+from get_game_genres.db import GameUrl
 from get_game_genres.parsers.base_parser import BaseParser
+from get_game_genres.parsers.lookup_context import LookupContext
 
 
 class GameguruRuParser(BaseParser):
-    def _parse(self) -> list[str]:
-        url_search = f"https://gameguru.ru/games/?search={self.game_name}"
+    # Жанры есть в результатах поиска, поэтому страницы игр не загружаются.
+    # Вместо адреса страницы игры сохраняется адрес страницы поиска, на которой
+    # нашлась игра
+    def _parse(self, ctx: LookupContext) -> list[str]:
+        site: str = self.get_site_name()
+        use_game_url_cache: bool = self._is_game_url_cache_enabled()
+
+        url: str | None = (
+            GameUrl.get_url(site, ctx.game_name) if use_game_url_cache else None
+        )
+        if url:
+            self.log_info("Load saved %r", url)
+            root = ctx.send_get(url, return_html=True)
+
+            genres = self._get_genres(ctx, root)
+            if genres is not None:
+                return genres
+
+            # Адрес устарел: игра переместилась на другую страницу поиска
+            self.log_info("Адрес %r устарел, поиск игры заново", url)
+            GameUrl.delete_url(site, ctx.game_name)
+
+        url_search = f"https://gameguru.ru/games/?search={ctx.game_name}"
 
         page = last_page = 1
         while page <= last_page:
@@ -18,19 +44,16 @@ class GameguruRuParser(BaseParser):
             if page > 1:
                 url = f"{url_search}&page={page}"
 
-            self.log_info(f"Load {url!r}")
-            root = self.send_get(url, return_html=True)
+            self.log_info("Load %r", url)
+            root = ctx.send_get(url, return_html=True)
 
-            for game_block in root.select("#publications-wrap .short-news-content"):
-                title = self.get_norm_text(game_block.select_one(".short-news-title"))
-                if not self.is_found_game(title):
-                    continue
+            genres = self._get_genres(ctx, root)
+            if genres is not None:
+                if use_game_url_cache:
+                    GameUrl.set_url(site, ctx.game_name, url)
 
-                for info in game_block.select(".short-news-play-info"):
-                    if "Жанр".upper() not in self.get_norm_text(info).upper():
-                        continue
-
-                    return [self.get_norm_text(x) for x in info.select("div > span")]
+                # Сойдет первый, совпадающий по имени, вариант
+                return genres
 
             # Обновление номера последней страницы
             pages = root.select(".pagination a.page-link[href]")
@@ -41,9 +64,31 @@ class GameguruRuParser(BaseParser):
 
             page += 1
 
-        self.log_info(f"Not found game {self.game_name!r}")
+        self.log_info("Not found game %r", ctx.game_name)
         return []
 
+    def _get_genres(self, ctx: LookupContext, root: BeautifulSoup) -> list[str] | None:
+        # Жанры игры из результатов поиска или None, если игры на странице нет
+        info = self._get_game_block(ctx, root)
+        if not info:
+            return None
+
+        return [self.get_norm_text(x) for x in info.select("div > span")]
+
+    def _get_game_block(
+        self, ctx: LookupContext, root: BeautifulSoup
+    ) -> Tag | None:
+        for game_block in root.select("#publications-wrap .short-news-content"):
+            title = self.get_norm_text(game_block.select_one(".short-news-title"))
+            if not ctx.is_found_game(title):
+                continue
+
+            for info in game_block.select(".short-news-play-info"):
+                if "Жанр".upper() in self.get_norm_text(info).upper():
+                    return info
+
+        return None
+
 
 def get_game_genres(game_name: str, *args, **kwargs) -> list[str]:
     return GameguruRuParser(*args, **kwargs).get_game_genres(game_name)
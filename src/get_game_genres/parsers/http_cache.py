@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+
+from pathlib import Path
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from get_game_genres.config import HTTP_CACHE_FILE_NAME, HTTP_CACHE_MAX_SIZE
+
+
+# Заголовки ответа, которые сохраняются вместе с телом
+SAVED_HEADERS: list[str] = [
+    "Content-Type",
+    "ETag",
+    "Last-Modified",
+    "Date",
+]
+
+
+def get_saved_headers(rs: requests.Response) -> dict[str, str]:
+    return {name: rs.headers[name] for name in SAVED_HEADERS if name in rs.headers}
+
+
+def get_cache_key(
+    request: requests.PreparedRequest,
+    stream_until: str | None = None,
+) -> str:
+    # Ключ из метода, адреса с параметрами и тела запроса.
+    # С stream_until сохраняется только начало ответа, поэтому у него свой ключ,
+    # чтобы не выдать обрезанный ответ на запрос всей страницы
+    body: bytes | str = request.body or b""
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+
+    hash_obj = hashlib.sha256()
+    hash_obj.update(request.method.encode("utf-8"))
+    hash_obj.update(b"\n")
+    hash_obj.update(request.url.encode("utf-8"))
+    hash_obj.update(b"\n")
+    hash_obj.update(body)
+    if stream_until:
+        hash_obj.update(b"\n")
+        hash_obj.update(stream_until.encode("utf-8"))
+    return hash_obj.hexdigest()
+
+
+class CacheEntry:
+    def __init__(
+        self,
+        key: str,
+        url: str,
+        status_code: int,
+        headers: dict[str, str],
+        content: bytes,
+        created_at: float,
+    ) -> None:
+        self.key = key
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.created_at = created_at
+
+    def is_expired(self, ttl: float) -> bool:
+        return time.time() - self.created_at > ttl
+
+    def can_revalidate(self) -> bool:
+        return "ETag" in self.headers or "Last-Modified" in self.headers
+
+    def get_revalidate_headers(self) -> dict[str, str]:
+        headers = dict()
+        if "ETag" in self.headers:
+            headers["If-None-Match"] = self.headers["ETag"]
+        if "Last-Modified" in self.headers:
+            headers["If-Modified-Since"] = self.headers["Last-Modified"]
+        return headers
+
+    def to_response(self, request: requests.PreparedRequest) -> requests.Response:
+        rs = requests.Response()
+        rs.status_code = self.status_code
+        rs.headers = CaseInsensitiveDict(self.headers)
+        rs.encoding = get_encoding_from_headers(rs.headers)
+        rs.url = self.url
+        rs.request = request
+        rs._content = self.content
+        rs.from_cache = True
+        return rs
+
+
+# Кэш ответов в SQLite: тела хранятся сжатыми zlib, при превышении max_size
+# удаляются записи, к которым дольше всего не обращались
+class HttpCache:
+    def __init__(
+        self,
+        file_name: Path | str = HTTP_CACHE_FILE_NAME,
+        max_size: int = HTTP_CACHE_MAX_SIZE,
+    ) -> None:
+        self.file_name = file_name
+        self.max_size = max_size
+
+        if file_name != ":memory:":
+            Path(file_name).parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            file_name, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode = wal")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS response (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                status_code INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                content BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS response_accessed_at ON response (accessed_at)"
+        )
+
+        (self._size,) = self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM response"
+        ).fetchone()
+
+    def get_size(self) -> int:
+        return self._size
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._connection.execute(
+                "SELECT COUNT(*) FROM response"
+            ).fetchone()
+            return count
+
+    def get(self, key: str) -> CacheEntry | None:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT url, status_code, headers, content, created_at "
+                "FROM response WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if not row:
+                return None
+
+            self._connection.execute(
+                "UPDATE response SET accessed_at = ? WHERE key = ?",
+                (time.time(), key),
+            )
+
+        url, status_code, headers, content, created_at = row
+        return CacheEntry(
+            key=key,
+            url=url,
+            status_code=status_code,
+            headers=json.loads(headers),
+            content=zlib.decompress(content),
+            created_at=created_at,
+        )
+
+    def put(self, key: str, rs: requests.Response) -> None:
+        headers: dict[str, str] = get_saved_headers(rs)
+        content: bytes = zlib.compress(rs.content, 6)
+        now: float = time.time()
+
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT size FROM response WHERE key = ?", (key,)
+            ).fetchone()
+            if row:
+                self._size -= row[0]
+
+            self._connection.execute(
+                "INSERT OR REPLACE INTO response "
+                "(key, url, status_code, headers, content, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    rs.url,
+                    rs.status_code,
+                    json.dumps(headers),
+                    content,
+                    len(content),
+                    now,
+                    now,
+                ),
+            )
+            self._size += len(content)
+
+            self._evict()
+
+    def touch(self, key: str) -> None:
+        # Ответ подтвержден сайтом (304 Not Modified) - срок жизни начинается заново
+        with self._lock:
+            now: float = time.time()
+            self._connection.execute(
+                "UPDATE response SET created_at = ?, accessed_at = ? WHERE key = ?",
+                (now, now, key),
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM response")
+            self._size = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def _evict(self) -> None:
+        if self._size <= self.max_size:
+            return
+
+        # Удаляем с запасом, чтобы не чистить кэш на каждой записи
+        need_free: int = self._size - int(self.max_size * 0.9)
+        keys: list[str] = []
+        for key, size in self._connection.execute(
+            "SELECT key, size FROM response ORDER BY accessed_at"
+        ):
+            if need_free <= 0:
+                break
+
+            keys.append(key)
+            need_free -= size
+            self._size -= size
+
+        self._connection.executemany(
+            "DELETE FROM response WHERE key = ?", [(key,) for key in keys]
+        )
+
+
+_http_cache: HttpCache | None = None
+_http_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> HttpCache:
+    # Один кэш на процесс для всех парсеров
+    global _http_cache
+
+    with _http_cache_lock:
+        if _http_cache is None:
+            _http_cache = HttpCache()
+        return _http_cache
@@ -5,13 +5,19 @@ __author__ = "ipetrash"
 
 
 from get_game_genres.parsers.base_parser import BaseParser
+from get_game_genres.parsers.lookup_context import LookupContext
 
 
 class IgromaniaRuParser(BaseParser):
-    def _parse(self) -> list[str]:
-        url = f"https://www.igromania.ru/api/v2/search/games/?q={self.game_name}"
+    # Поиск через API, выдерживает пару запросов одновременно
+    max_concurrency = 2
+    rate_limit = 1.0
+    rate_limit_max = 3.0
 
-        data: dict = self.send_get(url, return_json=True)
+    def _parse(self, ctx: LookupContext) -> list[str]:
+        url = f"https://www.igromania.ru/api/v2/search/games/?q={ctx.game_name}"
+
+        data: dict = ctx.send_get(url, return_json=True)
 
         # Example result:
         # {'count': 1, 'next': None, 'previous': None, 'results': [
@@ -36,13 +42,13 @@ class IgromaniaRuParser(BaseParser):
         # ]}
 
         for game in data["results"]:
-            if not self.is_found_game(game["name"]):
+            if not ctx.is_found_game(game["name"]):
                 continue
 
             # Сойдет первый, совпадающий по имени, вариант
             return [genre["name"] for genre in game["genres"]]
 
-        self.log_info(f"Not found game {self.game_name!r}")
+        self.log_info("Not found game %r", ctx.game_name)
         return []
 
 
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+import asyncio
+
+from typing import TYPE_CHECKING
+
+from bs4 import BeautifulSoup
+import requests
+
+from get_game_genres.third_party.smart_comparing_names import smart_comparing_names
+
+if TYPE_CHECKING:
+    from get_game_genres.parsers.base_parser import BaseParser
+
+
+# Состояние одного поиска жанров игры на сайте. Парсер один на сайт и
+# может искать несколько игр одновременно, поэтому все, что относится к
+# конкретной игре (название, сессия), передается в методы парсера через контекст
+class LookupContext:
+    def __init__(
+        self,
+        parser: "BaseParser",
+        game_name: str,
+        session: requests.Session,
+    ) -> None:
+        self.parser = parser
+        self.game_name = game_name
+        self.session = session
+
+    def is_found_game(self, game_name: str) -> bool:
+        return smart_comparing_names(self.game_name, game_name)
+
+    def send_get(
+        self,
+        url: str,
+        return_html: bool = False,
+        return_json: bool = False,
+        **kwargs,
+    ) -> requests.Response | BeautifulSoup | dict | list:
+        return self.parser._send(
+            self,
+            "GET",
+            url,
+            return_html=return_html,
+            return_json=return_json,
+            **kwargs,
+        )
+
+    def send_post(
+        self,
+        url: str,
+        data=None,
+        json=None,
+        return_html: bool = False,
+        return_json: bool = False,
+        **kwargs,
+    ) -> requests.Response | BeautifulSoup | dict | list:
+        return self.parser._send(
+            self,
+            "POST",
+            url,
+            data=data,
+            json=json,
+            return_html=return_html,
+            return_json=return_json,
+            **kwargs,
+        )
+
+    # Асинхронные варианты запросов: блокирующие запросы выполняются в пуле потоков,
+    # поэтому не останавливают цикл событий
+    async def async_send_get(
+        self,
+        url: str,
+        return_html: bool = False,
+        return_json: bool = False,
+        **kwargs,
+    ) -> requests.Response | BeautifulSoup | dict | list:
+        return await asyncio.to_thread(
+            self.send_get,
+            url,
+            return_html=return_html,
+            return_json=return_json,
+            **kwargs,
+        )
+
+    async def async_send_post(
+        self,
+        url: str,
+        data=None,
+        json=None,
+        return_html: bool = False,
+        return_json: bool = False,
+        **kwargs,
+    ) -> requests.Response | BeautifulSoup | dict | list:
+        return await asyncio.to_thread(
+            self.send_post,
+            url,
+            data=data,
+            json=json,
+            return_html=return_html,
+            return_json=return_json,
+            **kwargs,
+        )
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.parser.get_site_name()}, {self.game_name!r})"
@@ -4,42 +4,42 @@
 __author__ = "ipetrash"
 
 
+from typing import Iterator
 from urllib.parse import urljoin
-from get_game_genres.parsers.base_parser import BaseParser
 
+from bs4 import BeautifulSoup
 
-class PlaygroundRuParser(BaseParser):
+from get_game_genres.parsers.base_parser import GamePageParser, get_class_strainer
+from get_game_genres.parsers.lookup_context import LookupContext
+
+
+class PlaygroundRuParser(GamePageParser):
     base_url = "https://www.playground.ru"
 
-    def _parse(self) -> list[str]:
-        url = f"{self.base_url}/api/game.search?query={self.game_name}&include_addons=1"
-        data: dict | list = self.send_get(url, return_json=True)
+    # Из страницы игры нужен только блок жанров
+    STRAINER_GAME = get_class_strainer("genres")
+
+    # Блок с жанрами в начале большой страницы игры, дальше ее можно не скачивать
+    STREAM_UNTIL_GAME = ".genres"
+
+    def _iter_game_urls(self, ctx: LookupContext) -> Iterator[str]:
+        url = f"{self.base_url}/api/game.search?query={ctx.game_name}&include_addons=1"
+        data: dict | list = ctx.send_get(url, return_json=True)
 
         if isinstance(data, dict):
             message: str | None = data.get("message")
             if message:
-                self.log_warn(f"Ошибка: {data}")
-                return []
+                self.log_warn("Ошибка: %s", data)
+                return
 
         for game in data:
-            title = game["name"]
-            if not self.is_found_game(title):
-                continue
-
-            url_game = urljoin(self.base_url, game["slug"])
-            self.log_info(f"Load {url_game!r}")
-
-            game_block = self.send_get(url_game, return_html=True)
-            genres = [
-                self.get_norm_text(x).strip(",")
-                for x in game_block.select(".genres > a")
-            ]
-
-            # Сойдет первый, совпадающий по имени, вариант
-            return genres
+            if ctx.is_found_game(game["name"]):
+                yield urljoin(self.base_url, game["slug"])
 
-        self.log_info(f"Not found game {self.game_name!r}")
-        return []
+    def _parse_game_page(
+        self, ctx: LookupContext, root: BeautifulSoup
+    ) -> list[str]:
+        return [self.get_norm_text(x).strip(",") for x in root.select(".genres > a")]
 
 
 def get_game_genres(game_name: str, *args, **kwargs) -> list[str]:
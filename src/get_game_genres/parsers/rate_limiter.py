@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+import threading
+import time
+
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+
+
+# Ответы, которыми сайт просит снизить нагрузку
+THROTTLE_STATUS_CODES: set[int] = {429, 503}
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    # Retry-After бывает числом секунд или HTTP-датой
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    try:
+        dt = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return max((dt - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+# Ограничитель частоты запросов к сайту по алгоритму token bucket.
+# Скорость подстраивается по AIMD: после успешных ответов растет на rate_increase,
+# а при ошибках и ответах 429/503 уменьшается вдвое. Если сайт прислал
+# Retry-After, то запросы не отправляются до истечения указанного времени
+class RateLimiter:
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        min_rate: float | None = None,
+        max_rate: float | None = None,
+        rate_increase: float = 0.05,
+        max_retry_after: float = 15 * 60,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = rate / 10 if min_rate is None else min_rate
+        self.max_rate = rate if max_rate is None else max_rate
+        self.rate_increase = rate_increase
+        self.max_retry_after = max_retry_after
+
+        self._lock = threading.Lock()
+        self._tokens: float = burst
+        self._last_time: float = time.monotonic()
+        self._blocked_until: float = 0.0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(
+            self._tokens + (now - self._last_time) * self.rate, self.burst
+        )
+        self._last_time = now
+
+    def get_wait_time(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+
+            if now < self._blocked_until:
+                return self._blocked_until - now
+
+            if self._tokens >= 1:
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+
+            if now < self._blocked_until or self._tokens < 1:
+                return False
+
+            self._tokens -= 1
+            return True
+
+    def acquire(self) -> float:
+        # Ждет разрешения на запрос, возвращает время ожидания в секундах
+        waited: float = 0.0
+        while not self.try_acquire():
+            wait_time: float = max(self.get_wait_time(), 0.01)
+            time.sleep(wait_time)
+            waited += wait_time
+
+        return waited
+
+    def on_success(self) -> None:
+        with self._lock:
+            self.rate = min(self.rate + self.rate_increase, self.max_rate)
+
+    def on_throttle(self, retry_after: float | None = None) -> None:
+        with self._lock:
+            self.rate = max(self.rate / 2, self.min_rate)
+
+            if retry_after:
+                retry_after = min(retry_after, self.max_retry_after)
+                self._blocked_until = max(
+                    self._blocked_until, time.monotonic() + retry_after
+                )
+
+    def on_response(self, rs: requests.Response) -> None:
+        if rs.status_code in THROTTLE_STATUS_CODES or rs.status_code >= 500:
+            self.on_throttle(parse_retry_after(rs.headers.get("Retry-After")))
+        else:
+            self.on_success()
+
+    def __str__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(rate={self.rate:.3f}/сек., "
+            f"min_rate={self.min_rate:.3f}, max_rate={self.max_rate:.3f}, "
+            f"burst={self.burst})"
+        )
@@ -4,24 +4,32 @@
 __author__ = "ipetrash"
 
 
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
+
 from get_game_genres.parsers.base_parser import BaseParser
+from get_game_genres.parsers.lookup_context import LookupContext
 
 
 class SquarefactionRuParser(BaseParser):
-    def _parse(self) -> list[str]:
-        url = f"http://squarefaction.ru/main/search/games?q={self.game_name}"
-        rs = self.send_get(url)
+    # Из страниц нужны только список найденных игр или блок с описанием игры
+    STRAINER_SEARCH = SoupStrainer(id="games")
+    STRAINER_GAME = SoupStrainer(id="page-info")
 
-        root = BeautifulSoup(rs.content, "html.parser")
+    def _parse(self, ctx: LookupContext) -> list[str]:
+        url = f"http://squarefaction.ru/main/search/games?q={ctx.game_name}"
+        rs = ctx.send_get(url)
 
         # http://squarefaction.ru/main/search/games?q=dead+space
         if "/main/search/games" in rs.url:
-            self.log_info(f"Parsing of game list")
+            self.log_info("Parsing of game list")
+
+            root = self.process_response(
+                rs, return_html=True, parse_only=self.STRAINER_SEARCH
+            )
 
             for game_block in root.select("#games > .entry"):
                 title = self.get_norm_text(game_block.select_one(".name"))
-                if not self.is_found_game(title):
+                if not ctx.is_found_game(title):
                     continue
 
                 # <div class="infos">TPS,Survival Horror,Action</div>
@@ -32,13 +40,17 @@ class SquarefactionRuParser(BaseParser):
 
         # http://squarefaction.ru/game/dead-space
         else:
-            self.log_info(f"Parsing of game page")
+            self.log_info("Parsing of game page")
+
+            root = self.process_response(
+                rs, return_html=True, parse_only=self.STRAINER_GAME
+            )
 
             game_block = root.select_one("#page-info")
             if game_block:
                 title = self.get_norm_text(game_block.select_one("#title"))
-                if not self.is_found_game(title):
-                    self.log_warn(f"Not match game title {title!r}")
+                if not ctx.is_found_game(title):
+                    self.log_warn("Not match game title %r", title)
 
                 # <td class="nowraps-links">
                 #     <a href="/games?genre=tps">TPS</a>,
@@ -54,7 +66,7 @@ class SquarefactionRuParser(BaseParser):
                 # Сойдет первый, совпадающий по имени, вариант
                 return genres
 
-        self.log_info(f"Not found game {self.game_name!r}")
+        self.log_info("Not found game %r", ctx.game_name)
         return []
 
 
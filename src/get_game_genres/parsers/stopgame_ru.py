@@ -3,33 +3,33 @@
 
 __author__ = "ipetrash"
 
-from urllib.parse import urljoin
+import re
 
-from get_game_genres.parsers.base_parser import BaseParser
+from typing import Iterator
+from urllib.parse import urljoin
 
+from bs4 import BeautifulSoup, SoupStrainer
 
-class StopgameRuParser(BaseParser):
-    def _parse(self) -> list[str]:
-        url = f"https://stopgame.ru/ajax/search/games/?term={self.game_name}&offset=0&sort=relevance"
-        data: dict = self.send_get(url, return_json=True)
+from get_game_genres.parsers.base_parser import GamePageParser
+from get_game_genres.parsers.lookup_context import LookupContext
 
-        for game in filter(lambda obj: obj["type"] == "game", data["results"]):
-            if not self.is_found_game(game["title"]):
-                continue
 
-            url_game = urljoin(url, game["url"])
+class StopgameRuParser(GamePageParser):
+    # Из страницы игры нужны только ссылки-теги
+    STRAINER_GAME = SoupStrainer("a", class_=re.compile("_tag_"))
 
-            self.log_debug(f"Загрузка {url_game!r}")
-            soup = self.send_get(url_game, return_html=True)
+    def _iter_game_urls(self, ctx: LookupContext) -> Iterator[str]:
+        url = f"https://stopgame.ru/ajax/search/games/?term={ctx.game_name}&offset=0&sort=relevance"
+        data: dict = ctx.send_get(url, return_json=True)
 
-            # Сойдет первый, совпадающий по имени, вариант
-            return [
-                self.get_norm_text(a)
-                for a in soup.select('a[class *= "_tag_"]')
-            ]
+        for game in filter(lambda obj: obj["type"] == "game", data["results"]):
+            if ctx.is_found_game(game["title"]):
+                yield urljoin(url, game["url"])
 
-        self.log_info(f"Not found game {self.game_name!r}")
-        return []
+    def _parse_game_page(
+        self, ctx: LookupContext, root: BeautifulSoup
+    ) -> list[str]:
+        return [self.get_norm_text(a) for a in root.select('a[class *= "_tag_"]')]
 
 
 def get_game_genres(game_name: str, *args, **kwargs) -> list[str]:
@@ -4,43 +4,54 @@
 __author__ = "ipetrash"
 
 
+from typing import Iterator
 from urllib.parse import urljoin
-from get_game_genres.parsers.base_parser import BaseParser
 
+from bs4 import BeautifulSoup
 
-class StoreSteampoweredComParser(BaseParser):
-    def _parse(self) -> list[str]:
+from get_game_genres.parsers.base_parser import GamePageParser, get_class_strainer
+from get_game_genres.parsers.lookup_context import LookupContext
+
+
+class StoreSteampoweredComParser(GamePageParser):
+    # Магазин рассчитан на большую нагрузку, пара запросов одновременно допустима
+    max_concurrency = 2
+    rate_limit = 1.0
+    rate_limit_max = 3.0
+
+    # Из страниц нужны только результаты поиска и блок с описанием игры
+    STRAINER_SEARCH = get_class_strainer("search_result_row", "a")
+    STRAINER_GAME = get_class_strainer("details_block", "div")
+
+    # Блок с жанрами в начале большой страницы игры, дальше ее можно не скачивать
+    STREAM_UNTIL_GAME = ".details_block"
+
+    def _iter_game_urls(self, ctx: LookupContext) -> Iterator[str]:
         # category1 = Игры
         url = "https://store.steampowered.com/search/"
         params = dict(
-            term=self.game_name,
+            term=ctx.game_name,
             ndl=1,
             category1=998
         )
-        root = self.send_get(url, params=params, return_html=True)
+        root = ctx.send_get(
+            url, params=params, return_html=True, parse_only=self.STRAINER_SEARCH
+        )
 
         for game_block_preview in root.select(".search_result_row"):
             title = self.get_norm_text(
                 game_block_preview.select_one(".search_name > .title")
             )
-            if not self.is_found_game(title):
-                continue
-
-            href = game_block_preview["href"]
-            url_game = urljoin(url, href)
-            self.log_info(f"Load {url_game!r}")
-
-            game_block = self.send_get(url_game, return_html=True)
-            genres = [
-                self.get_norm_text(a)
-                for a in game_block.select('.details_block a[href*="/genre/"]')
-            ]
-
-            # Сойдет первый, совпадающий по имени, вариант
-            return genres
-
-        self.log_info(f"Not found game {self.game_name!r}")
-        return []
+            if ctx.is_found_game(title):
+                yield urljoin(url, game_block_preview["href"])
+
+    def _parse_game_page(
+        self, ctx: LookupContext, root: BeautifulSoup
+    ) -> list[str]:
+        return [
+            self.get_norm_text(a)
+            for a in root.select('.details_block a[href*="/genre/"]')
+        ]
 
 
 def get_game_genres(game_name: str, *args, **kwargs) -> list[str]:
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+import codecs
+import re
+
+from html.parser import HTMLParser
+
+import requests
+
+from get_game_genres.config import HTTP_STREAM_CHUNK_SIZE, HTTP_STREAM_MAX_SIZE
+
+
+# Теги без закрывающего тега, их не нужно учитывать во вложенности
+VOID_TAGS: set[str] = set(
+    "area base br col embed hr img input link meta param source track wbr".split()
+)
+
+
+class ResponseTooLargeError(Exception):
+    def __init__(self, url: str, max_size: int) -> None:
+        self.url = url
+        self.max_size = max_size
+
+        super().__init__(f"Ответ {url!r} больше {max_size} байт")
+
+
+# Следит за разбором HTML по частям и отмечает, когда первый элемент,
+# подходящий под простой селектор ("tag", ".class", "#id", "tag.class",
+# "tag#id"), прочитан полностью, т.е. встретился его закрывающий тег
+class SelectorWatcher(HTMLParser):
+    PATTERN_SELECTOR = re.compile(r"^([\w-]+)?(?:([.#])([\w-]+))?$")
+
+    def __init__(self, selector: str) -> None:
+        super().__init__(convert_charrefs=False)
+
+        match = self.PATTERN_SELECTOR.match(selector.strip())
+        if not match or not any(match.groups()):
+            raise ValueError(f"Неподдерживаемый селектор {selector!r}")
+
+        self.tag_name: str | None = match.group(1)
+        self.attr_name: str | None = {".": "class", "#": "id"}.get(match.group(2))
+        self.attr_value: str | None = match.group(3)
+
+        self.is_found: bool = False
+        self.is_done: bool = False
+
+        # Вложенные теги с тем же именем, что у найденного элемента
+        self._found_tag: str = ""
+        self._depth: int = 0
+
+    def _is_match(self, tag: str, attrs: list[tuple[str, str | None]]) -> bool:
+        if self.tag_name and tag != self.tag_name:
+            return False
+
+        if not self.attr_name:
+            return True
+
+        for name, value in attrs:
+            if name != self.attr_name or value is None:
+                continue
+
+            if self.attr_name == "class":
+                return self.attr_value in value.split()
+            return value == self.attr_value
+
+        return False
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if self.is_done or tag in VOID_TAGS:
+            return
+
+        if self.is_found:
+            if tag == self._found_tag:
+                self._depth += 1
+            return
+
+        if self._is_match(tag, attrs):
+            self.is_found = True
+            self._found_tag = tag
+            self._depth = 1
+
+    def handle_endtag(self, tag: str) -> None:
+        if not self.is_found or self.is_done or tag != self._found_tag:
+            return
+
+        self._depth -= 1
+        if self._depth <= 0:
+            self.is_done = True
+
+
+def read_until(
+    rs: requests.Response,
+    selector: str,
+    max_size: int = HTTP_STREAM_MAX_SIZE,
+    chunk_size: int = HTTP_STREAM_CHUNK_SIZE,
+    encoding: str | None = None,
+) -> bool:
+    # Чтение ответа, отправленного с stream=True, до конца элемента selector.
+    # Прочитанное становится rs.content, подключение закрывается.
+    # Возвращает True, если ответ прочитан не до конца
+    try:
+        decoder_cls = codecs.getincrementaldecoder(encoding or "utf-8")
+    except LookupError:
+        decoder_cls = codecs.getincrementaldecoder("utf-8")
+
+    watcher = SelectorWatcher(selector)
+    decoder = decoder_cls(errors="replace")
+
+    chunks: list[bytes] = []
+    size: int = 0
+    is_truncated: bool = False
+    try:
+        for chunk in rs.iter_content(chunk_size):
+            chunks.append(chunk)
+            size += len(chunk)
+
+            watcher.feed(decoder.decode(chunk))
+            if watcher.is_done:
+                is_truncated = True
+                break
+
+            if size > max_size:
+                raise ResponseTooLargeError(rs.url, max_size)
+    finally:
+        rs.close()
+
+    rs._content = b"".join(chunks)
+    rs._content_consumed = True
+    return is_truncated
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+import random
+import threading
+
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, ReadTimeoutError
+from urllib3.util.retry import Retry
+
+from get_game_genres.config import (
+    USER_AGENT,
+    HTTP_POOL_MAX_SIZE,
+    HTTP_RETRY_TOTAL,
+    HTTP_RETRY_BACKOFF,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT_MIN,
+    HTTP_READ_TIMEOUT_MAX,
+)
+
+
+# Повтор запросов с паузой со случайным разбросом (full jitter), чтобы повторы
+# от нескольких обработчиков не приходили на сайт одновременно
+class JitterRetry(Retry):
+    def get_backoff_time(self) -> float:
+        backoff: float = super().get_backoff_time()
+        return random.uniform(0, backoff)
+
+
+def create_retry(
+    total: int = HTTP_RETRY_TOTAL,
+    backoff: float = HTTP_RETRY_BACKOFF,
+) -> Retry:
+    # Повторяются только идемпотентные запросы (POST - нет).
+    # Ответы 429 и 503 не повторяются: их обрабатывает RateLimiter парсера
+    return JitterRetry(
+        total=total,
+        connect=total,
+        read=total,
+        status=total,
+        backoff_factor=backoff,
+        status_forcelist=[500, 502, 504],
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+        raise_on_status=False,
+    )
+
+
+def create_session(
+    pool_max_size: int = HTTP_POOL_MAX_SIZE,
+    retry: Retry | None = None,
+) -> requests.Session:
+    if retry is None:
+        retry = create_retry()
+
+    session = requests.session()
+    session.headers["User-Agent"] = USER_AGENT
+
+    adapter = HTTPAdapter(
+        pool_connections=pool_max_size,
+        pool_maxsize=pool_max_size,
+        max_retries=retry,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    return session
+
+
+def is_timeout_error(e: Exception) -> bool:
+    # Таймаут после исчерпания повторов requests выбрасывает как ConnectionError
+    # с MaxRetryError внутри, а не как requests.Timeout
+    if isinstance(e, requests.Timeout):
+        return True
+
+    reason = getattr(e.args[0], "reason", None) if e.args else None
+    return isinstance(reason, (ConnectTimeoutError, ReadTimeoutError))
+
+
+# Сессии сайта для одновременных поисков: requests.Session не рассчитана на
+# использование из нескольких потоков, поэтому у каждого поиска своя сессия.
+# Сессий не больше max_size, если свободных нет, то поиск ждет освобождения
+class SessionPool:
+    def __init__(
+        self,
+        max_size: int,
+        factory: Callable[[], requests.Session] = create_session,
+    ) -> None:
+        self.max_size = max_size
+        self._factory = factory
+
+        self._free: list[requests.Session] = []
+        self._size: int = 0
+        self._condition = threading.Condition()
+
+    def acquire(self) -> tuple[requests.Session, bool]:
+        # Сессия и признак того, что она только что создана
+        with self._condition:
+            while not self._free and self._size >= self.max_size:
+                self._condition.wait()
+
+            if self._free:
+                return self._free.pop(), False
+
+            self._size += 1
+
+        try:
+            return self._factory(), True
+        except BaseException:
+            self.discard()
+            raise
+
+    def release(self, session: requests.Session) -> None:
+        with self._condition:
+            self._free.append(session)
+            self._condition.notify()
+
+    def discard(self, session: requests.Session | None = None) -> None:
+        # Сессия после ошибки могла остаться с испорченными подключениями
+        # или без нужных сайту кук, поэтому вместо нее потом создается новая
+        if session is not None:
+            session.close()
+
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+    @contextmanager
+    def session(self) -> Iterator[tuple[requests.Session, bool]]:
+        session, is_new = self.acquire()
+        try:
+            yield session, is_new
+        except BaseException:
+            self.discard(session)
+            raise
+        else:
+            self.release(session)
+
+    def close(self) -> None:
+        with self._condition:
+            for session in self._free:
+                session.close()
+
+            self._size -= len(self._free)
+            self._free.clear()
+
+    def __len__(self) -> int:
+        return self._size
+
+
+# Время ответа сайта по последним запросам. Таймаут чтения выставляется по
+# percentile с запасом multiplier, в пределах [min_timeout, max_timeout].
+# Если сайт стал медленнее таймаута, то замеров ответов нет, поэтому таймауты
+# тоже учитываются: как замер и, после max_timeouts таймаутов подряд, сбросом
+# замеров, после которого таймаут снова max_timeout
+class LatencyTracker:
+    def __init__(
+        self,
+        max_samples: int = 200,
+        min_samples: int = 20,
+        percentile: float = 0.95,
+        multiplier: float = 3.0,
+        connect_timeout: float = HTTP_CONNECT_TIMEOUT,
+        min_timeout: float = HTTP_READ_TIMEOUT_MIN,
+        max_timeout: float = HTTP_READ_TIMEOUT_MAX,
+        max_timeouts: int = 3,
+    ) -> None:
+        self.min_samples = min_samples
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.connect_timeout = connect_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.max_timeouts = max_timeouts
+
+        self._samples: deque[float] = deque(maxlen=max_samples)
+        self._timeouts: int = 0
+        self._lock = threading.Lock()
+
+    def add(self, elapsed: float) -> None:
+        with self._lock:
+            self._samples.append(elapsed)
+            self._timeouts = 0
+
+    def on_timeout(self) -> None:
+        # Ответ дольше текущего таймаута чтения, он и записывается как замер
+        timeout: float = self.get_read_timeout()
+
+        with self._lock:
+            self._samples.append(timeout)
+            self._timeouts += 1
+
+            if self._timeouts >= self.max_timeouts:
+                self._samples.clear()
+                self._timeouts = 0
+
+    def get_percentile(self, percentile: float | None = None) -> float | None:
+        if percentile is None:
+            percentile = self.percentile
+
+        with self._lock:
+            if not self._samples:
+                return None
+            samples: list[float] = sorted(self._samples)
+
+        index: int = min(int(len(samples) * percentile), len(samples) - 1)
+        return samples[index]
+
+    def get_read_timeout(self) -> float:
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return self.max_timeout
+
+        timeout: float = self.get_percentile() * self.multiplier
+        return min(max(timeout, self.min_timeout), self.max_timeout)
+
+    def get_timeout(self) -> tuple[float, float]:
+        return self.connect_timeout, self.get_read_timeout()
+
+    def __str__(self) -> str:
+        p50, p95 = self.get_percentile(0.5), self.get_percentile(0.95)
+        if p50 is None:
+            return f"{self.__class__.__name__}(нет замеров)"
+
+        connect_timeout, read_timeout = self.get_timeout()
+        return (
+            f"{self.__class__.__name__}(p50={p50:.2f} сек., p95={p95:.2f} сек., "
+            f"таймауты: {connect_timeout:.0f}/{read_timeout:.1f} сек.)"
+        )
@@ -5,38 +5,38 @@ __author__ = "ipetrash"
 
 
 from get_game_genres.parsers.base_parser import BaseParser
+from get_game_genres.parsers.lookup_context import LookupContext
 
 
 class VGTimesRuParser(BaseParser):
     base_url = "https://vgtimes.ru/"
-    was_first_request = False
 
-    def _parse(self) -> list[str]:
-        # На первый запрос заходим на основную страницу
-        if not self.was_first_request:
-            self.send_get(self.base_url)
-            self.was_first_request = True
+    def _on_session_created(self, ctx: LookupContext) -> None:
+        # Перед первым запросом сессии заходим на основную страницу.
+        # Без кэша, т.к. нужны куки, которые выставляет сайт
+        ctx.send_get(self.base_url, use_cache=False)
 
+    def _parse(self, ctx: LookupContext) -> list[str]:
         url_search = f"{self.base_url}engine/ajax/search.php"
         data = {
             "action": "search2",
-            "query": self.game_name,
+            "query": ctx.game_name,
             "ismobile": "",
             "what": 1,
         }
 
-        rs_json = self.send_post(url_search, data=data, return_json=True)
+        rs_json = ctx.send_post(url_search, data=data, return_json=True)
         rs_html = rs_json["results"].get("games")
         if rs_html:
             root = self.parse_html(rs_html)
             for game_el in root.select(".game_search"):
                 title = game_el.select_one(".title").text.strip()
-                if not self.is_found_game(title):
+                if not ctx.is_found_game(title):
                     continue
 
                 return game_el.select_one(".genre").text.strip().split(", ")
 
-        self.log_info(f"Not found game {self.game_name!r}")
+        self.log_info("Not found game %r", ctx.game_name)
         return []
 
 
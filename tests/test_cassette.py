@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+import tempfile
+import threading
+import unittest
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from get_game_genres.parsers.base_parser import BaseParser
+from get_game_genres.parsers.cassette import (
+    CassetteMissError,
+    MODE_RECORD,
+    MODE_REPLAY,
+    use_cassette,
+)
+from get_game_genres.parsers.lookup_context import LookupContext
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        data = """
+        <ul class="genres"><li>Экшен</li><li>RPG </li><li>Экшен</li></ul>
+        """.encode("cp1251")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=windows-1251")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class FakeParser(BaseParser):
+    url: str = ""
+
+    @classmethod
+    def get_site_name(cls) -> str:
+        return "_test_cassette_"
+
+    def _parse(self, ctx: LookupContext) -> list[str]:
+        root = ctx.send_get(self.url, params=dict(q=ctx.game_name), return_html=True)
+        return [li.text for li in root.select(".genres > li")]
+
+
+class TestCase(unittest.TestCase):
+    def test_record_replay(self) -> None:
+        parser = FakeParser(need_logs=False, use_http_cache=False)
+
+        with tempfile.TemporaryDirectory() as dir_name:
+            file_name = Path(dir_name) / "cassette.json.gz"
+
+            server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            try:
+                FakeParser.url = f"http://127.0.0.1:{server.server_port}/"
+                with use_cassette(parser, MODE_RECORD, file_name) as cassette:
+                    genres = parser.get_game_genres("Foo")
+                    self.assertEqual(len(cassette), 1)
+            finally:
+                server.shutdown()
+                server.server_close()
+
+            self.assertEqual(genres, ["RPG", "Экшен"])
+            self.assertIsNone(parser.cassette)
+
+            # Сервер остановлен - ответ берется только из кассеты
+            with use_cassette(parser, MODE_REPLAY, file_name):
+                self.assertEqual(parser.get_game_genres("Foo"), genres)
+
+                with self.assertRaises(CassetteMissError):
+                    parser.get_game_genres("Bar")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+import time
+import unittest
+
+from get_game_genres.parsers.circuit_breaker import (
+    CircuitBreaker,
+    CircuitOpenError,
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+)
+
+
+class TestCase(unittest.TestCase):
+    def test_open(self) -> None:
+        circuit_breaker = CircuitBreaker("foo", failure_threshold=2, reset_timeout=60)
+
+        circuit_breaker.check()
+        circuit_breaker.on_failure()
+        self.assertEqual(circuit_breaker.state, STATE_CLOSED)
+
+        # Успешный запрос сбрасывает счетчик ошибок
+        circuit_breaker.on_success()
+        circuit_breaker.on_failure()
+        self.assertEqual(circuit_breaker.state, STATE_CLOSED)
+
+        circuit_breaker.on_failure()
+        self.assertEqual(circuit_breaker.state, STATE_OPEN)
+        self.assertTrue(circuit_breaker.is_open())
+
+        with self.assertRaises(CircuitOpenError):
+            circuit_breaker.check()
+
+    def test_half_open(self) -> None:
+        circuit_breaker = CircuitBreaker("foo", failure_threshold=1, reset_timeout=0.01)
+
+        circuit_breaker.on_failure()
+        time.sleep(0.02)
+        self.assertFalse(circuit_breaker.is_open())
+
+        # Пропускается только один пробный запрос
+        circuit_breaker.check()
+        self.assertEqual(circuit_breaker.state, STATE_HALF_OPEN)
+        with self.assertRaises(CircuitOpenError):
+            circuit_breaker.check()
+
+        # Пробный запрос не прошел - пауза удваивается
+        circuit_breaker.on_failure()
+        self.assertEqual(circuit_breaker.state, STATE_OPEN)
+        self.assertGreater(circuit_breaker.get_retry_after(), 0.01)
+
+        time.sleep(0.03)
+        circuit_breaker.check()
+        circuit_breaker.on_success()
+        self.assertEqual(circuit_breaker.state, STATE_CLOSED)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+import tempfile
+import unittest
+
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+from peewee import OperationalError
+
+from get_game_genres.db import (
+    BACKUP_DATE_FMT,
+    DB_MODE_DIRECT,
+    DB_MODE_QUEUE,
+    DB_MODE_READ_ONLY,
+    Dump,
+    DumpGenre,
+    Game,
+    GameGenre,
+    Genre,
+    GenreName,
+    Site,
+    Watermark,
+    close_db,
+    db_create_backup,
+    db_prune_backups,
+    get_write_stats,
+    init_db,
+)
+
+
+# "й" из двух символов: "и" и знак умлаута
+GENRE_UMLAUT: str = "Боевои\u0306"
+
+
+def get_genre_queries(since: datetime | None = None) -> dict:
+    return dict(
+        all_genres=Dump.get_all_genres(),
+        all_genres_since=Dump.get_all_genres(since=since),
+        genres_by_game={
+            name: Dump.get_genres_by_game(name) for name in Dump.get_all_games()
+        },
+        genres_by_site=dict(Dump.get_genres_by_site()),
+    )
+
+
+def get_game_genre_links() -> dict[str, list[str]]:
+    query = (
+        GameGenre.select(GameGenre.game, GenreName.name)
+        .join(GenreName)
+        .order_by(GameGenre.game, GenreName.name)
+    )
+    game_by_genres: dict[str, list[str]] = dict()
+    for name, genre in query.tuples():
+        game_by_genres.setdefault(name, []).append(genre)
+    return game_by_genres
+
+
+class TestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        init_db(":memory:", mode=DB_MODE_DIRECT)
+
+    def tearDown(self) -> None:
+        close_db()
+
+        # Возврат к базе по умолчанию для остальных тестов
+        init_db()
+
+    def test_add_many(self) -> None:
+        Dump.add_many(
+            [
+                ("foo", "Game 1", ["RPG", "Action"]),
+                ("foo", "Game 2", []),
+                ("bar", "Game 1", ["RPG"]),
+            ]
+        )
+        self.assertEqual(Dump.select().count(), 3)
+
+        # Повторное добавление существующих пар игнорируется
+        Dump.add_many([("foo", "Game 1", ["Shooter"]), ("foo", "Game 3", ["RPG"])])
+        self.assertEqual(Dump.select().count(), 4)
+        self.assertEqual(Dump.get_genres_by_game("Game 1"), ["Action", "RPG"])
+
+    def test_dump(self) -> None:
+        Dump.add_many(
+            [
+                ("foo", "Game 2", ["RPG", "Action"]),
+                ("bar", "Game 2", ["Action", "Шутер"]),
+                ("foo", "Game 1", []),
+            ]
+        )
+        self.assertEqual(
+            list(Dump.iter_dump()),
+            [("Game 1", []), ("Game 2", ["Action", "RPG", "Шутер"])],
+        )
+
+        Game.sync({"Game 2": ["RPG", "Action"], "Game 1": []})
+        self.assertEqual(Game.dump(), {"Game 1": [], "Game 2": ["Action", "RPG"]})
+
+    def test_changed_since(self) -> None:
+        self.assertIsNone(Dump.get_last_updated_at())
+
+        Dump.add_many([("foo", "Game 1", ["RPG"])])
+        watermark = Dump.get_last_updated_at()
+        Watermark.set_value("test", watermark)
+
+        Dump.add_many([("foo", "Game 2", ["Action"])])
+        self.assertEqual(
+            [dump.name for dump in Dump.changed_since(Watermark.get_value("test"))],
+            ["Game 2"],
+        )
+        self.assertEqual(Dump.get_all_genres(since=watermark), ["Action"])
+        self.assertEqual(Dump.changed_since(None).count(), 2)
+
+        Game.sync({"Game 1": ["RPG"], "Game 2": ["Action"]})
+        watermark = Game.get_last_updated_at()
+        Game.sync({"Game 1": ["RPG"], "Game 2": ["Shooter"]})
+        self.assertEqual(
+            [game.name for game in Game.changed_since(watermark)], ["Game 2"]
+        )
+
+    def test_game_sync(self) -> None:
+        counts = Game.sync({"Game 1": ["RPG", "Action"], "Game 2": ["RPG"]})
+        self.assertEqual(counts, dict(created=2, updated=0, deleted=0))
+        self.assertEqual(Game.get_by("Game 1").genres, ["Action", "RPG"])
+
+        counts = Game.sync({"Game 1": ["Action", "RPG"], "Game 2": ["Shooter"]})
+        self.assertEqual(counts, dict(created=0, updated=1, deleted=0))
+        self.assertEqual(Game.get_by("Game 2").genres, ["Shooter"])
+
+        counts = Game.sync({"Game 2": ["Shooter"], "Game 3": []})
+        self.assertEqual(counts, dict(created=1, updated=0, deleted=1))
+        self.assertIsNone(Game.get_by("Game 1"))
+
+        counts = Game.sync({"Game 3": []}, delete_missing=False)
+        self.assertEqual(counts, dict(created=0, updated=0, deleted=0))
+        self.assertEqual(Game.select().count(), 2)
+
+    def test_genre_sync(self) -> None:
+        counts = Genre.sync({"RPG": ("Ролевая игра", "rpg, ролевая"), "Action": ("", "")})
+        self.assertEqual(counts, dict(created=2, updated=0))
+
+        counts = Genre.sync({"RPG": ("Ролевая игра", "rpg, ролевая"), "Action": ("", "")})
+        self.assertEqual(counts, dict(created=0, updated=0))
+
+        # Пустые псевдонимы не затирают существующие
+        counts = Genre.sync({"RPG": ("Ролевая", ""), "Action": ("Экшен", "экшн")})
+        self.assertEqual(counts, dict(created=0, updated=2))
+
+        genre = Genre.get_by("RPG")
+        self.assertEqual(genre.description, "Ролевая")
+        self.assertEqual(genre.aliases, "rpg, ролевая")
+        self.assertEqual(Genre.get_by("Action").aliases, "экшн")
+
+    def test_normalized_genres(self) -> None:
+        # Повторы жанра в одном дампе и одинаковые на вид жанры с "й" из одного
+        # и из двух символов
+        Dump.add_many(
+            [
+                ("foo", "Game 1", ["RPG", "Action", "RPG"]),
+                ("bar", "Game 1", ["Action", "Боевой"]),
+                ("bar", "Game 2", [GENRE_UMLAUT, "Шутер"]),
+                ("foo", "Game 3", []),
+            ]
+        )
+        since = Dump.get_last_updated_at()
+        Dump.add_many([("baz", "Game 4", ["Шутер", "Action"])])
+
+        expected = get_genre_queries(since)
+        self.assertIn(GENRE_UMLAUT, expected["all_genres"])
+        self.assertIn("Боевой", expected["all_genres"])
+
+        # Заполнение таблиц из JSON-списков, как в миграции
+        Dump.sync_genre_links()
+        self.assertEqual(Site.select().count(), 3)
+        self.assertEqual(GenreName.select().count(), 5)
+        self.assertEqual(DumpGenre.select().count(), 8)
+
+        with patch("get_game_genres.db.USE_NORMALIZED_GENRES", True):
+            self.assertEqual(get_genre_queries(since), expected)
+
+            # При записи с включенным флагом связи обновляются сразу
+            Dump.add_many([("foo", "Game 5", ["RPG", "Стратегия", "Стратегия"])])
+            Dump.add("qux", "Game 1", ["Боевой", GENRE_UMLAUT])
+            actual = get_genre_queries(since)
+
+        self.assertEqual(actual, get_genre_queries(since))
+        self.assertEqual(
+            actual["genres_by_game"]["Game 1"],
+            ["Action", "RPG", GENRE_UMLAUT, "Боевой"],
+        )
+
+    def test_normalized_game_genres(self) -> None:
+        with patch("get_game_genres.db.USE_NORMALIZED_GENRES", True):
+            Game.sync({"Game 1": ["RPG", "RPG", "Action"], "Game 2": [GENRE_UMLAUT]})
+            Game.add_or_update("Game 3", ["Боевой"])
+            self.assertEqual(get_game_genre_links(), Game.dump())
+
+            Game.sync({"Game 1": ["Action"], "Game 3": ["Боевой"]})
+            Game.add_or_update("Game 3", ["Боевой", "Шутер"])
+            self.assertEqual(
+                get_game_genre_links(),
+                {"Game 1": ["Action"], "Game 3": ["Боевой", "Шутер"]},
+            )
+
+        # Пересоздание связей для всех игр дает то же самое
+        links = get_game_genre_links()
+        Game.sync_genre_links()
+        self.assertEqual(get_game_genre_links(), links)
+
+    def test_init_db_queue(self) -> None:
+        with tempfile.TemporaryDirectory() as dir_name:
+            path = Path(dir_name) / "database" / "games.sqlite"
+            init_db(str(path), mode=DB_MODE_QUEUE)
+            try:
+                Dump.add_many([("foo", "Game 1", ["RPG"])])
+                self.assertEqual(Dump.get_all_games(), ["Game 1"])
+                self.assertTrue(path.exists())
+
+                stats = get_write_stats().to_dict()
+                self.assertEqual(stats["writes"], 1)
+                self.assertEqual(sum(stats["execute_histogram"].values()), 1)
+            finally:
+                close_db()
+
+    def test_get_write_stats(self) -> None:
+        # Статистика очереди записи есть только в режиме очереди
+        self.assertIsNone(get_write_stats())
+
+    def test_init_db_read_only(self) -> None:
+        with tempfile.TemporaryDirectory() as dir_name:
+            path = str(Path(dir_name) / "games.sqlite")
+
+            init_db(path, mode=DB_MODE_DIRECT)
+            Dump.add_many([("foo", "Game 1", ["RPG"])])
+            close_db()
+
+            init_db(path, mode=DB_MODE_READ_ONLY)
+            try:
+                self.assertEqual(Dump.get_all_games(), ["Game 1"])
+
+                with self.assertRaises(OperationalError):
+                    Dump.add_many([("foo", "Game 2", ["RPG"])])
+            finally:
+                close_db()
+
+    def test_db_create_backup(self) -> None:
+        with tempfile.TemporaryDirectory() as dir_name:
+            dir_name = Path(dir_name)
+            backup_dir = dir_name / "backup"
+
+            init_db(str(dir_name / "games.sqlite"), mode=DB_MODE_DIRECT)
+            Dump.add_many([("foo", "Game 1", ["RPG"])])
+
+            file_name = db_create_backup(backup_dir)
+            self.assertIsNotNone(file_name)
+            self.assertTrue(file_name.exists())
+
+            # База не менялась - новый бекап не нужен
+            self.assertIsNone(db_create_backup(backup_dir))
+
+            Dump.add_many([("foo", "Game 2", ["RPG"])])
+            self.assertIsNotNone(db_create_backup(backup_dir))
+
+            close_db()
+
+    def test_db_create_backup_no_db(self) -> None:
+        with tempfile.TemporaryDirectory() as dir_name:
+            dir_name = Path(dir_name)
+            path = dir_name / "games.sqlite"
+
+            # Базы еще нет - бекапа нет, и пустая база не создается
+            with patch.dict("get_game_genres.db._db_params", path=str(path)):
+                self.assertIsNone(db_create_backup(dir_name / "backup"))
+
+            self.assertFalse(path.exists())
+            self.assertFalse((dir_name / "backup").exists())
+
+    def test_db_prune_backups(self) -> None:
+        with tempfile.TemporaryDirectory() as dir_name:
+            backup_dir = Path(dir_name)
+
+            now = datetime(2024, 1, 31, 12)
+            for hours in range(0, 24 * 60, 6):
+                dt = now - timedelta(hours=hours)
+                (backup_dir / f"games_{dt.strftime(BACKUP_DATE_FMT)}.sqlite.gz").touch()
+
+            # Не бекапы
+            (backup_dir / "games.sqlite.gz").touch()
+            (backup_dir / "games_unknown.sqlite.gz").touch()
+
+            db_prune_backups(backup_dir, keep_last=3, keep_daily=7, keep_weekly=4)
+            names = sorted(p.name for p in backup_dir.iterdir())
+
+            # 3 последних (все за 31.01) + 6 предыдущих дней + 2 недели до 22.01
+            self.assertIn(f"games_{now.strftime(BACKUP_DATE_FMT)}.sqlite.gz", names)
+            self.assertIn("games_2024-01-14_180000.sqlite.gz", names)
+            self.assertEqual(len(names), 3 + 6 + 2 + 2)
+
+    def test_init_db_invalid(self) -> None:
+        with self.assertRaises(ValueError):
+            init_db(":memory:", mode=DB_MODE_QUEUE)
+
+        with self.assertRaises(ValueError):
+            init_db(":memory:", mode=DB_MODE_READ_ONLY)
+
+        with self.assertRaises(ValueError):
+            init_db(":memory:", mode="unknown")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+import unittest
+
+from get_game_genres.db import DB_MODE_DIRECT, Dump, DumpIndex, close_db, init_db
+
+
+class TestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        init_db(":memory:", mode=DB_MODE_DIRECT)
+
+    def tearDown(self) -> None:
+        close_db()
+
+        # Возврат к базе по умолчанию для остальных тестов
+        init_db()
+
+    def test_get_pending(self) -> None:
+        Dump.add_many([("foo", "Game 1", ["RPG"]), ("bar", "Game 2", ["RPG"])])
+
+        index = DumpIndex()
+        self.assertTrue(index.exists("foo", "Game 1"))
+        self.assertFalse(index.exists("foo", "Game 2"))
+        self.assertEqual(
+            index.get_pending("foo", ["Game 1", "Game 2", "Game 3"]),
+            ["Game 2", "Game 3"],
+        )
+
+        index.add("foo", "Game 2")
+        self.assertEqual(index.get_pending("foo", ["Game 2", "Game 3"]), ["Game 3"])
+
+    def test_clear(self) -> None:
+        index = DumpIndex()
+        self.assertFalse(index.exists("foo", "Game 1"))
+
+        # Дампы сайта загружаются из базы один раз, до сброса индекса
+        Dump.add_many([("foo", "Game 1", ["RPG"])])
+        self.assertFalse(index.exists("foo", "Game 1"))
+
+        index.clear()
+        self.assertTrue(index.exists("foo", "Game 1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+import tempfile
+import time
+import unittest
+
+from pathlib import Path
+
+from get_game_genres.db import (
+    DB_MODE_DIRECT,
+    Dump,
+    DumpIndex,
+    DumpWriter,
+    close_db,
+    init_db,
+)
+
+
+class TestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        # База в файле, т.к. буфер по таймеру записывается из другого потока
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        init_db(str(Path(temp_dir.name) / "games.sqlite"), mode=DB_MODE_DIRECT)
+
+    def tearDown(self) -> None:
+        close_db()
+
+        # Возврат к базе по умолчанию для остальных тестов
+        init_db()
+
+    def test_add(self) -> None:
+        index = DumpIndex()
+        writer = DumpWriter(max_size=2, index=index)
+
+        writer.add("foo", "Game 1", ["RPG"])
+        self.assertEqual(len(writer), 1)
+        self.assertEqual(Dump.select().count(), 0)
+        self.assertTrue(index.exists("foo", "Game 1"))
+
+        writer.add("foo", "Game 2", ["Action"])
+        self.assertEqual(len(writer), 0)
+        self.assertEqual(Dump.select().count(), 2)
+
+        with writer:
+            writer.add("foo", "Game 3", [])
+        self.assertEqual(Dump.select().count(), 3)
+
+    def test_flush_by_timer(self) -> None:
+        writer = DumpWriter(max_size=10, max_delay=0.1)
+        writer.add("foo", "Game 1", ["RPG"])
+
+        # Новых записей нет, но буфер все равно записывается
+        for _ in range(50):
+            if Dump.select().count():
+                break
+            time.sleep(0.05)
+
+        self.assertEqual(Dump.select().count(), 1)
+        self.assertEqual(len(writer), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
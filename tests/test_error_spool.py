@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+import gzip
+import os
+import tempfile
+import time
+import unittest
+
+from pathlib import Path
+from unittest.mock import patch
+
+import requests
+
+from get_game_genres.parsers.error_spool import DUMP_SUFFIX, ErrorSpool
+
+
+def get_response(status_code: int, content: bytes) -> requests.Response:
+    rs = requests.Response()
+    rs.status_code = status_code
+    rs.url = "http://example.com/"
+    rs._content = content
+    return rs
+
+
+class TestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.dir_errors = Path(self.dir.name)
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    # Для ответов без исходного ответа сервера дамп - просто содержимое
+    @patch(
+        "get_game_genres.parsers.error_spool.dump.dump_all",
+        lambda rs, **kwargs: rs.content,
+    )
+    def test_add(self) -> None:
+        spool = ErrorSpool(self.dir_errors, sample_after=2, sample_every=3)
+        try:
+            # Одинаковые ошибки сохраняются один раз
+            spool.add("foo", "Game", get_response(500, b"error"))
+            spool.add("foo", "Game", get_response(500, b"error"))
+
+            # Из повторяющихся - первые 2, потом каждая 3-я
+            for i in range(1, 8):
+                spool.add("foo", "Game", get_response(500, f"error {i}".encode()))
+
+            spool.flush()
+        finally:
+            spool.close()
+
+        self.assertEqual(spool.saved, 4)
+        self.assertEqual(spool.skipped, 5)
+        self.assertEqual(
+            sorted(
+                gzip.decompress(file_name.read_bytes())
+                for file_name in self.dir_errors.glob(f"*{DUMP_SUFFIX}")
+            ),
+            [b"error", b"error 1", b"error 4", b"error 7"],
+        )
+
+    @patch(
+        "get_game_genres.parsers.error_spool.dump.dump_all",
+        lambda rs, **kwargs: rs.content,
+    )
+    def test_total_size(self) -> None:
+        spool = ErrorSpool(self.dir_errors)
+        try:
+            for i in range(5):
+                spool.add("foo", "Game", get_response(500, f"error {i}".encode()))
+            spool.flush()
+        finally:
+            spool.close()
+
+        # Размер не превышен - после проверки папки при запуске она больше
+        # не проверялась, а размер считался по новым дампам
+        self.assertEqual(spool._saves_since_prune, 5)
+        self.assertEqual(
+            spool._total_size,
+            sum(p.stat().st_size for p in self.dir_errors.glob(f"*{DUMP_SUFFIX}")),
+        )
+
+    def test_prune(self) -> None:
+        now = time.time()
+        for i in range(5):
+            file_name = self.dir_errors / f"foo_{i}{DUMP_SUFFIX}"
+            file_name.write_bytes(b"x" * 100)
+            os.utime(file_name, (now - i * 3600, now - i * 3600))
+
+        spool = ErrorSpool(self.dir_errors, max_size=250, max_age=3 * 3600 + 60)
+        spool.close()
+
+        # При запуске удаляется самый старый по возрасту, потом два по размеру
+        self.assertEqual(spool.prune(), [])
+        self.assertEqual(
+            sorted(p.name for p in self.dir_errors.iterdir()),
+            [f"foo_0{DUMP_SUFFIX}", f"foo_1{DUMP_SUFFIX}"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+import json
+import tempfile
+import threading
+import unittest
+
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Iterator
+
+import requests
+
+from bs4 import BeautifulSoup
+
+from get_game_genres.db import DB_MODE_DIRECT, GameUrl, close_db, init_db
+from get_game_genres.parsers.base_parser import GamePageParser
+from get_game_genres.parsers.error_spool import get_error_spool
+from get_game_genres.parsers.gameguru_ru import GameguruRuParser
+from get_game_genres.parsers.lookup_context import LookupContext
+
+
+PAGES: dict[str, str] = {
+    "/game/foo": "<title>Foo - Fake</title><ul class='genres'><li>RPG</li></ul>",
+    "/game/bar": "<title>Bar - Fake</title><ul class='genres'><li>Action</li></ul>",
+    "/game/foo-old": "<title>Foo - Fake</title><p>Страница перенесена</p>",
+    "/gameguru": """
+        <div id="publications-wrap"><div class="short-news-content">
+            <div class="short-news-title">Foo</div>
+            <div class="short-news-play-info"><div>Жанр: <span>RPG</span></div></div>
+        </div></div>
+    """,
+}
+
+
+class Handler(BaseHTTPRequestHandler):
+    paths: Counter = Counter()
+
+    def do_GET(self) -> None:
+        self.paths[self.path] += 1
+
+        if self.path.startswith("/search"):
+            data = json.dumps(["/game/bar", "/game/foo"]).encode("utf-8")
+        elif self.path == "/game/throttled":
+            self.send_error(429)
+            return
+        elif self.path in PAGES:
+            data = PAGES[self.path].encode("utf-8")
+        else:
+            self.send_error(404)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class FakeParser(GamePageParser):
+    base_url: str = ""
+
+    STREAM_UNTIL_GAME = ".genres"
+
+    @classmethod
+    def get_site_name(cls) -> str:
+        return "_test_game_url_"
+
+    def _iter_game_urls(self, ctx: LookupContext) -> Iterator[str]:
+        urls = ctx.send_get(f"{self.base_url}/search", return_json=True)
+        for url in urls:
+            if url.endswith(ctx.game_name.lower()):
+                yield self.base_url + url
+
+    def _parse_game_page(
+        self, ctx: LookupContext, root: BeautifulSoup
+    ) -> list[str] | None:
+        if not root.select_one(".genres"):
+            return None
+
+        return [li.text for li in root.select(".genres > li")]
+
+
+class FakeGameguruParser(GameguruRuParser):
+    @classmethod
+    def get_site_name(cls) -> str:
+        return "_test_game_url_gameguru_"
+
+
+class TestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        init_db(":memory:", mode=DB_MODE_DIRECT)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        FakeParser.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        self.parser = FakeParser(need_logs=False, use_http_cache=False)
+
+        # Дампы ответов с ошибками (404) не должны попадать в общую папку
+        self.dir_errors = tempfile.TemporaryDirectory()
+        self.parser._dir_errors = Path(self.dir_errors.name)
+        Handler.paths.clear()
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+        # Дампы пишутся в фоне, их нужно дождаться до удаления папки
+        get_error_spool(Path(self.dir_errors.name)).flush()
+        self.dir_errors.cleanup()
+
+        close_db()
+        init_db()
+
+    def test_saved_url(self) -> None:
+        site = FakeParser.get_site_name()
+
+        self.assertEqual(self.parser.get_game_genres("Foo"), ["RPG"])
+        self.assertEqual(Handler.paths, {"/search": 1, "/game/foo": 1})
+        self.assertEqual(GameUrl.get_url(site, "Foo"), f"{FakeParser.base_url}/game/foo")
+
+        # Повторно - сразу страница игры, без поиска
+        Handler.paths.clear()
+        self.assertEqual(self.parser.get_game_genres("Foo"), ["RPG"])
+        self.assertEqual(Handler.paths, {"/game/foo": 1})
+
+    def test_invalid_url(self) -> None:
+        site = FakeParser.get_site_name()
+
+        # Страницы больше нет
+        GameUrl.set_url(site, "Foo", f"{FakeParser.base_url}/game/unknown")
+        self.assertEqual(self.parser.get_game_genres("Foo"), ["RPG"])
+        self.assertEqual(GameUrl.get_url(site, "Foo"), f"{FakeParser.base_url}/game/foo")
+
+        # Страница другой игры
+        GameUrl.set_url(site, "Foo", f"{FakeParser.base_url}/game/bar")
+        self.assertEqual(self.parser.get_game_genres("Foo"), ["RPG"])
+        self.assertEqual(GameUrl.get_url(site, "Foo"), f"{FakeParser.base_url}/game/foo")
+
+        # Страница той же игры, но без жанров в разметке
+        GameUrl.set_url(site, "Foo", f"{FakeParser.base_url}/game/foo-old")
+        self.assertEqual(self.parser.get_game_genres("Foo"), ["RPG"])
+        self.assertEqual(GameUrl.get_url(site, "Foo"), f"{FakeParser.base_url}/game/foo")
+
+        GameUrl.delete_url(site, "Foo")
+        self.assertIsNone(GameUrl.get_url(site, "Foo"))
+
+    def test_saved_search_url(self) -> None:
+        # Для gameguru сохраняется адрес страницы поиска с найденной игрой
+        parser = FakeGameguruParser(need_logs=False, use_http_cache=False)
+        site = parser.get_site_name()
+        GameUrl.set_url(site, "Foo", f"{FakeParser.base_url}/gameguru")
+
+        self.assertEqual(parser.get_game_genres("Foo"), ["RPG"])
+        self.assertEqual(Handler.paths, {"/gameguru": 1})
+
+    def test_throttled_url(self) -> None:
+        site = FakeParser.get_site_name()
+        url = f"{FakeParser.base_url}/game/throttled"
+
+        # Сайт ограничивает запросы - адрес остается, поиск не запускается
+        GameUrl.set_url(site, "Foo", url)
+        with self.assertRaises(requests.HTTPError):
+            self.parser.get_game_genres("Foo")
+
+        self.assertEqual(GameUrl.get_url(site, "Foo"), url)
+        self.assertEqual(Handler.paths, {"/game/throttled": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
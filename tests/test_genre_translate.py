@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+import logging
+import os
+import tempfile
+import unittest
+
+from pathlib import Path
+from unittest.mock import patch
+
+from get_game_genres import log_backend
+from get_game_genres.common import load_json, save_json
+from get_game_genres.db import DB_MODE_DIRECT, Dump, close_db, init_db
+from get_game_genres.genre_translate_file import create
+
+
+class TestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        init_db(":memory:", mode=DB_MODE_DIRECT)
+
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.file_name = Path(temp_dir.name) / "genre_translate.json"
+
+        patcher = patch.object(create, "FILE_NAME_GENRE_TRANSLATE", self.file_name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # Лог не должен попадать в папку проекта
+        log = log_backend.get_logger(
+            "test_genre_translate", Path(temp_dir.name) / "genre_translate.txt"
+        )
+        patcher = patch.object(create, "log", log)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self) -> None:
+        log_backend.flush_logs()
+        handler = log_backend._routing_handler.handlers.pop("test_genre_translate")
+        handler.close()
+        logging.getLogger("test_genre_translate").handlers.clear()
+
+        close_db()
+        init_db()
+
+    def test_run(self) -> None:
+        Dump.add_many([("foo", "Game 1", ["RPG", "Action"])])
+        create.run(need_notify=False)
+        self.assertEqual(load_json(self.file_name), {"RPG": None, "Action": None})
+
+        # Проверяются только жанры новых дампов
+        Dump.add_many([("foo", "Game 2", ["Shooter"])])
+        with patch.object(
+            Dump, "get_all_genres", wraps=Dump.get_all_genres
+        ) as get_all_genres:
+            create.run(need_notify=False)
+        self.assertIsNotNone(get_all_genres.call_args.kwargs["since"])
+        self.assertIn("Shooter", load_json(self.file_name))
+
+        # Удаленный вручную жанр добавляется заново, хотя дампы не менялись
+        save_json({"RPG": "RPG", "Shooter": None}, self.file_name)
+        mtime = self.file_name.stat().st_mtime + 1
+        os.utime(self.file_name, (mtime, mtime))
+
+        create.run(need_notify=False)
+        self.assertEqual(
+            load_json(self.file_name), {"RPG": "RPG", "Shooter": None, "Action": None}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
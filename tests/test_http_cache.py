@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+import os
+import time
+import unittest
+
+import requests
+
+from get_game_genres.parsers.http_cache import HttpCache, get_cache_key
+
+
+def create_response(
+    content: bytes, headers: dict[str, str] | None = None
+) -> requests.Response:
+    rs = requests.Response()
+    rs.status_code = 200
+    rs.url = "https://example.com/"
+    rs.headers.update(headers or dict())
+    rs._content = content
+    return rs
+
+
+class TestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.http_cache = HttpCache(":memory:", max_size=1024 * 1024)
+
+    def tearDown(self) -> None:
+        self.http_cache.close()
+
+    def test_get_cache_key(self) -> None:
+        def get_key(method: str, **kwargs) -> str:
+            return get_cache_key(
+                requests.Request(method, "https://example.com/", **kwargs).prepare()
+            )
+
+        self.assertEqual(get_key("GET", params={"q": 1}), get_key("GET", params={"q": 1}))
+        self.assertNotEqual(get_key("GET", params={"q": 1}), get_key("GET", params={"q": 2}))
+        self.assertNotEqual(get_key("GET"), get_key("POST"))
+        self.assertNotEqual(get_key("POST", data={"q": 1}), get_key("POST", data={"q": 2}))
+
+        # Обрезанный ответ хранится отдельно от полного
+        request = requests.Request("GET", "https://example.com/").prepare()
+        self.assertEqual(get_cache_key(request), get_key("GET"))
+        self.assertNotEqual(get_cache_key(request, ".genres"), get_key("GET"))
+
+    def test_put_get(self) -> None:
+        self.assertIsNone(self.http_cache.get("foo"))
+
+        self.http_cache.put(
+            "foo",
+            create_response(
+                "Привет".encode("utf-8"),
+                headers={"Content-Type": "text/html; charset=utf-8", "ETag": '"123"'},
+            ),
+        )
+
+        entry = self.http_cache.get("foo")
+        self.assertFalse(entry.is_expired(ttl=60))
+        self.assertTrue(entry.can_revalidate())
+        self.assertEqual(entry.get_revalidate_headers(), {"If-None-Match": '"123"'})
+
+        rs = entry.to_response(requests.Request("GET", entry.url).prepare())
+        self.assertTrue(rs.ok)
+        self.assertEqual(rs.text, "Привет")
+
+        time.sleep(0.01)
+        self.assertTrue(entry.is_expired(ttl=0))
+
+    def test_evict(self) -> None:
+        http_cache = HttpCache(":memory:", max_size=3000)
+
+        # Случайные данные почти не сжимаются
+        for i in range(5):
+            http_cache.put(f"key_{i}", create_response(os.urandom(1000)))
+            time.sleep(0.001)
+
+            http_cache.get("key_0")  # К этой записи обращаются чаще всего
+            time.sleep(0.001)
+
+        self.assertLessEqual(http_cache.get_size(), 3000)
+        self.assertIsNotNone(http_cache.get("key_0"))
+        self.assertIsNotNone(http_cache.get("key_4"))
+        self.assertIsNone(http_cache.get("key_1"))
+
+        http_cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
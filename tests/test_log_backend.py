@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+import logging
+import tempfile
+import unittest
+
+from logging.handlers import QueueHandler
+from pathlib import Path
+from unittest.mock import patch
+
+from get_game_genres import log_backend
+
+
+class TestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.temp_dir.name)
+
+    def tearDown(self) -> None:
+        log_backend.flush_logs()
+        handler = log_backend._routing_handler.handlers.pop("test_log_backend", None)
+        if handler:
+            handler.close()
+        logging.getLogger("test_log_backend").handlers.clear()
+        self.temp_dir.cleanup()
+
+    def test_get_logger(self):
+        file_name = self.dir / "logs" / "test.txt"
+        log = log_backend.get_logger("test_log_backend", file_name, "%(message)s")
+        log.info("Жанры %r: %s", "Dead Space", ["Action"])
+        log_backend.flush_logs()
+
+        self.assertEqual(
+            "Жанры 'Dead Space': ['Action']\n",
+            file_name.read_text("utf-8"),
+        )
+
+        # Повторный вызов возвращает тот же логгер без новых обработчиков
+        log_backend.get_logger("test_log_backend", file_name)
+        queue_handlers = [h for h in log.handlers if isinstance(h, QueueHandler)]
+        self.assertEqual(1, len(queue_handlers))
+        self.assertFalse(log.propagate)
+
+    def test_get_level(self):
+        with (
+            patch.object(log_backend, "LOG_LEVEL", "INFO"),
+            patch.dict(log_backend.LOG_LEVELS, {"parser_*": "WARNING"}, clear=True),
+        ):
+            self.assertEqual(logging.WARNING, log_backend.get_level("parser_steam"))
+            self.assertEqual(logging.INFO, log_backend.get_level("dump.txt"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+import threading
+import time
+import unittest
+
+from timeit import default_timer
+from unittest.mock import patch
+
+from get_game_genres.lookup_game import iter_lookup_game, lookup_game
+from get_game_genres.parsers.base_parser import BaseParser
+from get_game_genres.parsers.lookup_context import LookupContext
+
+
+class FastParser(BaseParser):
+    @classmethod
+    def get_site_name(cls) -> str:
+        return "_test_fast_"
+
+    def _parse(self, ctx: LookupContext) -> list[str]:
+        return ["RPG", "Экшен"]
+
+
+class ErrorParser(BaseParser):
+    @classmethod
+    def get_site_name(cls) -> str:
+        return "_test_error_"
+
+    def _parse(self, ctx: LookupContext) -> list[str]:
+        raise Exception("Ошибка сайта")
+
+
+class SlowParser(BaseParser):
+    event = threading.Event()
+    is_daemon: bool = False
+
+    @classmethod
+    def get_site_name(cls) -> str:
+        return "_test_slow_"
+
+    def _parse(self, ctx: LookupContext) -> list[str]:
+        SlowParser.is_daemon = threading.current_thread().daemon
+        self.event.wait(timeout=10)
+        return ["Shooter"]
+
+
+class DelayedParser(BaseParser):
+    @classmethod
+    def get_site_name(cls) -> str:
+        return "_test_delayed_"
+
+    def _parse(self, ctx: LookupContext) -> list[str]:
+        time.sleep(0.4)
+        return ["Shooter"]
+
+
+class ConcurrentParser(BaseParser):
+    max_concurrency = 2
+    barrier = threading.Barrier(2, timeout=5)
+
+    @classmethod
+    def get_site_name(cls) -> str:
+        return "_test_concurrent_"
+
+    def _parse(self, ctx: LookupContext) -> list[str]:
+        # Обе игры ищутся одновременно, каждая в своей сессии
+        self.barrier.wait()
+        return [ctx.game_name, str(id(ctx.session))]
+
+
+class TestCase(unittest.TestCase):
+    def test_lookup_game(self) -> None:
+        parsers = [
+            cls(need_logs=False, use_http_cache=False)
+            for cls in [SlowParser, FastParser, ErrorParser]
+        ]
+        genre_translate = {"RPG": "RPG", "Экшен": "Action", "Shooter": "Shooter"}
+
+        arrived: list[str] = []
+        t = default_timer()
+        try:
+            result = lookup_game(
+                "Foo",
+                parsers,
+                timeout=0.5,
+                genre_translate=genre_translate,
+                on_result=lambda x: arrived.append(x.site),
+            )
+        finally:
+            SlowParser.event.set()
+
+        # Медленный сайт не задерживает результат остальных
+        self.assertLess(default_timer() - t, 5)
+        self.assertEqual(arrived[-1], "_test_slow_")
+
+        # Зависший сайт не задерживает завершение программы
+        self.assertTrue(SlowParser.is_daemon)
+        self.assertEqual(
+            {x.site: x.is_ok() for x in result.sites},
+            {"_test_fast_": True, "_test_error_": False, "_test_slow_": False},
+        )
+        self.assertEqual(result.raw_genres, ["RPG", "Экшен"])
+        self.assertEqual(result.genres, ["Action/RPG"])
+
+    def test_lookup_game_site_timeout(self) -> None:
+        parser = DelayedParser(need_logs=False, use_http_cache=False)
+
+        # Поток сайта запускается с задержкой, таймаут отсчитывается от его запуска
+        start = threading.Thread.start
+
+        def delayed_start(thread: threading.Thread) -> None:
+            if thread.name == "lookup_game__test_delayed_":
+                threading.Timer(0.3, start, [thread]).start()
+            else:
+                start(thread)
+
+        with patch.object(threading.Thread, "start", delayed_start):
+            results = list(iter_lookup_game("Foo", [parser], timeout=0.6))
+
+        self.assertEqual([x.genres for x in results], [["Shooter"]])
+
+    def test_concurrent_lookups(self) -> None:
+        parser = ConcurrentParser(need_logs=False, use_http_cache=False)
+
+        results: dict[str, list[str]] = dict()
+
+        def lookup(game: str) -> None:
+            results[game] = parser.get_game_genres(game)
+
+        threads = [threading.Thread(target=lookup, args=[game]) for game in "AB"]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Жанры отсортированы: id сессии, затем название игры
+        session_a, game_a = results["A"]
+        session_b, game_b = results["B"]
+        self.assertEqual((game_a, game_b), ("A", "B"))
+        self.assertNotEqual(session_a, session_b)
+
+
+if __name__ == "__main__":
+    unittest.main()
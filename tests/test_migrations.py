@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+import runpy
+import sqlite3
+import tempfile
+import unittest
+
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+from get_game_genres import config
+from get_game_genres.db import (
+    DB_MODE_DIRECT,
+    Dump,
+    DumpGenre,
+    Game,
+    GameGenre,
+    Watermark,
+    close_db,
+    init_db,
+)
+
+
+# Схема базы до миграций
+SQL_OLD_SCHEMA: str = """
+CREATE TABLE "dump" (
+    "id" INTEGER NOT NULL PRIMARY KEY,
+    "name" VARCHAR(255) NOT NULL,
+    "site" VARCHAR(255) NOT NULL,
+    "genres" TEXT NOT NULL
+);
+CREATE UNIQUE INDEX "dump_name_site" ON "dump" ("name", "site");
+CREATE TABLE "game" ("name" TEXT NOT NULL PRIMARY KEY, "genres" TEXT NOT NULL);
+CREATE TABLE "genre" ("name" TEXT NOT NULL PRIMARY KEY, "description" TEXT NOT NULL);
+
+INSERT INTO "dump" ("name", "site", "genres") VALUES
+    ('Game 1', 'foo', '["RPG", "Action", "RPG"]'),
+    ('Game 1', 'bar', '["Action"]'),
+    ('Game 2', 'foo', '[]');
+INSERT INTO "game" ("name", "genres") VALUES ('Game 1', '["Action", "RPG"]');
+"""
+
+
+def get_index_names(path: Path) -> set[str]:
+    with sqlite3.connect(path) as connection:
+        rows = connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index'"
+        ).fetchall()
+    return {name for (name,) in rows}
+
+
+class TestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.path = Path(temp_dir.name) / "games.sqlite"
+
+        with sqlite3.connect(self.path) as connection:
+            connection.executescript(SQL_OLD_SCHEMA)
+
+    def tearDown(self) -> None:
+        close_db()
+        init_db()
+
+    def run_migration(self, name: str) -> None:
+        with (
+            patch.object(config, "DB_FILE_NAME", str(self.path)),
+            redirect_stdout(StringIO()),
+        ):
+            runpy.run_module(f"get_game_genres.migrations.{name}", run_name="__main__")
+
+    def test_upgrade(self) -> None:
+        self.run_migration("001")
+
+        # Подключение к базе до миграции 003 не создает индексы по
+        # несуществующим столбцам
+        init_db(str(self.path), mode=DB_MODE_DIRECT)
+        self.assertIsNone(Watermark.get_value("test"))
+        close_db()
+        self.assertNotIn("dump_updated_at", get_index_names(self.path))
+
+        # Такой индекс могла создать прошлая версия, миграция его пересоздает
+        with sqlite3.connect(self.path) as connection:
+            connection.execute('CREATE INDEX "game_updated_at" ON "game" ("updated_at")')
+
+        self.run_migration("002")
+        self.run_migration("003")
+
+        with sqlite3.connect(self.path) as connection:
+            self.assertEqual(
+                connection.execute("PRAGMA integrity_check").fetchone(), ("ok",)
+            )
+        self.assertLessEqual(
+            {"dump_created_at", "dump_updated_at", "game_created_at", "game_updated_at"},
+            get_index_names(self.path),
+        )
+
+        init_db(str(self.path), mode=DB_MODE_DIRECT)
+        self.assertEqual(Dump.get_all_genres(), ["Action", "RPG"])
+        self.assertEqual(Dump.changed_since(None).count(), 3)
+        self.assertIsNotNone(Game.get_last_updated_at())
+        self.assertEqual(DumpGenre.select().count(), 3)
+        self.assertEqual(GameGenre.select().count(), 2)
+
+        with patch("get_game_genres.db.USE_NORMALIZED_GENRES", True):
+            self.assertEqual(Dump.get_genres_by_game("Game 1"), ["Action", "RPG"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+import tempfile
+import unittest
+
+from pathlib import Path
+from unittest.mock import patch
+
+from get_game_genres import parsers
+from get_game_genres.parsers import http_cache
+from get_game_genres.parsers import get_parser_class, get_parsers, get_site_names
+from get_game_genres.parsers.base_parser import GamePageParser
+from get_game_genres.parsers.stopgame_ru import StopgameRuParser
+
+
+class TestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        # Парсеры создаются с настройками по умолчанию, кэш ответов не должен
+        # попадать в папку проекта
+        patcher = patch.object(
+            http_cache, "_http_cache", http_cache.HttpCache(":memory:")
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # Список парсеров собирается заново и сохраняется во временную папку
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.file_name_manifest = Path(temp_dir.name) / "parsers.json"
+
+        for name, value in [
+            ("FILE_NAME_PARSERS_MANIFEST", self.file_name_manifest),
+            ("_manifest", None),
+        ]:
+            patcher = patch.object(parsers, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        get_parser_class.cache_clear()
+        self.addCleanup(get_parser_class.cache_clear)
+
+    def test_get_site_names(self) -> None:
+        site_names = get_site_names()
+        self.assertIn("stopgame_ru", site_names)
+        self.assertTrue(self.file_name_manifest.exists())
+
+        # Вспомогательные модули - не парсеры
+        self.assertNotIn("base_parser", site_names)
+        self.assertNotIn("http_cache", site_names)
+        self.assertNotIn("_test_incomplete_", site_names)
+
+    def test_get_parsers(self) -> None:
+        self.assertIs(get_parser_class("stopgame_ru"), StopgameRuParser)
+
+        parsers = get_parsers(sites=["stopgame_ru"])
+        self.assertEqual([type(p) for p in parsers], [StopgameRuParser])
+
+        parsers = get_parsers(exclude_sites=["stopgame_ru"])
+        self.assertEqual(len(parsers), len(get_site_names()) - 1)
+        self.assertNotIn(StopgameRuParser, [type(p) for p in parsers])
+
+        with self.assertRaises(ValueError):
+            get_parsers(sites=["unknown"])
+
+        with self.assertRaises(ValueError):
+            get_parsers(exclude_sites=["unknown"])
+
+    def test_abstract_methods(self) -> None:
+        # Парсер без поиска игры и разбора ее страницы не создается
+        class IncompleteParser(GamePageParser):
+            @classmethod
+            def get_site_name(cls) -> str:
+                return "_test_incomplete_"
+
+        with self.assertRaises(TypeError):
+            IncompleteParser()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+import unittest
+
+import requests
+
+from get_game_genres.parsers.rate_limiter import RateLimiter, parse_retry_after
+
+
+def create_response(
+    status_code: int, headers: dict[str, str] | None = None
+) -> requests.Response:
+    rs = requests.Response()
+    rs.status_code = status_code
+    rs.headers.update(headers or dict())
+    return rs
+
+
+class TestCase(unittest.TestCase):
+    def test_parse_retry_after(self) -> None:
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("foo"))
+        self.assertEqual(parse_retry_after("120"), 120)
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0)
+
+    def test_burst(self) -> None:
+        rate_limiter = RateLimiter(rate=1, burst=2)
+        self.assertTrue(rate_limiter.try_acquire())
+        self.assertTrue(rate_limiter.try_acquire())
+        self.assertFalse(rate_limiter.try_acquire())
+        self.assertGreater(rate_limiter.get_wait_time(), 0.5)
+
+    def test_aimd(self) -> None:
+        rate_limiter = RateLimiter(rate=1, min_rate=0.1, max_rate=2, rate_increase=0.5)
+
+        rate_limiter.on_response(create_response(200))
+        self.assertEqual(rate_limiter.rate, 1.5)
+
+        rate_limiter.on_response(create_response(404))
+        rate_limiter.on_response(create_response(200))
+        self.assertEqual(rate_limiter.rate, 2)
+
+        rate_limiter.on_response(create_response(503))
+        self.assertEqual(rate_limiter.rate, 1)
+
+        for _ in range(10):
+            rate_limiter.on_throttle()
+        self.assertEqual(rate_limiter.rate, 0.1)
+
+    def test_retry_after(self) -> None:
+        rate_limiter = RateLimiter(rate=100, burst=10)
+
+        rate_limiter.on_response(create_response(429, {"Retry-After": "30"}))
+        self.assertFalse(rate_limiter.try_acquire())
+        self.assertGreater(rate_limiter.get_wait_time(), 29)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+import io
+import unittest
+
+from functools import partial
+from unittest.mock import patch
+
+import requests
+
+from get_game_genres.parsers.base_parser import BaseParser
+from get_game_genres.parsers.circuit_breaker import CircuitBreaker
+from get_game_genres.parsers.lookup_context import LookupContext
+from get_game_genres.parsers.streaming import (
+    ResponseTooLargeError,
+    SelectorWatcher,
+    read_until,
+)
+
+
+PAGE: bytes = (
+    "<html><head><title>Игра</title></head><body>"
+    '<div class="block details_block"><div>Жанр: <a>RPG</a><br></div></div>'
+    + "<p>Описание</p>" * 10_000
+    + "</body></html>"
+).encode("utf-8")
+
+
+def get_response(data: bytes) -> requests.Response:
+    rs = requests.Response()
+    rs.status_code = 200
+    rs.url = "http://example.com/"
+    rs.raw = io.BytesIO(data)
+    return rs
+
+
+class PageAdapter(requests.adapters.BaseAdapter):
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        rs = get_response(PAGE)
+        rs.request = request
+        return rs
+
+    def close(self) -> None:
+        pass
+
+
+class FakeParser(BaseParser):
+    @classmethod
+    def get_site_name(cls) -> str:
+        return "_test_streaming_"
+
+    def _parse(self, ctx: LookupContext) -> list[str]:
+        return []
+
+
+class TestCase(unittest.TestCase):
+    def test_selector_watcher(self) -> None:
+        watcher = SelectorWatcher("div.details_block")
+
+        # Части разбиваются посреди тегов
+        for i in range(0, 200, 7):
+            watcher.feed(PAGE[i : i + 7].decode("utf-8", errors="ignore"))
+        self.assertTrue(watcher.is_found)
+        self.assertTrue(watcher.is_done)
+
+        watcher = SelectorWatcher("#unknown")
+        watcher.feed(PAGE.decode("utf-8"))
+        self.assertFalse(watcher.is_found)
+
+        with self.assertRaises(ValueError):
+            SelectorWatcher(".genres > a")
+
+    def test_read_until(self) -> None:
+        rs = get_response(PAGE)
+        self.assertTrue(read_until(rs, ".details_block", chunk_size=64))
+        self.assertLess(len(rs.content), 300)
+        self.assertIn("RPG".encode("utf-8"), rs.content)
+
+        # Элемента нет - ответ читается целиком
+        rs = get_response(PAGE)
+        self.assertFalse(read_until(rs, ".genres"))
+        self.assertEqual(rs.content, PAGE)
+
+        with self.assertRaises(ResponseTooLargeError):
+            read_until(get_response(PAGE), ".genres", max_size=1024, chunk_size=256)
+
+    def test_too_large_closes_circuit(self) -> None:
+        parser = FakeParser(need_logs=False, use_http_cache=False)
+
+        # Выключатель в состоянии half_open: следующий запрос - пробный
+        parser.circuit_breaker = CircuitBreaker(
+            "_test_streaming_", failure_threshold=1, reset_timeout=0
+        )
+        parser.circuit_breaker.on_failure()
+
+        session = requests.Session()
+        session.mount("http://", PageAdapter())
+        ctx = LookupContext(parser, "Игра", session)
+
+        with (
+            patch(
+                "get_game_genres.parsers.base_parser.read_until",
+                partial(read_until, max_size=1024, chunk_size=256),
+            ),
+            self.assertRaises(ResponseTooLargeError),
+        ):
+            parser._request(ctx, "GET", "http://example.com/", stream_until=".genres")
+
+        # Сайт ответил, поэтому запросы к нему не заблокированы
+        self.assertFalse(parser.circuit_breaker.is_open())
+        self.assertEqual(parser.circuit_breaker.state, "closed")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+import threading
+import unittest
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from urllib3.exceptions import MaxRetryError, ReadTimeoutError
+
+from get_game_genres.parsers.transport import (
+    JitterRetry,
+    LatencyTracker,
+    SessionPool,
+    create_retry,
+    create_session,
+    is_timeout_error,
+)
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    # Первые два запроса завершаются ошибкой 502
+    number: int = 0
+
+    def do_GET(self) -> None:
+        FlakyHandler.number += 1
+
+        status_code = 502 if FlakyHandler.number <= 2 else 200
+        self.send_response(status_code)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class TestCase(unittest.TestCase):
+    def test_latency_tracker(self) -> None:
+        latency = LatencyTracker(
+            min_samples=10, multiplier=2, min_timeout=1, max_timeout=30
+        )
+        self.assertEqual(latency.get_read_timeout(), 30)
+
+        for i in range(1, 11):
+            latency.add(i / 10)
+
+        self.assertEqual(latency.get_percentile(0.5), 0.6)
+        self.assertEqual(latency.get_read_timeout(), 2)
+
+        latency.add(100)
+        self.assertEqual(latency.get_read_timeout(), 30)
+
+    def test_latency_tracker_timeouts(self) -> None:
+        latency = LatencyTracker(
+            min_samples=10, multiplier=2, min_timeout=1, max_timeout=100, max_timeouts=3
+        )
+        for _ in range(20):
+            latency.add(0.5)
+        self.assertEqual(latency.get_read_timeout(), 1)
+
+        # Сайт стал отвечать дольше таймаута: замеров нет, только таймауты
+        latency.on_timeout()
+        latency.on_timeout()
+        self.assertEqual(latency.get_read_timeout(), 2)
+
+        latency.on_timeout()
+        self.assertEqual(latency.get_read_timeout(), 100)
+
+        # Успешный ответ сбрасывает счетчик таймаутов подряд
+        for _ in range(10):
+            latency.add(5)
+        latency.on_timeout()
+        latency.on_timeout()
+        latency.add(5)
+        latency.on_timeout()
+        self.assertEqual(latency.get_read_timeout(), 80)
+
+    def test_is_timeout_error(self) -> None:
+        self.assertTrue(is_timeout_error(requests.ReadTimeout()))
+
+        reason = ReadTimeoutError(None, "/", "Read timed out.")
+        e = requests.ConnectionError(MaxRetryError(None, "/", reason))
+        self.assertTrue(is_timeout_error(e))
+
+        self.assertFalse(is_timeout_error(requests.ConnectionError()))
+        self.assertFalse(is_timeout_error(ValueError("foo")))
+
+    def test_session_pool(self) -> None:
+        pool = SessionPool(max_size=2)
+
+        with pool.session() as (session_1, is_new):
+            self.assertTrue(is_new)
+            with pool.session() as (session_2, is_new):
+                self.assertTrue(is_new)
+                self.assertIsNot(session_1, session_2)
+
+            # Свободная сессия используется повторно
+            with pool.session() as (session_3, is_new):
+                self.assertFalse(is_new)
+                self.assertIs(session_3, session_2)
+
+        self.assertEqual(len(pool), 2)
+
+        # Сессия после ошибки не возвращается в пул
+        with self.assertRaises(ValueError):
+            with pool.session():
+                raise ValueError()
+        self.assertEqual(len(pool), 1)
+
+        # Если свободных сессий нет, то ожидание освобождения
+        session, _ = pool.acquire()
+        pool.acquire()
+        threading.Timer(0.1, pool.release, args=[session]).start()
+        self.assertIs(pool.acquire()[0], session)
+
+    def test_retry(self) -> None:
+        retry = create_retry(total=3, backoff=0.01)
+        self.assertIsInstance(retry.increment("GET", "/"), JitterRetry)
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            session = create_session(retry=retry)
+            rs = session.get(f"http://127.0.0.1:{server.server_port}/", timeout=5)
+            self.assertEqual(rs.status_code, 200)
+            self.assertEqual(FlakyHandler.number, 3)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()